@@ -0,0 +1,5 @@
+"""
+Benchmarks of the SDK's per-request overhead, run against an in-process fake transport.
+
+Run with ``python -m benchmarks``, see ``python -m benchmarks --help``.
+"""
@@ -0,0 +1,65 @@
+import sys
+from argparse import ArgumentParser
+from json import dump, load
+from pathlib import Path
+
+from .suite import compare, report, run
+from .transport import BACKENDS
+
+BASELINE = Path(__file__).parent / "baseline.json"
+
+
+def main(argv=None) -> int:
+    parser = ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks the SDK's request pipeline against a fake transport.",
+    )
+    parser.add_argument(
+        "--backend", action="append", choices=sorted(BACKENDS), help="Backend to run"
+    )
+    parser.add_argument("--match", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--runs",
+        type=int,
+        default=3,
+        help="Runs of all benchmarks whose median is reported. Defaults to 3",
+    )
+    parser.add_argument("--save", type=Path, help="Write results as a baseline file")
+    parser.add_argument(
+        "--compare",
+        type=Path,
+        nargs="?",
+        const=BASELINE,
+        help="Fail if results regress against a baseline file",
+    )
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed slowdown against the baseline. Defaults to 0.25",
+    )
+    args = parser.parse_args(argv)
+
+    results = run(args.backend, match=args.match, repeat=args.repeat, runs=args.runs)
+    width = max(len(r.name) for r in results)
+    print(f"{'benchmark':<{width}}  {'us/call':>10}  {'ratio':>8}  {'alloc B':>8}")
+    for r in results:
+        print(f"{r.name:<{width}}  {r.us:>10.2f}  {r.ratio:>8.2f}  {r.alloc_bytes:>8}")
+
+    if args.save:
+        with open(args.save, "w") as handle:
+            dump(report(results), handle, indent=2)
+            handle.write("\n")
+
+    if args.compare:
+        with open(args.compare) as handle:
+            regressions = compare(results, load(handle), tolerance=args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
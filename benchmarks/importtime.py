@@ -0,0 +1,96 @@
+"""
+Import time of the SDK measured with `python -X importtime`, checked against budgets.
+
+Run with `python -m benchmarks.importtime`, which fails when a scenario takes longer
+than its budget.
+"""
+
+import subprocess
+import sys
+from argparse import ArgumentParser
+from typing import Dict, List, Tuple
+
+# Scenario name: (statement, budget in milliseconds)
+SCENARIOS: Dict[str, Tuple[str, float]] = {
+    "import": ("import satellitevu", 5.0),
+    "client": ("from satellitevu import Client; Client('id', 'secret')", 75.0),
+    "catalog.urllib": (
+        "from satellitevu import Client; from satellitevu.http import UrllibClient; "
+        "Client('id', 'secret', http_client=UrllibClient()).catalog_v1",
+        200.0,
+    ),
+}
+
+
+def parse(output: str) -> float:
+    """
+    Returns the milliseconds spent importing modules after interpreter startup, from
+    the output of `python -X importtime`. Modules imported by site are excluded.
+    """
+    total = 0
+    started = False
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        _, cumulative, name = line.split("|")
+        if not cumulative.strip().isdigit():
+            continue  # header
+        if name.startswith("  "):
+            continue  # imported by another module
+        if started:
+            total += int(cumulative)
+        elif name.strip() == "site":
+            started = True
+    return total / 1000
+
+
+def import_time(statement: str, repeat: int = 5) -> float:
+    """
+    Returns the best import time in milliseconds of running statement in a fresh
+    interpreter.
+    """
+    times = []
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        times.append(parse(process.stderr))
+    return min(times)
+
+
+def check(repeat: int = 5) -> Tuple[Dict[str, float], List[str]]:
+    """
+    Returns the import time of each scenario and the scenarios over budget.
+    """
+    times = {}
+    over_budget = []
+    for name, (statement, budget) in SCENARIOS.items():
+        times[name] = import_time(statement, repeat)
+        if times[name] > budget:
+            over_budget.append(f"{name}: {times[name]:.1f} ms, budget {budget:.1f} ms")
+    return times, over_budget
+
+
+def main(argv=None) -> int:
+    parser = ArgumentParser(
+        prog="python -m benchmarks.importtime",
+        description="Checks the SDK's import time against budgets.",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    times, over_budget = check(args.repeat)
+    width = max(len(name) for name in times)
+    print(f"{'scenario':<{width}}  {'ms':>8}  {'budget':>8}")
+    for name, ms in times.items():
+        print(f"{name:<{width}}  {ms:>8.1f}  {SCENARIOS[name][1]:>8.1f}")
+    for message in over_budget:
+        print(f"OVER BUDGET {message}", file=sys.stderr)
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
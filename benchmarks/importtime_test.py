@@ -0,0 +1,24 @@
+from allure import description, suite, title
+
+from .importtime import import_time, parse
+
+OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |   encodings.aliases
+import time:       900 |       1000 | site
+import time:       300 |        300 |   satellitevu.config
+import time:       700 |       1000 | satellitevu
+import time:       500 |        500 | satellitevu.http.urllib
+"""
+
+
+@suite("Benchmarks")
+class TestImportTime:
+    @title("Parse import times")
+    @description("Sums the top-level imports after interpreter startup")
+    def test_parse(self):
+        assert parse(OUTPUT) == 1.5
+
+    @title("Measure import time")
+    def test_import_time(self):
+        assert import_time("import satellitevu", repeat=1) > 0
@@ -0,0 +1,267 @@
+import gc
+import platform
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from json import dumps
+from statistics import median
+from timeit import Timer
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.request import install_opener
+from uuid import uuid4
+
+from satellitevu import Client
+from satellitevu.auth.cache import MemoryCache
+from satellitevu.apis.otm import OtmV2
+
+from .transport import BACKENDS, FakeTransport
+
+GATEWAY_URL = "https://api.example.com/"
+AUTH_URL = "https://auth.example.com/"
+CONTRACT_ID = str(uuid4())
+
+SEARCH_PAGE = dumps(
+    {
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": f"item-{i}",
+                "collection": "visual",
+                "bbox": [0.0, 0.0, 1.0, 1.0],
+                "properties": {"datetime": "2024-01-01T00:00:00Z"},
+            }
+            for i in range(10)
+        ],
+        "links": [],
+    }
+).encode()
+
+TASKING = {
+    "coordinates": (0.5, 51.5),
+    "date_from": datetime(2024, 1, 1, tzinfo=timezone.utc),
+    "date_to": datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(days=7),
+    "day_night_mode": "day",
+    "max_cloud_cover": 20,
+    "min_off_nadir": 0,
+    "max_off_nadir": 30,
+}
+
+
+def reference():
+    """
+    Fixed pure Python workload timed alongside every benchmark, so that benchmarks
+    can be compared as ratios to it across machines and machine load.
+    """
+    return dumps({str(i): [i, i * 0.5, None] for i in range(20)})
+
+
+@lru_cache(maxsize=None)
+def _reference_number() -> int:
+    number, _ = Timer(reference).autorange()
+    return max(number // 5, 1)
+
+
+@dataclass
+class Result:
+    """
+    Timing of a benchmark in microseconds per call (best of several repeats), the
+    peak memory in bytes allocated by a single call and the median ratio of its time
+    to the time of the reference workload measured right before and after it.
+    """
+
+    name: str
+    us: float
+    alloc_bytes: int
+    calls: int
+    ratio: Optional[float] = None
+
+
+def measure(name: str, func: Callable[[], object], *, repeat: int = 5) -> Result:
+    func()
+    timer, reference_timer = Timer(func), Timer(reference)
+    number, _ = timer.autorange()
+    number, reference_number = max(number // 5, 1), _reference_number()
+    # Timings interleaved with the reference are slowed down by the same changes in
+    # machine load, which mostly cancel out in their ratio
+    times, ratios = [], []
+    gc.disable()
+    try:
+        for _ in range(repeat * 2):
+            before = reference_timer.timeit(reference_number) / reference_number
+            times.append(timer.timeit(number) / number)
+            after = reference_timer.timeit(reference_number) / reference_number
+            ratios.append(times[-1] / min(before, after))
+    finally:
+        gc.enable()
+    best = min(times)
+
+    tracemalloc.start()
+    try:
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name,
+        round(best * 1e6, 3),
+        max(peak - start, 0),
+        number,
+        round(median(ratios), 4),
+    )
+
+
+def setup(backend: str) -> Tuple[Client, FakeTransport]:
+    """
+    Returns a client using the given backend with a fake transport, with a cached
+    token so that no authentication happens while benchmarking.
+    """
+    otm_url = f"{GATEWAY_URL}otm/v2/{CONTRACT_ID}/tasking/"
+    transport = FakeTransport(
+        {
+            f"{otm_url}feasibilities/": (202, b'{"id": "feasibility"}'),
+            f"{otm_url}orders/": (201, b'{"id": "order"}'),
+        },
+        default=SEARCH_PAGE,
+    )
+    client = Client(
+        "benchmark",
+        "secret",
+        cache=MemoryCache(),
+        auth_url=AUTH_URL,
+        gateway_url=GATEWAY_URL,
+        http_client=BACKENDS[backend](transport),
+    )
+    client.auth.token(client.catalog_v1.scopes)
+    return client, transport
+
+
+def benchmarks(client: Client) -> Iterator[Tuple[str, Callable[[], object]]]:
+    """
+    Yields the benchmarks of the request pipeline by stage, from building payloads
+    and URLs over preparing headers to complete API calls.
+    """
+    http, catalog, otm = client._client, client.catalog_v1, client.otm_v2
+    url = catalog.url(f"{CONTRACT_ID}/search")
+    scopes = catalog.scopes
+
+    yield (
+        "payload.tasking",
+        lambda: OtmV2._tasking_payload(
+            product="standard", min_gsd=None, max_gsd=None, **TASKING
+        ),
+    )
+    yield "api.url", lambda: catalog.url(f"{CONTRACT_ID}/search")
+    yield "auth.token", lambda: client.auth.token(scopes)
+    yield "client.set_auth", lambda: http._set_auth(url, {}, scopes)
+    yield "client.prepare_headers", lambda: http.prepare_headers(url, None, scopes)
+    yield "client.request", lambda: http.request("GET", url, scopes=scopes)
+    yield "api.make_request", lambda: catalog.make_request(method="GET", url=url)
+    yield (
+        "catalog.search",
+        lambda: catalog.search(
+            contract_id=CONTRACT_ID, bbox=[0, 0, 1, 1], collections=["visual"]
+        ).json(),
+    )
+    yield (
+        "otm.post_feasibility",
+        lambda: otm.post_feasibility(contract_id=CONTRACT_ID, **TASKING),
+    )
+    yield (
+        "otm.create_order",
+        lambda: otm.create_order(
+            contract_id=CONTRACT_ID, addon_withhold="0d", **TASKING
+        ),
+    )
+
+
+def run(
+    backends: Optional[Iterable[str]] = None,
+    *,
+    match: Optional[str] = None,
+    repeat: int = 5,
+    runs: int = 1,
+) -> List[Result]:
+    """
+    Runs the benchmarks for each backend, named "<backend>/<benchmark>", optionally
+    only those whose name contains match.
+
+    With several runs, each result is the median of the runs, which is far less
+    sensitive to a busy machine than a single run.
+    """
+    runs_results = [
+        _run_once(backends, match=match, repeat=repeat) for _ in range(runs)
+    ]
+    results = []
+    for same in zip(*runs_results):
+        results.append(
+            Result(
+                same[0].name,
+                round(median(r.us for r in same), 3),
+                int(median(r.alloc_bytes for r in same)),
+                same[0].calls,
+                round(median(r.ratio for r in same), 4),
+            )
+        )
+    return results
+
+
+def _run_once(
+    backends: Optional[Iterable[str]], *, match: Optional[str], repeat: int
+) -> List[Result]:
+    results = []
+    for backend in backends or BACKENDS:
+        client, _ = setup(backend)
+        try:
+            for name, func in benchmarks(client):
+                name = f"{backend}/{name}"
+                if match and match not in name:
+                    continue
+                results.append(measure(name, func, repeat=repeat))
+        finally:
+            install_opener(None)
+    return results
+
+
+def report(results: Iterable[Result]) -> Dict:
+    """
+    Returns results in the format of baseline files.
+    """
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": {
+            r.name: {k: v for k, v in asdict(r).items() if k != "name"} for r in results
+        },
+    }
+
+
+def compare(
+    results: Iterable[Result], baseline: Dict, *, tolerance: float = 0.25
+) -> List[str]:
+    """
+    Returns a description of each benchmark slower than its baseline by more than the
+    tolerance, as a fraction of the baseline. Benchmarks are compared by their ratio
+    to the reference workload where the baseline has one, so that a faster or busier
+    machine does not shift all results, and by their time otherwise.
+    """
+    regressions = []
+    for result in results:
+        expected = baseline.get("results", {}).get(result.name)
+        if not expected:
+            continue
+        if result.ratio is not None and expected.get("ratio"):
+            if result.ratio > expected["ratio"] * (1 + tolerance):
+                regressions.append(
+                    f"{result.name}: {result.ratio:.2f}x reference, baseline "
+                    f"{expected['ratio']:.2f}x ({result.us:.2f} us)"
+                )
+        elif result.us > expected["us"] * (1 + tolerance):
+            regressions.append(
+                f"{result.name}: {result.us:.2f} us, baseline {expected['us']:.2f} us"
+            )
+    return regressions
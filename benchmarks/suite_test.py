@@ -0,0 +1,54 @@
+from allure import description, title, suite
+from timeit import Timer
+from unittest.mock import patch
+from urllib.request import install_opener
+
+from .suite import Result, _reference_number, compare, report, run, setup
+
+
+@suite("Benchmarks")
+class TestBenchmarks:
+    @title("Fake transport")
+    @description("Benchmarked API calls are answered by the fake transport")
+    def test_setup(self):
+        client, transport = setup("urllib")
+        try:
+            page = client.catalog_v1.search(contract_id="contract").json()
+        finally:
+            install_opener(None)
+
+        assert len(page["features"]) == 10
+        assert transport.requests == 2
+
+    @title("Run benchmarks")
+    def test_run(self):
+        # Few calls per timing, the results only need to be positive
+        with patch.object(Timer, "autorange", return_value=(5, 0.0)):
+            _reference_number.cache_clear()
+            results = run(["urllib"], match="api.url", repeat=1, runs=2)
+        _reference_number.cache_clear()
+
+        assert [r.name for r in results] == ["urllib/api.url"]
+        assert results[0].us > 0 and results[0].ratio > 0
+
+    @title("Compare with baseline")
+    def test_compare(self):
+        baseline = report([Result("a", 1.0, 0, 1), Result("b", 1.0, 0, 1)])
+        results = [Result("a", 1.2, 0, 1), Result("b", 1.3, 0, 1)]
+
+        assert compare(results, baseline, tolerance=0.25) == [
+            "b: 1.30 us, baseline 1.00 us"
+        ]
+
+    @title("Compare ratios with baseline")
+    @description("Results are compared relative to the reference benchmark")
+    def test_compare_ratio(self):
+        baseline = report([Result("a", 2.0, 0, 1, 2.0)])
+        # A machine twice as slow, and a real regression
+        slower = [Result("a", 4.0, 0, 1, 2.0)]
+        regressed = [Result("a", 3.0, 0, 1, 3.0)]
+
+        assert compare(slower, baseline) == []
+        assert compare(regressed, baseline) == [
+            "a: 3.00x reference, baseline 2.00x (3.00 us)"
+        ]
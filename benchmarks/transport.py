@@ -0,0 +1,154 @@
+from base64 import urlsafe_b64encode
+from email.message import Message
+from io import BytesIO
+from json import dumps
+from time import time
+from typing import Dict, Optional, Tuple
+from urllib.request import BaseHandler, build_opener, install_opener
+
+try:
+    import requests
+    from requests.adapters import BaseAdapter
+    from requests.structures import CaseInsensitiveDict
+except ImportError:  # pragma: no cover
+    requests = None
+    BaseAdapter = object
+
+try:
+    import httpx
+except ImportError:  # pragma: no cover
+    httpx = None
+
+from satellitevu.http import AbstractClient, UrllibClient
+
+
+def fake_token(ttl: float = 86400.0) -> str:
+    """
+    Returns an unsigned JWT expiring after ttl seconds, accepted by Auth.token.
+    """
+
+    def encode(obj) -> str:
+        return urlsafe_b64encode(dumps(obj).encode()).decode().rstrip("=")
+
+    return ".".join(
+        (encode({"alg": "none"}), encode({"exp": int(time() + ttl)}), "signature")
+    )
+
+
+class FakeTransport:
+    """
+    Answers requests in process: URLs ending with "oauth/token" receive a token,
+    URLs registered in routes their status and body, all other URLs a 200 response
+    with the default body.
+    """
+
+    routes: Dict[str, Tuple[int, bytes]]
+    default: bytes
+
+    def __init__(
+        self,
+        routes: Optional[Dict[str, Tuple[int, bytes]]] = None,
+        default: bytes = b"{}",
+    ):
+        self.routes = dict(routes or {})
+        self.default = default
+        self.token = dumps({"access_token": fake_token()}).encode()
+        self.requests = 0
+
+    def respond(self, method: str, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        self.requests += 1
+        if url.endswith("oauth/token"):
+            status, body = 200, self.token
+        else:
+            status, body = self.routes.get(url, (200, self.default))
+        headers = {"Content-Type": "application/json", "Content-Length": str(len(body))}
+        return status, headers, body
+
+
+class _UrllibResponse(BytesIO):
+    def __init__(self, url: str, status: int, headers: Dict[str, str], body: bytes):
+        super().__init__(body)
+        self.url = url
+        self.status = self.code = status
+        self.msg = self.reason = "OK"
+        self.headers = Message()
+        for name, value in headers.items():
+            self.headers[name] = value
+
+    def getheaders(self):
+        return list(self.headers.items())
+
+    def info(self):
+        return self.headers
+
+    def geturl(self):
+        return self.url
+
+
+class _UrllibHandler(BaseHandler):
+    handler_order = 100
+
+    def __init__(self, transport: FakeTransport):
+        self.transport = transport
+
+    def _open(self, request):
+        url = request.full_url
+        return _UrllibResponse(url, *self.transport.respond(request.method, url))
+
+    http_open = https_open = _open
+
+
+class _RequestsAdapter(BaseAdapter):
+    def __init__(self, transport: FakeTransport):
+        super().__init__()
+        self.transport = transport
+
+    def send(self, request, **kwargs):
+        status, headers, body = self.transport.respond(request.method, request.url)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+def urllib_client(transport: FakeTransport) -> AbstractClient:
+    """
+    Returns a UrllibClient answered by the transport. The transport is installed as
+    the global urllib opener.
+    """
+    install_opener(build_opener(_UrllibHandler(transport)))
+    return UrllibClient()
+
+
+def requests_client(transport: FakeTransport) -> AbstractClient:
+    from satellitevu.http.requests import RequestsSession
+
+    session = requests.Session()
+    adapter = _RequestsAdapter(transport)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return RequestsSession(session)
+
+
+def httpx_client(transport: FakeTransport) -> AbstractClient:
+    from satellitevu.http.httpx import HttpxClient
+
+    def handler(request):
+        status, headers, body = transport.respond(request.method, str(request.url))
+        return httpx.Response(status, headers=headers, content=body)
+
+    return HttpxClient(httpx.Client(transport=httpx.MockTransport(handler)))
+
+
+BACKENDS = {"urllib": urllib_client}
+if requests is not None:
+    BACKENDS["requests"] = requests_client
+if httpx is not None:
+    BACKENDS["httpx"] = httpx_client
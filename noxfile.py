@@ -24,6 +24,8 @@ def tests(session):
         "josepy",
         "pyjwt",
         "pact-python",
+        "opentelemetry-api",
+        "prometheus-client",
         ".",
     )
     session.run("pytest", "--alluredir=allure-results")
@@ -1,4 +1,24 @@
-from .auth import Auth
-from .client import Client
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .auth import Auth
+    from .client import Client
 
 __all__ = ["Auth", "Client"]
+
+# Submodules are imported on first access (PEP 562), so that importing the package
+# only pays for what is used
+_LAZY = {"Auth": ".auth", "Client": ".client"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,7 +1,9 @@
 from abc import ABC
+from typing import Optional, Tuple
 from urllib.parse import urljoin
 from warnings import simplefilter, warn
 
+from satellitevu import telemetry
 from satellitevu.auth.exc import Api401Error, Api403Error
 from satellitevu.http import AbstractClient
 
@@ -12,20 +14,43 @@ class AbstractApi(ABC):
     api_path: str
     scopes = []
 
+    _url_base: Optional[Tuple[str, str, str]] = None
+
     def __init__(self, client: AbstractClient, base_url: str):
         self.client = client
         self.base_url = base_url
 
-    def url(self, path: str) -> str:
+    @property
+    def api_base_url(self) -> str:
+        """
+        The API's base URL with a trailing slash, computed once per base_url and
+        api_path.
+        """
+        cached = self._url_base
+        if cached and cached[0] == self.base_url and cached[1] == self.api_path:
+            return cached[2]
         api_base_url = urljoin(self.base_url, self.api_path.lstrip("/"))
         if api_base_url[-1] != "/":
             api_base_url += "/"
-        return urljoin(api_base_url, path.lstrip("/"))
+        self._url_base = (self.base_url, self.api_path, api_base_url)
+        return api_base_url
+
+    def url(self, path: str) -> str:
+        path = path.lstrip("/")
+        if ":" in path or "." in path:
+            # Absolute URLs and dot segments need to be resolved
+            return urljoin(self.api_base_url, path)
+        return self.api_base_url + path
 
     def make_request(self, *args, **kwargs):
         if "scopes" not in kwargs:
             kwargs["scopes"] = self.scopes
-        response = self.client.request(*args, **kwargs)
+        if telemetry.enabled:
+            response = telemetry.traced_request(
+                self, self.client.request, *args, **kwargs
+            )
+        else:
+            response = self.client.request(*args, **kwargs)
 
         if response.status == 401:
             raise Api401Error("Unauthorized to make this request.")
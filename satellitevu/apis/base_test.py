@@ -23,6 +23,7 @@ class TestApi(AbstractApi):
 @title("Scopes")
 @description("Test that the correct scopes are sent in the request")
 @mark.parametrize("kwargs", ({}, {"scopes": ["foo"]}))
+@mark.no_mocketize
 def test_scopes(kwargs, http_client_class, memory_cache):
     client: AbstractClient = http_client_class()
     auth = Auth(
@@ -46,3 +47,25 @@ def test_scopes(kwargs, http_client_class, memory_cache):
 
     assert len(requests) == 2
     assert parse_qs(requests[0].body)["scope"] == kwargs.get("scopes", api.scopes)
+
+
+@suite("Base")
+@title("URLs")
+@description("URLs are built like with urljoin")
+@mark.parametrize(
+    "base_url, path, expected",
+    (
+        ("http://api.example.com", "/a/b", "http://api.example.com/test/a/b"),
+        ("http://api.example.com/", "a/b/", "http://api.example.com/test/a/b/"),
+        ("http://api.example.com/v/", "a?b=1", "http://api.example.com/v/test/a?b=1"),
+        ("http://api.example.com", "a/../b", "http://api.example.com/test/b"),
+        ("http://api.example.com", "http://other.com/a", "http://other.com/a"),
+    ),
+)
+def test_url(base_url, path, expected):
+    api = TestApi(AbstractClient, base_url)
+
+    assert api.url(path) == expected
+
+    api.base_url = "http://other.com/"
+    assert api.url("a") == "http://other.com/test/a"
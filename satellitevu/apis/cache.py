@@ -0,0 +1,221 @@
+import json
+from collections import OrderedDict
+from dataclasses import dataclass
+from time import monotonic
+from typing import Any, Dict, Hashable, List, Optional, Tuple, Union
+from uuid import UUID
+
+from satellitevu.fork import Lock
+from satellitevu.geometry import geohash
+
+from .helpers import parse_interval
+
+
+class TTLCache:
+    """
+    Thread-safe in-memory cache evicting the least recently used entries beyond
+    maxsize and expiring entries ttl seconds after they were set.
+    """
+
+    maxsize: Optional[int]
+    ttl: Optional[float]
+
+    def __init__(self, maxsize: Optional[int] = 1024, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: Maximum number of entries, or None for no limit. Defaults to 1024.
+
+            ttl: Time to live of entries in seconds, or None for no expiry. Defaults
+            to None.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            try:
+                expires, value = self._items[key]
+            except KeyError:
+                return default
+            if expires < monotonic():
+                del self._items[key]
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """
+        Sets an entry, expiring after ttl seconds if given instead of the cache's ttl.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = monotonic() + ttl if ttl is not None else float("inf")
+        with self._lock:
+            self._items[key] = (expires, value)
+            self._items.move_to_end(key)
+            while self.maxsize is not None and len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._items.pop(key, None)
+        return item[1] if item else default
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def items(self) -> List[Tuple[Hashable, Optional[float], Any]]:
+        """
+        Returns the unexpired entries as (key, seconds until expiry or None, value),
+        least recently used first.
+        """
+        now = monotonic()
+        with self._lock:
+            return [
+                (key, None if expires == float("inf") else expires - now, value)
+                for key, (expires, value) in self._items.items()
+                if expires >= now
+            ]
+
+    def __contains__(self, key: Hashable) -> bool:
+        sentinel = object()
+        return self.get(key, sentinel) is not sentinel
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+PENDING_FEASIBILITY_STATUSES = ("pending", "processing")
+
+
+@dataclass
+class CachedFeasibility:
+    request: Dict
+    date_from: Optional[float]
+    date_to: Optional[float]
+    response: Optional[Dict] = None
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    if isinstance(value, dict):
+        return {k: _normalize(v) for k, v in value.items()}
+    return value
+
+
+def payload_key(payload: Any) -> str:
+    """
+    Returns a canonical string for a JSON payload, equal for payloads differing only
+    in key order or in integer versus float numbers.
+    """
+    return json.dumps(_normalize(payload), sort_keys=True)
+
+
+class FeasibilityCache:
+    """
+    Opt-in cache of completed feasibility requests for OtmV2, keyed by the contract,
+    the geohash of the requested point and the normalized request parameters.
+
+    A feasibility request is answered from the cache when a completed request with
+    the same key covers its whole datetime window. The cached response then lists
+    all passes of the cached, possibly wider, window.
+    """
+
+    precision: int
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = 1024,
+        ttl: Optional[float] = 3600.0,
+        precision: int = 9,
+    ):
+        """
+        Args:
+            maxsize: Maximum number of cached keys and feasibility requests.
+            Defaults to 1024.
+
+            ttl: Time to live of cached feasibility requests in seconds. Defaults to
+            one hour.
+
+            precision: Length of geohashes the requested points are quantized to.
+            Defaults to 9, cells of about 5 by 5 metres.
+        """
+        self.precision = precision
+        self._keys = TTLCache(maxsize, ttl)
+        self._requests = TTLCache(maxsize, ttl)
+        self._lock = Lock()
+
+    def key(self, contract_id: Union[UUID, str], payload: Dict) -> Tuple:
+        """
+        Returns the cache key of a feasibility request payload.
+        """
+        x, y = payload["geometry"]["coordinates"][:2]
+        properties = {k: v for k, v in payload["properties"].items() if k != "datetime"}
+        return (
+            str(contract_id),
+            geohash(x, y, self.precision),
+            payload_key(properties),
+        )
+
+    def add(self, contract_id: Union[UUID, str], payload: Dict, request: Dict):
+        """
+        Records a newly created feasibility request for the given payload.
+        """
+        entry = CachedFeasibility(
+            request, *parse_interval(payload["properties"].get("datetime"))
+        )
+        key = self.key(contract_id, payload)
+        with self._lock:
+            self._keys.set(key, [*self._keys.get(key, []), entry])
+            self._requests.set(str(request["id"]), entry)
+
+    def lookup(self, contract_id: Union[UUID, str], payload: Dict) -> Optional[Dict]:
+        """
+        Returns a completed feasibility request whose datetime window contains the
+        window of the given payload, or None.
+        """
+        date_from, date_to = parse_interval(payload["properties"].get("datetime"))
+        for entry in self._keys.get(self.key(contract_id, payload), []):
+            if (
+                entry.response is not None
+                and entry.date_from <= date_from
+                and entry.date_to >= date_to
+            ):
+                return entry.request
+        return None
+
+    def request(self, id: Union[UUID, str]) -> Optional[Dict]:
+        """
+        Returns the cached feasibility request with the given ID if it completed.
+        """
+        entry = self._requests.get(str(id))
+        return entry.request if entry and entry.response is not None else None
+
+    def response(self, id: Union[UUID, str]) -> Optional[Dict]:
+        """
+        Returns the cached response of a completed feasibility request.
+        """
+        entry = self._requests.get(str(id))
+        return entry.response if entry else None
+
+    def update_request(self, request: Dict):
+        """
+        Updates a cached feasibility request with its latest state.
+        """
+        entry = self._requests.get(str(request.get("id")))
+        if entry:
+            entry.request = request
+
+    def complete(self, id: Union[UUID, str], response: Dict):
+        """
+        Records the response of a feasibility request, making it available for
+        reuse once its status is no longer pending.
+        """
+        entry = self._requests.get(str(id))
+        if entry and response.get("status") not in PENDING_FEASIBILITY_STATUSES:
+            entry.response = response
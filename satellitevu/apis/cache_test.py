@@ -0,0 +1,150 @@
+from allure import description, title, suite
+from datetime import timedelta
+from json import dumps
+from unittest.mock import patch
+
+from mocket import Mocket
+from mocket.mockhttp import Entry
+from pytest import mark
+
+from .cache import FeasibilityCache, TTLCache
+
+
+@suite("Caches")
+class TestTTLCache:
+    @title("Least recently used eviction")
+    @description("Entries beyond maxsize are evicted least recently used first")
+    def test_lru(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert len(cache) == 2
+
+    @title("Expiry")
+    @description("Entries are not returned after their time to live")
+    def test_ttl(self):
+        cache = TTLCache(ttl=10)
+        with patch("satellitevu.apis.cache.monotonic", return_value=100.0):
+            cache.set("a", 1)
+        with patch("satellitevu.apis.cache.monotonic", return_value=105.0):
+            assert cache.get("a") == 1
+        with patch("satellitevu.apis.cache.monotonic", return_value=111.0):
+            assert cache.get("a") is None
+
+    @title("Entry time to live")
+    @description("Entries can expire earlier than the cache's time to live")
+    def test_entry_ttl(self):
+        cache = TTLCache(ttl=10)
+        with patch("satellitevu.apis.cache.monotonic", return_value=100.0):
+            cache.set("a", 1)
+            cache.set("b", 2, ttl=2)
+        with patch("satellitevu.apis.cache.monotonic", return_value=101.0):
+            assert cache.items() == [("a", 9.0, 1), ("b", 1.0, 2)]
+        with patch("satellitevu.apis.cache.monotonic", return_value=103.0):
+            assert cache.items() == [("a", 7.0, 1)]
+
+
+@suite("Caches")
+class TestFeasibilityCache:
+    @title("Reuse completed feasibility")
+    @description(
+        "Feasibility requests for nearby points within a completed request's window "
+        "are answered from the cache"
+    )
+    @mark.parametrize(
+        "offset, days, cached",
+        (
+            ((0.00001, 0.00001), (0, 1), True),
+            ((0.0, 0.0), (0.5, 1), True),
+            ((0.0, 0.0), (0, 2), False),
+            ((0.001, 0.0), (0, 1), False),
+        ),
+    )
+    def test_post_feasibility(
+        self,
+        client,
+        oauth_token_entry,
+        otm_request_parameters,
+        otm_response,
+        otm_feasibility_response_body,
+        offset,
+        days,
+        cached,
+    ):
+        contract_id = otm_request_parameters["contract_id"]
+        api_path = f"otm/v2/{contract_id}/tasking/feasibilities/"
+        feasibility_id = otm_response["id"]
+        otm_request_parameters["coordinates"] = [0.50002, 0.50002]
+        otm_feasibility_response_body["status"] = "feasible"
+        client.otm_v2.feasibility_cache = FeasibilityCache()
+
+        Entry.single_register(
+            "POST", client._gateway_url + api_path, body=dumps(otm_response), status=202
+        )
+        Entry.single_register(
+            "GET",
+            client._gateway_url + api_path + f"{feasibility_id}/response",
+            body=dumps(otm_feasibility_response_body),
+        )
+        client.otm_v2.post_feasibility(**otm_request_parameters)
+        client.otm_v2.get_feasibility_response(
+            contract_id=contract_id, id=feasibility_id
+        )
+        requests = len(Mocket.request_list())
+
+        date_from = otm_request_parameters["date_from"]
+        response = client.otm_v2.post_feasibility(
+            **{
+                **otm_request_parameters,
+                "coordinates": [0.50002 + offset[0], 0.50002 + offset[1]],
+                "date_from": date_from + timedelta(days=days[0]),
+                "date_to": date_from + timedelta(days=days[1]),
+            }
+        )
+
+        assert (len(Mocket.request_list()) == requests) is cached
+        if cached:
+            assert response["id"] == feasibility_id
+            assert (
+                client.otm_v2.get_feasibility_response(
+                    contract_id=contract_id, id=feasibility_id
+                )
+                == otm_feasibility_response_body
+            )
+            assert len(Mocket.request_list()) == requests
+
+    @title("Pending feasibility")
+    @description("Responses of pending feasibility requests are not reused")
+    def test_pending(
+        self,
+        client,
+        oauth_token_entry,
+        otm_request_parameters,
+        otm_response,
+        otm_feasibility_response_body,
+    ):
+        contract_id = otm_request_parameters["contract_id"]
+        api_path = f"otm/v2/{contract_id}/tasking/feasibilities/"
+        client.otm_v2.feasibility_cache = FeasibilityCache()
+
+        Entry.single_register(
+            "POST", client._gateway_url + api_path, body=dumps(otm_response), status=202
+        )
+        Entry.single_register(
+            "GET",
+            client._gateway_url + api_path + f"{otm_response['id']}/response",
+            body=dumps(otm_feasibility_response_body),
+        )
+        client.otm_v2.post_feasibility(**otm_request_parameters)
+        client.otm_v2.get_feasibility_response(
+            contract_id=contract_id, id=otm_response["id"]
+        )
+        client.otm_v2.post_feasibility(**otm_request_parameters)
+
+        posts = [r for r in Mocket.request_list() if r.method == "POST"]
+        assert len(posts) == 3
@@ -1,11 +1,176 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Any, List, Optional, Union
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Union,
+)
 from uuid import UUID
 
+from satellitevu.geometry import (
+    BBox,
+    Geometry,
+    GridIndex,
+    PreparedGeometry,
+    Simplifier,
+    bbox,
+    bbox_polygon,
+    geohash,
+    intersects,
+)
+from satellitevu.http import AbstractClient
+
 from .base import AbstractApi
+from .cache import TTLCache
+from .exceptions import CatalogAPIError
+from .helpers import FilteredResponse, parse_datetime
+from .pagination import merge, paginate
+from .search_cache import AbstractSearchCache, CachedResponse, search_key
+
+if TYPE_CHECKING:
+    from .contracts import ContractsV1
 
 filterConstruct = filter
 
+MAX_IDS_PER_SEARCH = 100
+
+
+def _field(feature: Dict[str, Any], field: str) -> Any:
+    for source in (feature.get("properties") or {}, feature):
+        value = source
+        for part in field.split("."):
+            value = value.get(part) if isinstance(value, dict) else None
+        if value is not None:
+            return value
+    return None
+
+
+class SortKey:
+    """
+    Sort key of a feature according to a STAC sort_by specification, ordering
+    missing values last.
+    """
+
+    __slots__ = ("values", "descending")
+
+    def __init__(self, feature: Dict[str, Any], sort_by: List[dict]):
+        self.values = [_field(feature, s["field"]) for s in sort_by]
+        self.descending = [s.get("direction") == "desc" for s in sort_by]
+
+    def __lt__(self, other: "SortKey") -> bool:
+        for a, b, descending in zip(self.values, other.values, self.descending):
+            if a == b:
+                continue
+            if a is None or b is None:
+                return b is None
+            return a > b if descending else a < b
+        return False
+
+
+@dataclass
+class SearchQuery:
+    """
+    A catalog search for a single area of interest, given either as GeoJSON geometry
+    or as bounding box, and an optional time window.
+    """
+
+    intersects: Optional[Geometry] = None
+    bbox: Optional[BBox] = None
+    date_from: Optional[datetime] = None
+    date_to: Optional[datetime] = None
+
+    @property
+    def geometry(self) -> Geometry:
+        if self.intersects is not None:
+            return self.intersects
+        return bbox_polygon(self.bbox)
+
+    def matches(self, feature: Dict[str, Any]) -> bool:
+        """
+        Whether a feature lies within the time window and area of the query.
+        """
+        properties = feature.get("properties") or {}
+        start = parse_datetime(
+            properties.get("start_datetime") or properties.get("datetime")
+        )
+        end = parse_datetime(
+            properties.get("end_datetime") or properties.get("datetime")
+        )
+        if self.date_from and end is not None and end < self.date_from.timestamp():
+            return False
+        if self.date_to and start is not None and start > self.date_to.timestamp():
+            return False
+        return feature.get("geometry") is not None and intersects(
+            feature["geometry"], self.geometry
+        )
+
+
+def _union(boxes: Iterable[BBox]) -> BBox:
+    minxs, minys, maxxs, maxys = zip(*boxes)
+    return min(minxs), min(minys), max(maxxs), max(maxys)
+
+
+def _window(queries: Sequence[SearchQuery]) -> Optional[str]:
+    """
+    Returns the datetime interval covering the time windows of all queries, with
+    ".." for open ends, or None if it is open on both ends. Naive datetimes are
+    local times, as in search.
+    """
+    starts = [q.date_from for q in queries]
+    ends = [q.date_to for q in queries]
+    start = (
+        ".."
+        if None in starts
+        else min(d.astimezone(timezone.utc) for d in starts).isoformat()
+    )
+    end = (
+        ".."
+        if None in ends
+        else max(d.astimezone(timezone.utc) for d in ends).isoformat()
+    )
+    return None if start == end == ".." else f"{start}/{end}"
+
+
+def cluster_queries(
+    queries: Sequence[SearchQuery], *, max_extent: float = 1.0, max_queries: int = 50
+) -> List[List[int]]:
+    """
+    Groups nearby queries, returning lists of query indices. Queries are ordered along
+    a Z-order curve and consecutive queries are grouped while the union of their
+    bounding boxes spans at most max_extent degrees in both directions.
+    """
+    boxes = [bbox(query.geometry) for query in queries]
+    order = sorted(
+        range(len(queries)),
+        key=lambda i: geohash(
+            (boxes[i][0] + boxes[i][2]) / 2, (boxes[i][1] + boxes[i][3]) / 2, 12
+        ),
+    )
+
+    clusters: List[List[int]] = []
+    for i in order:
+        if clusters and len(clusters[-1]) < max_queries:
+            minx, miny, maxx, maxy = _union([boxes[j] for j in [*clusters[-1], i]])
+            if maxx - minx <= max_extent and maxy - miny <= max_extent:
+                clusters[-1].append(i)
+                continue
+        clusters.append([i])
+    return clusters
+
+
+@dataclass
+class ItemsResult:
+    items: List[Dict[str, Any]] = field(default_factory=list)
+    missing: List[str] = field(default_factory=list)
+
 
 class CatalogV1(AbstractApi):
     """
@@ -15,6 +180,26 @@ class CatalogV1(AbstractApi):
 
     api_path = "catalog/v1"
     scopes = []
+    contracts: Optional["ContractsV1"]
+    item_cache: Optional[TTLCache]
+    search_cache: Optional[AbstractSearchCache]
+    simplifier: Optional[Simplifier]
+
+    def __init__(
+        self,
+        client: AbstractClient,
+        base_url: str,
+        *,
+        contracts: Optional["ContractsV1"] = None,
+        item_cache: Optional[TTLCache] = None,
+        search_cache: Optional[AbstractSearchCache] = None,
+        simplifier: Optional[Simplifier] = None,
+    ):
+        super().__init__(client, base_url)
+        self.contracts = contracts
+        self.item_cache = item_cache
+        self.search_cache = search_cache
+        self.simplifier = simplifier
 
     def search(
         self,
@@ -79,6 +264,11 @@ class CatalogV1(AbstractApi):
 
         """
         url = self.url(f"/{contract_id}/search")
+
+        original = intersects
+        if intersects and self.simplifier is not None:
+            intersects = self.simplifier.simplify(intersects)
+
         payload = {
             "intersects": intersects,
             "limit": limit,
@@ -100,6 +290,300 @@ class CatalogV1(AbstractApi):
             **kwargs,
         }
 
-        return self.make_request(
-            method="POST", url=url, json={k: v for k, v in payload.items() if v}
+        payload = {k: v for k, v in payload.items() if v}
+
+        response = None
+        key = None
+        if self.search_cache is not None:
+            key = search_key(contract_id, payload)
+            cached = self.search_cache.get(key)
+            if cached is not None:
+                response = CachedResponse(cached)
+
+        if response is None:
+            response = self.make_request(method="POST", url=url, json=payload)
+            if key is not None and response.status == 200:
+                self.search_cache.set(key, response.text.encode())
+
+        if intersects is not original:
+            prepared = PreparedGeometry(original)
+            return FilteredResponse(
+                response, lambda feature: Simplifier.matches(feature, prepared)
+            )
+        return response
+
+    def iter_search(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        limit: int = 10,
+        prefetch: bool = True,
+        **kwargs,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterates over all features matching a search, following page tokens.
+        Raises CatalogAPIError for unsuccessful responses.
+
+        Args:
+            contract_id: String or UUID representing the ID of the Contract
+            which a search is performed with.
+
+            limit: Number of search results to be returned per page. Defaults to 10.
+
+            prefetch: Whether the next page is fetched while the current page is
+            consumed. Defaults to True.
+
+        Kwargs:
+            Search parameters as accepted by search.
+
+        Returns:
+            An iterator of dictionaries, the features matching the search criteria.
+        """
+
+        def fetch(size: int, token: Optional[str]) -> Dict[str, Any]:
+            response = self.search(
+                contract_id=contract_id, limit=size, page_token=token, **kwargs
+            )
+            if response.status != 200:
+                raise CatalogAPIError(response.status, response.text)
+            return response.json()
+
+        return paginate(
+            fetch, "features", per_page=limit, adaptive=False, prefetch=prefetch
+        )
+
+    def fanout_search(
+        self,
+        *,
+        contract_ids: Optional[Iterable[Union[UUID, str]]] = None,
+        limit: int = 10,
+        sort_by: Optional[List[dict]] = None,
+        **kwargs,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Performs the same search with several contracts concurrently, following the
+        pages of each, and yields the found features as they arrive. Each feature is
+        tagged with the contract it was found with as "contract_id", features found
+        with several contracts are only yielded for the first.
+
+        Args:
+            contract_ids: Optional IDs of the Contracts to search with. Defaults to all
+            contracts returned by ContractsV1.get_contracts.
+
+            limit: Number of search results to be returned per page and contract.
+            Defaults to 10.
+
+            sort_by: Optional list of parameters specifying the field and direction
+            the results are sorted by e.g. [{"field": "datetime", "direction": "desc"}].
+            Features of all contracts are then merged in this order.
+
+        Kwargs:
+            Search parameters as accepted by search.
+
+        Returns:
+            An iterator of dictionaries, the features matching the search criteria.
+        """
+        if contract_ids is None:
+            contract_ids = [c["contract_id"] for c in self.contracts.get_contracts()]
+
+        def features(contract_id: str) -> Iterator[Dict[str, Any]]:
+            for feature in self.iter_search(
+                contract_id=contract_id,
+                limit=limit,
+                sort_by=sort_by,
+                prefetch=False,
+                **kwargs,
+            ):
+                yield {**feature, "contract_id": contract_id}
+
+        seen = set()
+        for feature in merge(
+            [features(str(contract_id)) for contract_id in contract_ids],
+            key=(lambda feature: SortKey(feature, sort_by)) if sort_by else None,
+        ):
+            if feature.get("id") not in seen:
+                seen.add(feature.get("id"))
+                yield feature
+
+    def batch_search(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        queries: Sequence[SearchQuery],
+        max_extent: float = 1.0,
+        max_queries: int = 50,
+        combine: Literal["bbox", "multipolygon"] = "bbox",
+        limit: int = 100,
+        max_workers: int = 8,
+        **kwargs,
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Performs many searches for small areas of interest with fewer requests.
+        Nearby queries are combined into a single search covering all of them,
+        following all pages, and the found features are assigned back to the queries
+        whose area and time window they match.
+
+        Args:
+            contract_id: String or UUID representing the ID of the Contract
+            which the searches are performed with.
+
+            queries: Sequence of SearchQuery, each an area of interest and time window.
+
+            max_extent: Maximum width and height in degrees of the area of combined
+            searches. Defaults to 1.0.
+
+            max_queries: Maximum number of queries combined into one search. Defaults
+            to 50.
+
+            combine: Whether combined searches use the bounding box of all areas or a
+            MultiPolygon of them. The latter requires all areas to be polygons.
+            Defaults to "bbox".
+
+            limit: Number of search results to be returned per page. Defaults to 100.
+
+            max_workers: Maximum number of concurrent searches. Defaults to 8.
+
+        Kwargs:
+            Search parameters common to all queries as accepted by search, e.g.
+            collections or filter.
+
+        Returns:
+            A list with the list of all matching features for each query, in the
+            order of the queries.
+        """
+        results: List[List[Dict[str, Any]]] = [[] for _ in queries]
+        clusters = cluster_queries(
+            queries, max_extent=max_extent, max_queries=max_queries
+        )
+
+        def search(cluster: List[int]):
+            members = [queries[i] for i in cluster]
+            index = GridIndex(max_extent / 4 or 1.0)
+            for i in cluster:
+                index.insert(i, bbox(queries[i].geometry))
+
+            window = _window(members)
+            area = {"bbox": list(_union(bbox(q.geometry) for q in members))}
+            if combine == "multipolygon":
+                area = {
+                    "intersects": {
+                        "type": "MultiPolygon",
+                        "coordinates": [
+                            polygon
+                            for q in members
+                            for polygon in (
+                                [q.geometry["coordinates"]]
+                                if q.geometry["type"] == "Polygon"
+                                else q.geometry["coordinates"]
+                            )
+                        ],
+                    }
+                }
+
+            for feature in self.iter_search(
+                contract_id=contract_id,
+                limit=limit,
+                **({"datetime": window} if window else {}),
+                **area,
+                **kwargs,
+            ):
+                if not feature.get("geometry"):
+                    continue
+                for i in index.query(bbox(feature["geometry"])):
+                    if queries[i].matches(feature):
+                        results[i].append(feature)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for future in [executor.submit(search, cluster) for cluster in clusters]:
+                future.result()
+
+        return results
+
+    def iter_items(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        ids: Iterable[str],
+        chunk_size: int = MAX_IDS_PER_SEARCH,
+        max_workers: int = 4,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Fetches catalog items by their STAC ids, searching for chunks of ids
+        concurrently, and yields the items found as their chunks complete. Items in
+        the item_cache are yielded first without a request.
+
+        Args:
+            contract_id: String or UUID representing the ID of the Contract
+            which the items are fetched with.
+
+            ids: Iterable of STAC ids, e.g. ["20221010T222611000_basic_0_TABI"].
+
+            chunk_size: Maximum number of ids per search. Defaults to 100.
+
+            max_workers: Maximum number of concurrent searches. Defaults to 4.
+
+        Returns:
+            An iterator of dictionaries, the items found in no particular order.
+        """
+        contract_id = str(contract_id)
+        pending = []
+        for id in dict.fromkeys(ids):
+            item = None
+            if self.item_cache is not None:
+                item = self.item_cache.get((contract_id, id))
+            if item is not None:
+                yield item
+            else:
+                pending.append(id)
+
+        def fetch(chunk: List[str]) -> List[Dict[str, Any]]:
+            return list(
+                self.iter_search(
+                    contract_id=contract_id, ids=chunk, limit=len(chunk), prefetch=False
+                )
+            )
+
+        chunks = [
+            pending[i : i + chunk_size] for i in range(0, len(pending), chunk_size)
+        ]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(fetch, chunk) for chunk in chunks]
+            try:
+                for future in as_completed(futures):
+                    for item in future.result():
+                        if self.item_cache is not None:
+                            self.item_cache.set((contract_id, item["id"]), item)
+                        yield item
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def get_items(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        ids: Iterable[str],
+        chunk_size: int = MAX_IDS_PER_SEARCH,
+        max_workers: int = 4,
+    ) -> ItemsResult:
+        """
+        Fetches catalog items by their STAC ids, see iter_items.
+
+        Returns:
+            An ItemsResult with the items found in the order of the given ids and the
+            ids which were not found.
+        """
+        ids = list(ids)
+        found = {
+            item["id"]: item
+            for item in self.iter_items(
+                contract_id=contract_id,
+                ids=ids,
+                chunk_size=chunk_size,
+                max_workers=max_workers,
+            )
+        }
+        return ItemsResult(
+            items=[found[id] for id in dict.fromkeys(ids) if id in found],
+            missing=[id for id in dict.fromkeys(ids) if id not in found],
         )
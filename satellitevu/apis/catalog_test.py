@@ -1,21 +1,25 @@
 from allure import description, title, suite
-from datetime import datetime, timezone
-from json import dumps
+from datetime import datetime, timedelta, timezone
+from json import dumps, loads
 from urllib.parse import urlparse
 from uuid import uuid4
 
 import pytest
 from mocket import Mocket, mocketize
-from mocket.mockhttp import Entry
+from mocket.mockhttp import Entry, Response
 from pytest import mark
 
+from satellitevu.apis.cache import TTLCache
+from satellitevu.apis.catalog import SearchQuery
 from satellitevu.auth.exc import Api401Error, Api403Error
+from satellitevu.geometry import Simplifier, contains_point
 
 API_PATH = "catalog/v1/contract-id/"
 
 
 @suite("Catalog")
 class TestCatalog:
+    @mark.no_mocketize
     @mocketize(strict_mode=True)
     @mark.parametrize(
         ["kwargs", "payload"],
@@ -44,7 +48,6 @@ class TestCatalog:
             ),
         ),
     )
-    @mocketize(strict_mode=True)
     @title("Search")
     @description("Search for catalog items")
     def test_search(
@@ -71,7 +74,7 @@ class TestCatalog:
         assert api_request.path == f"/{api_path}search"
         assert api_request.headers["content-type"] == "application/json"
         assert api_request.headers["authorization"] == oauth_token_entry
-        assert api_request.body == dumps(payload)
+        assert loads(api_request.body) == payload
         assert response.text == "mock-stac-response"
 
     @mark.parametrize(
@@ -123,6 +126,276 @@ class TestCatalog:
         assert api_request.path == f"/{api_path}search"
         assert api_request.headers["content-type"] == "application/json"
         assert api_request.headers["authorization"] == oauth_token_entry
-        assert api_request.body == dumps(payload)
+        assert loads(api_request.body) == payload
 
         Mocket.assert_fail_if_entries_not_served()
+
+    @title("Fan-out search")
+    @description("Search with several contracts, merging features in sort order")
+    def test_fanout_search(self, client, oauth_token_entry):
+        first, second = str(uuid4()), str(uuid4())
+
+        def feature(id, day):
+            return {"id": id, "properties": {"datetime": f"2024-01-{day:02}"}}
+
+        Entry.register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{first}/search",
+            Response(
+                body=dumps(
+                    {
+                        "features": [feature("a", 10), feature("b", 8)],
+                        "links": [{"rel": "next", "body": {"token": "next"}}],
+                    }
+                )
+            ),
+            Response(body=dumps({"features": [feature("c", 5)], "links": []})),
+        )
+        Entry.single_register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{second}/search",
+            body=dumps({"features": [feature("d", 9), feature("c", 5)]}),
+        )
+
+        features = list(
+            client.catalog_v1.fanout_search(
+                contract_ids=[first, second],
+                limit=2,
+                sort_by=[{"field": "datetime", "direction": "desc"}],
+            )
+        )
+
+        assert [f["id"] for f in features] == ["a", "d", "b", "c"]
+        assert [f["contract_id"] for f in features][:2] == [first, second]
+        pages = [loads(r.body) for r in Mocket.request_list() if first in r.path]
+        assert [p.get("token") for p in pages] == [None, "next"]
+
+    @title("Fan-out search with all contracts")
+    @description("All contracts are searched if no contracts are given")
+    def test_fanout_search_all_contracts(self, client, oauth_token_entry):
+        contract_ids = [str(uuid4()), str(uuid4())]
+
+        Entry.single_register(
+            "POST",
+            client._gateway_url + "policy/v1/contracts",
+            body=dumps({"result": [{"contract_id": id} for id in contract_ids]}),
+        )
+        for contract_id in contract_ids:
+            Entry.single_register(
+                "POST",
+                client._gateway_url + f"catalog/v1/{contract_id}/search",
+                body=dumps({"features": [{"id": contract_id}]}),
+            )
+
+        features = client.catalog_v1.fanout_search()
+
+        assert sorted(f["contract_id"] for f in features) == sorted(contract_ids)
+
+    @title("Batch search")
+    @description("Nearby queries are searched together and their features demuxed")
+    def test_batch_search(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        day = datetime(2024, 1, 1, tzinfo=timezone.utc)
+        queries = [
+            SearchQuery(
+                bbox=(0, 0, 0.1, 0.1), date_from=day, date_to=day + timedelta(hours=23)
+            ),
+            SearchQuery(bbox=(0.2, 0.2, 0.3, 0.3)),
+            SearchQuery(bbox=(50, 50, 50.1, 50.1)),
+        ]
+
+        def feature(id, x, y, date="2024-01-01T12:00:00Z"):
+            return {
+                "id": id,
+                "geometry": {"type": "Point", "coordinates": [x, y]},
+                "properties": {"datetime": date},
+            }
+
+        Entry.register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{contract_id}/search",
+            Response(
+                body=dumps(
+                    {
+                        "features": [
+                            feature("a", 0.05, 0.05),
+                            feature("b", 0.25, 0.25),
+                            feature("c", 0.05, 0.05, "2024-01-02T12:00:00Z"),
+                            feature("d", 0.15, 0.15),
+                        ]
+                    }
+                )
+            ),
+            Response(body=dumps({"features": [feature("e", 50.05, 50.05)]})),
+        )
+
+        results = client.catalog_v1.batch_search(
+            contract_id=contract_id, queries=queries, max_workers=1
+        )
+
+        assert [[f["id"] for f in features] for features in results] == [
+            ["a"],
+            ["b"],
+            ["e"],
+        ]
+        searches = [loads(r.body) for r in Mocket.request_list()[1:]]
+        assert searches[0]["bbox"] == [0, 0, 0.3, 0.3]
+        assert "datetime" not in searches[0]
+        assert searches[1]["bbox"] == [50, 50, 50.1, 50.1]
+
+    @title("Batch search windows")
+    @description("Combined time windows mix naive and aware datetimes and open ends")
+    def test_batch_search_windows(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        queries = [
+            SearchQuery(
+                bbox=(0, 0, 0.1, 0.1),
+                date_from=datetime(2024, 1, 2, tzinfo=timezone(timedelta(hours=2))),
+            ),
+            SearchQuery(
+                bbox=(0.1, 0.1, 0.2, 0.2),
+                date_from=datetime(2024, 1, 5),
+                date_to=datetime(2024, 1, 6),
+            ),
+            SearchQuery(bbox=(50, 50, 50.1, 50.1), date_to=datetime(2024, 2, 1)),
+            SearchQuery(
+                bbox=(50.1, 50.1, 50.2, 50.2),
+                date_to=datetime(2024, 3, 1, tzinfo=timezone(timedelta(hours=1))),
+            ),
+        ]
+        Entry.single_register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{contract_id}/search",
+            body=dumps({"features": []}),
+        )
+
+        client.catalog_v1.batch_search(
+            contract_id=contract_id, queries=queries, max_workers=1
+        )
+
+        searches = [loads(r.body) for r in Mocket.request_list()[1:]]
+        assert [s["datetime"] for s in searches] == [
+            "2024-01-01T22:00:00+00:00/..",
+            "../2024-02-29T23:00:00+00:00",
+        ]
+
+    @title("Get items")
+    @description(
+        "Items are fetched in chunks, reporting missing ids and using the cache"
+    )
+    def test_get_items(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        client.catalog_v1.item_cache = TTLCache(maxsize=10)
+        client.catalog_v1.item_cache.set((contract_id, "cached"), {"id": "cached"})
+
+        Entry.register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{contract_id}/search",
+            Response(body=dumps({"features": [{"id": "b"}, {"id": "a"}]})),
+            Response(body=dumps({"features": []})),
+        )
+
+        result = client.catalog_v1.get_items(
+            contract_id=contract_id,
+            ids=["a", "cached", "b", "a", "c"],
+            chunk_size=2,
+            max_workers=1,
+        )
+
+        assert [item["id"] for item in result.items] == ["a", "cached", "b"]
+        assert result.missing == ["c"]
+        searches = [loads(r.body) for r in Mocket.request_list()[1:]]
+        assert [s["ids"] for s in searches] == [["a", "b"], ["c"]]
+        assert [s["limit"] for s in searches] == [2, 1]
+        assert (contract_id, "b") in client.catalog_v1.item_cache
+
+    @title("Search with simplified geometry")
+    @description("Features not matching the original geometry are filtered locally")
+    def test_search_simplified(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        client.catalog_v1.simplifier = Simplifier(precision=3)
+        triangle = {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [2, 0], [0, 2], [0, 0]]],
+        }
+
+        Entry.single_register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{contract_id}/search",
+            body=dumps(
+                {
+                    "features": [
+                        {
+                            "id": "in",
+                            "geometry": {"type": "Point", "coordinates": [1, 0.5]},
+                        },
+                        {
+                            "id": "out",
+                            "geometry": {"type": "Point", "coordinates": [1.5, 1.5]},
+                        },
+                    ]
+                }
+            ),
+        )
+
+        response = client.catalog_v1.search(
+            contract_id=contract_id, intersects=triangle
+        )
+
+        assert [f["id"] for f in response.json()["features"]] == ["in"]
+        sent = loads(Mocket.last_request().body)["intersects"]
+        assert contains_point(sent, 1.5, 1.5) is False
+        assert all(contains_point(sent, x, y) for x, y in [(0, 0), (2, 0), (0, 2)])
+
+    @title("Iterate search with simplified geometry")
+    @description("Pages whose features are all filtered locally are followed")
+    def test_iter_search_simplified(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        client.catalog_v1.simplifier = Simplifier(precision=3)
+        triangle = {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [2, 0], [0, 2], [0, 0]]],
+        }
+        url = client._gateway_url + f"catalog/v1/{contract_id}/search"
+
+        Entry.register(
+            "POST",
+            url,
+            Response(
+                body=dumps(
+                    {
+                        "features": [
+                            {
+                                "id": "out",
+                                "geometry": {
+                                    "type": "Point",
+                                    "coordinates": [1.5, 1.5],
+                                },
+                            }
+                        ],
+                        "links": [{"rel": "next", "body": {"token": "page-2"}}],
+                    }
+                )
+            ),
+            Response(
+                body=dumps(
+                    {
+                        "features": [
+                            {
+                                "id": "a",
+                                "geometry": {"type": "Point", "coordinates": [1, 0.5]},
+                            }
+                        ],
+                        "links": [],
+                    }
+                )
+            ),
+        )
+
+        features = list(
+            client.catalog_v1.iter_search(
+                contract_id=contract_id, intersects=triangle, prefetch=False
+            )
+        )
+
+        assert [f["id"] for f in features] == ["a"]
@@ -1,11 +1,101 @@
-from typing import Union
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, List, Optional, Union
 from uuid import UUID
 
 from satellitevu.auth import Auth
 from satellitevu.http import AbstractClient
 
 from .base import AbstractApi
-from .exceptions import ContractAccessError
+from .cache import TTLCache
+from .exceptions import ContractAccessError, ContractValidationError
+
+
+@dataclass(frozen=True)
+class PricebookIndex:
+    """
+    In-memory index of a contract's pricebook, mapping product codes and catalog
+    collections to their price entries and listing the collections the contract
+    allows.
+
+    Pricebooks as returned by ContractsV1.get_contract_pricebook are lists of
+    products like
+
+        {"code": "visual-archive", "collections": ["visual"],
+         "price": {"value": 25000, "currency": "GBP"}}
+
+    where "collections" lists the catalog collections priced by archive products and
+    is omitted for tasking products such as "standard" and "assured". Contracts as
+    returned by ContractsV1.get_contracts list their "allowed_collections".
+    """
+
+    contract_id: str
+    products: Dict[str, Dict]
+    collection_products: Dict[str, Dict]
+    collections: FrozenSet[str]
+
+    @classmethod
+    def build(
+        cls,
+        contract_id: Union[UUID, str],
+        pricebook: List[Dict],
+        contract: Optional[Dict] = None,
+    ) -> "PricebookIndex":
+        """
+        Builds the index from the result of ContractsV1.get_contract_pricebook and
+        the contract as returned by ContractsV1.get_contracts.
+        """
+        products, collection_products = {}, {}
+        for entry in pricebook:
+            products[entry["code"]] = entry
+            for collection in entry.get("collections") or ():
+                collection_products[collection] = entry
+        collections = frozenset((contract or {}).get("allowed_collections") or ())
+
+        return cls(str(contract_id), products, collection_products, collections)
+
+    def price(self, code: str) -> Optional[Dict]:
+        """
+        Returns the pricebook entry of a product code, or None.
+        """
+        return self.products.get(code)
+
+    def product_price(self, code: str) -> Optional[float]:
+        """
+        Returns the price value of a product code, or None.
+        """
+        entry = self.products.get(code)
+        return entry["price"]["value"] if entry else None
+
+    def collection_price(self, collection: str) -> Optional[float]:
+        """
+        Returns the price value of an archive item of a catalog collection, or None.
+        """
+        entry = self.collection_products.get(collection)
+        return entry["price"]["value"] if entry else None
+
+    def validate(
+        self, *, products: Iterable[str] = (), collections: Iterable[str] = ()
+    ):
+        """
+        Raises ContractValidationError if any of the product codes is not in the
+        pricebook or any of the collections is not allowed by the contract. Collections
+        are not checked if the contract does not list any.
+        """
+        errors = [
+            f"product {code!r} is not in the pricebook"
+            for code in products
+            if code not in self.products
+        ]
+        if self.collections:
+            errors.extend(
+                f"collection {collection!r} is not allowed"
+                for collection in collections
+                if collection not in self.collections
+            )
+        if errors:
+            raise ContractValidationError(
+                f"Invalid order for contract {self.contract_id}: {', '.join(errors)}"
+            )
 
 
 class ContractsV1(AbstractApi):
@@ -16,11 +106,44 @@ class ContractsV1(AbstractApi):
 
     api_path = "policy/v1"
 
-    def __init__(self, client: AbstractClient, base_url: str, auth: Auth):
+    def __init__(
+        self,
+        client: AbstractClient,
+        base_url: str,
+        auth: Auth,
+        *,
+        cache_ttl: Optional[float] = None,
+    ):
         super().__init__(client, base_url)
         self._auth = auth
+        self._cache = TTLCache(maxsize=None, ttl=cache_ttl) if cache_ttl else None
+
+    def _cached(self, key, fetch):
+        if self._cache is None:
+            return fetch()
+        value = self._cache.get(key)
+        if value is None:
+            value = fetch()
+            self._cache.set(key, value)
+        return value
+
+    def invalidate(self, contract_id: Optional[Union[UUID, str]] = None):
+        """
+        Drops cached contracts and pricebooks, or only the pricebook of the given
+        contract.
+        """
+        if self._cache is None:
+            return
+        if contract_id is None:
+            self._cache.clear()
+        else:
+            self._cache.pop(("pricebook", str(contract_id)))
+            self._cache.pop(("index", str(contract_id)))
 
     def get_contracts(self):
+        return self._cached("contracts", self._get_contracts)
+
+    def _get_contracts(self):
         url = self.url("/contracts")
         response = self.make_request(
             method="POST",
@@ -33,7 +156,23 @@ class ContractsV1(AbstractApi):
 
         return response.json()["result"]
 
+    def get_contract(self, contract_id: Union[UUID, str]) -> Optional[Dict]:
+        """
+        Returns the contract with the given ID from get_contracts, or None.
+        """
+        contracts = self._cached(
+            "contracts_by_id",
+            lambda: {str(c["contract_id"]): c for c in self.get_contracts()},
+        )
+        return contracts.get(str(contract_id))
+
     def get_contract_pricebook(self, contract_id: Union[UUID, str]):
+        return self._cached(
+            ("pricebook", str(contract_id)),
+            lambda: self._get_contract_pricebook(contract_id),
+        )
+
+    def _get_contract_pricebook(self, contract_id: Union[UUID, str]):
         url = self.url("/policy/query/products")
         response = self.make_request(
             method="POST",
@@ -45,3 +184,42 @@ class ContractsV1(AbstractApi):
             raise ContractAccessError(response.status, response.text)
 
         return response.json()["result"]
+
+    def get_pricebook_index(self, contract_id: Union[UUID, str]) -> PricebookIndex:
+        """
+        Returns an index of the contract's pricebook for constant time lookups of
+        product prices and allowed collections.
+        """
+        return self._cached(
+            ("index", str(contract_id)),
+            lambda: PricebookIndex.build(
+                contract_id,
+                self.get_contract_pricebook(contract_id),
+                self.get_contract(contract_id),
+            ),
+        )
+
+    def validate_order(
+        self,
+        contract_id: Union[UUID, str],
+        *,
+        products: Iterable[str] = (),
+        collections: Iterable[str] = (),
+    ):
+        """
+        Validates an order against the contract's pricebook before submitting it,
+        raising ContractValidationError for unknown contracts and for products or
+        collections not available under the contract.
+
+        Args:
+            contract_id: Associated ID of the Contract the order will be placed under.
+
+            products: Product codes to be ordered.
+
+            collections: Collections of catalog items to be ordered.
+        """
+        if self.get_contract(contract_id) is None:
+            raise ContractValidationError(f"Unknown contract {contract_id}")
+        self.get_pricebook_index(contract_id).validate(
+            products=products, collections=collections
+        )
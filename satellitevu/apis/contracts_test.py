@@ -0,0 +1,130 @@
+from allure import description, title, suite
+from json import dumps
+from uuid import uuid4
+
+from mocket import Mocket
+from mocket.mockhttp import Entry
+from pytest import fixture, raises
+
+from satellitevu.apis.cache import TTLCache
+from satellitevu.client import Client
+
+from .contracts import ContractsV1
+from .exceptions import ContractValidationError
+
+
+@fixture
+def contract_id():
+    return str(uuid4())
+
+
+@fixture
+def contracts_entries(client, oauth_token_entry, contract_id):
+    Entry.single_register(
+        "POST",
+        client._gateway_url + "policy/v1/contracts",
+        body=dumps(
+            {
+                "result": [
+                    {
+                        "active": True,
+                        "contract_id": contract_id,
+                        "name": "Test contract",
+                        "allowed_collections": ["visual"],
+                    }
+                ]
+            }
+        ),
+    )
+    Entry.single_register(
+        "POST",
+        client._gateway_url + "policy/v1/policy/query/products",
+        body=dumps(
+            {
+                "result": [
+                    {
+                        "code": "visual-archive",
+                        "collections": ["visual"],
+                        "price": {"value": 25, "currency": "GBP"},
+                    },
+                    {"code": "standard", "price": {"value": 100, "currency": "GBP"}},
+                    {"code": "assured", "price": {"value": 500, "currency": "GBP"}},
+                ]
+            }
+        ),
+    )
+
+
+@suite("Contracts")
+class TestContracts:
+    @title("Cached contracts")
+    @description("Contracts and pricebooks are requested once within the TTL")
+    def test_cache(self, client, contracts_entries, contract_id):
+        contracts = ContractsV1(
+            client._client, client._gateway_url, client.auth, cache_ttl=60
+        )
+
+        for _ in range(2):
+            contracts.get_contracts()
+            contracts.get_contract_pricebook(contract_id)
+        requests = len(Mocket.request_list())
+        contracts.invalidate(contract_id)
+        contracts.get_contracts()
+        contracts.get_contract_pricebook(contract_id)
+
+        assert requests == 3
+        assert len(Mocket.request_list()) == 4
+
+    @title("Pricebook index")
+    @description("Products and allowed collections are looked up locally")
+    def test_pricebook_index(self, client, contracts_entries, contract_id):
+        contracts = ContractsV1(
+            client._client, client._gateway_url, client.auth, cache_ttl=60
+        )
+
+        index = contracts.get_pricebook_index(contract_id)
+        contracts.validate_order(
+            contract_id, products=["assured"], collections=["visual"]
+        )
+
+        assert index.price("assured")["price"] == {"value": 500, "currency": "GBP"}
+        assert index.product_price("assured") == 500
+        assert index.price("unknown") is None
+        assert index.collection_price("visual") == 25
+        assert index.collection_price("thermal") is None
+        assert index.collections == {"visual"}
+        with raises(ContractValidationError, match="'express'.*'thermal'"):
+            contracts.validate_order(
+                contract_id, products=["express"], collections=["thermal"]
+            )
+        assert len(Mocket.request_list()) == 3
+
+    @title("Validated orders")
+    @description("Orders are validated locally before they are placed")
+    def test_validated_orders(
+        self, memory_cache, contracts_entries, contract_id, otm_request_parameters
+    ):
+        client = Client(
+            client_id="mock-id",
+            client_secret="mock-secret",
+            cache=memory_cache,
+            contracts_cache_ttl=60,
+        )
+        client.catalog_v1.item_cache = TTLCache()
+        client.catalog_v1.item_cache.set(
+            (contract_id, "thermal-item"),
+            {"id": "thermal-item", "collection": "thermal"},
+        )
+        otm_request_parameters["contract_id"] = contract_id
+
+        with raises(ContractValidationError, match="product 'express'"):
+            client.otm_v2.create_order(product="express", **otm_request_parameters)
+        with raises(ContractValidationError, match="collection 'thermal'"):
+            client.orders_v2.submit(
+                contract_id=contract_id, item_ids=["thermal-item", "other-item"]
+            )
+        with raises(ContractValidationError, match="Unknown contract"):
+            client.orders_v2.submit(contract_id=str(uuid4()), item_ids="other-item")
+
+        paths = [request.path for request in Mocket.request_list()]
+        assert not any("orders" in path for path in paths)
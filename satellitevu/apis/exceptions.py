@@ -4,6 +4,16 @@ class ContractAccessError(Exception):
         super().__init__(self.message)
 
 
+class CatalogAPIError(Exception):
+    def __init__(self, status_code: int, detail: str) -> None:
+        self.message = f"Catalog API Error - {status_code} : {detail}"
+        super().__init__(self.message)
+
+
+class ContractValidationError(Exception):
+    pass
+
+
 class OrdersAPIError:
     def __init__(self, status_code: int, detail: str) -> None:
         self.message = f"Orders API Error - {status_code} : {detail}"
@@ -28,6 +38,10 @@ class OTMFeasibilityError(OTMAPIError):
     pass
 
 
+class OTMPriceError(OTMAPIError):
+    pass
+
+
 class OTMParametersError(Exception):
     pass
 
@@ -1,5 +1,10 @@
+from datetime import datetime, timezone
 from io import BytesIO
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple, Union
+from urllib.parse import parse_qs, urlparse
 
+from satellitevu import telemetry
+from satellitevu.http import codec
 from satellitevu.http.base import ResponseWrapper
 
 
@@ -7,9 +12,20 @@ def raw_response_to_bytes(response: ResponseWrapper) -> BytesIO:
     """
     Converts the raw response data from a request into a bytes object.
     """
+    with telemetry.span("satellitevu.download.transfer"):
+        data = _read_response(response)
+    telemetry.download(len(data.getbuffer()))
+    return data
+
+
+def _read_response(response: ResponseWrapper) -> BytesIO:
     raw_response = response.raw
+    content = getattr(response, "content", None)
 
-    if isinstance(raw_response, bytes):
+    if isinstance(content, bytes):
+        # Body already decoded according to its Content-Encoding
+        data = BytesIO(content)
+    elif isinstance(raw_response, bytes):
         data = BytesIO(raw_response)
     elif hasattr(raw_response, "read"):
         data = BytesIO(raw_response.read())
@@ -29,6 +45,31 @@ def raw_response_to_bytes(response: ResponseWrapper) -> BytesIO:
     return data
 
 
+def copy_response(
+    response: ResponseWrapper,
+    write: Callable[[bytes], Any],
+    chunk_size: int = 1024 * 1024,
+) -> int:
+    """
+    Passes the body of a response to write in chunks, streaming it from the
+    connection where the HTTP client did not read it yet. Returns the body's size.
+    """
+    size = 0
+    with telemetry.span("satellitevu.download.transfer"):
+        for chunk in _iter_response(response, chunk_size):
+            write(chunk)
+            size += len(chunk)
+    telemetry.download(size)
+    return size
+
+
+def _iter_response(response: ResponseWrapper, chunk_size: int) -> Iterable[bytes]:
+    iter_content = getattr(response, "iter_content", None)
+    if iter_content is not None:
+        return iter_content(chunk_size)
+    return (_read_response(response).getvalue(),)
+
+
 def bytes_to_file(data: BytesIO, destfile: str) -> str:
     """
     Converts bytes into a file object at the specified location.
@@ -37,3 +78,91 @@ def bytes_to_file(data: BytesIO, destfile: str) -> str:
         f.write(data.getbuffer())
 
     return destfile
+
+
+def get_header(response: ResponseWrapper, name: str) -> Optional[str]:
+    """
+    Looks up a response header by name, ignoring the case of header names.
+    """
+    name = name.lower()
+    return next(
+        (v for k, v in response.headers.items() if k.lower() == name),
+        None,
+    )
+
+
+def next_page_token(page: Dict[str, Any]) -> Optional[str]:
+    """
+    Extracts the token of the next page from the "next" link of a paginated response,
+    either from the link's request body or from its URL query.
+    """
+    link = next(
+        (link for link in page.get("links") or [] if link.get("rel") == "next"), None
+    )
+    if not link:
+        return None
+
+    token = (link.get("body") or {}).get("token")
+    if not token and link.get("href"):
+        token = next(
+            iter(parse_qs(urlparse(link["href"]).query).get("token", [])), None
+        )
+    return token
+
+
+def parse_datetime(value: Union[str, datetime, None]) -> Optional[float]:
+    """
+    Converts an ISO 8601 string or datetime into a UTC timestamp. Values without
+    timezone are assumed to be UTC.
+    """
+    if value is None or value == "..":
+        return None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def parse_interval(value: Optional[str]) -> Tuple[Optional[float], Optional[float]]:
+    """
+    Converts an ISO 8601 interval "start/end" or single datetime into a pair of UTC
+    timestamps.
+    """
+    if not value:
+        return None, None
+    start, _, end = value.partition("/")
+    start = parse_datetime(start)
+    return start, parse_datetime(end) if end else start
+
+
+class FilteredResponse(ResponseWrapper):
+    """
+    Response whose JSON body's features are filtered by a predicate, e.g. to drop
+    features of a search with a simplified geometry not matching the original one.
+    """
+
+    raw: ResponseWrapper
+
+    def __init__(self, raw: ResponseWrapper, predicate: Callable[[Dict], bool]):
+        self.raw = raw
+        self.status = raw.status
+        self.headers = raw.headers
+        self._predicate = predicate
+
+    @property
+    def content(self) -> bytes:
+        return codec.dumps(self.json())
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8")
+
+    def json(self):
+        body = self.raw.json()
+        if isinstance(body, dict) and isinstance(body.get("features"), list):
+            body = {
+                **body,
+                "features": [f for f in body["features"] if self._predicate(f)],
+            }
+        return body
@@ -1,8 +1,9 @@
-from typing import Any, Union, Dict, List, Optional
+from typing import Any, Union, Dict, Iterator, List, Optional
 from uuid import UUID
 
 from satellitevu.apis.base import AbstractApi
 from satellitevu.apis.exceptions import IDAPIError
+from satellitevu.apis.pagination import MAX_PER_PAGE, paginate
 
 
 class IdV2(AbstractApi):
@@ -145,6 +146,36 @@ class IdV2(AbstractApi):
             raise IDAPIError(response.status, response.text)
         return response.json()
 
+    def iter_webhooks(
+        self,
+        per_page: int = 25,
+        max_per_page: int = MAX_PER_PAGE,
+        prefetch: bool = True,
+    ) -> Iterator[Dict]:
+        """
+        Iterates over all webhooks, following page tokens lazily. See
+        satellitevu.apis.pagination.paginate for details.
+
+        Args:
+            per_page: Initial number of results (defaults to 25) per page. The page
+            size is adapted to the observed latency up to max_per_page.
+
+            max_per_page: Maximum number of results per page. Defaults to 100.
+
+            prefetch: Whether the next page is fetched while the current one is
+            consumed. Defaults to True.
+
+        Returns:
+            An iterator of dictionaries containing properties of each webhook.
+        """
+        return paginate(
+            lambda size, token: self.list_webhooks(per_page=size, page_token=token),
+            "webhooks",
+            per_page=per_page,
+            max_per_page=max_per_page,
+            prefetch=prefetch,
+        )
+
     def edit_webhook(
         self,
         webhook_id: Union[UUID, str],
@@ -1,13 +1,22 @@
 import os
 from time import sleep
-from typing import Dict, List, Union
+from typing import TYPE_CHECKING, Dict, List, Optional, Union
+from urllib.parse import urlencode
 from uuid import UUID
 
+from satellitevu import telemetry
 
 from .base import AbstractApi
 from .exceptions import OrdersAPIError
 from .helpers import raw_response_to_bytes, bytes_to_file
 
+if TYPE_CHECKING:
+    from satellitevu.ledger import CreditLedger
+
+    from .catalog import CatalogV1
+    from .contracts import ContractsV1
+    from satellitevu.store import ImageryStore
+
 
 class OrdersV2(AbstractApi):
     """
@@ -17,8 +26,17 @@ class OrdersV2(AbstractApi):
 
     api_path = "orders/v2"
     scopes = []
+    ledger: Optional["CreditLedger"] = None
+    contracts: Optional["ContractsV1"] = None
+    catalog: Optional["CatalogV1"] = None
 
-    def get_orders(self, *, contract_id: Union[UUID, str]) -> Dict:
+    def get_orders(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        per_page: Optional[int] = None,
+        page_token: Optional[str] = None,
+    ) -> Dict:
         """
          Retrieve details of all imagery orders.
 
@@ -26,10 +44,21 @@ class OrdersV2(AbstractApi):
             contract_id: String or UUID representing the ID of the Contract
             which an order is associated with.
 
+            per_page: Optional number of results to be returned per page. Defaults
+            to None -> uses the default page size of the API.
+
+            page_token: Optional string key used to return specific page of results.
+            Defaults to None -> assumes page 0.
+
         Returns:
             A dictionary containing properties of the order.
         """
         url = self.url(f"/{contract_id}/")
+        query = urlencode(
+            [(k, v) for k, v in (("per_page", per_page), ("token", page_token)) if v]
+        )
+        if query:
+            url += f"?{query}"
         response = self.make_request(method="GET", url=url)
 
         if response.status != 200:
@@ -84,7 +113,29 @@ class OrdersV2(AbstractApi):
         if isinstance(item_ids, str):
             item_ids = [item_ids]
 
-        return self.make_request(method="POST", url=url, json={"item_id": item_ids})
+        if self.contracts is not None:
+            self.contracts.validate_order(
+                contract_id, collections=self._cached_collections(contract_id, item_ids)
+            )
+
+        response = self.make_request(method="POST", url=url, json={"item_id": item_ids})
+        if self.ledger is not None and response.status == 201:
+            ledger = self.ledger
+            ledger.debit_order(
+                contract_id,
+                lambda: ledger.item_order_price(contract_id, response.json()),
+            )
+        return response
+
+    def _cached_collections(
+        self, contract_id: Union[UUID, str], item_ids: List[str]
+    ) -> List[str]:
+        # Collections of the items found in the catalog's item cache, items are not
+        # requested just to validate an order
+        if self.catalog is None or self.catalog.item_cache is None:
+            return []
+        items = (self.catalog.item_cache.get((str(contract_id), id)) for id in item_ids)
+        return [item["collection"] for item in items if item is not None]
 
     def _download_request(
         self,
@@ -94,13 +145,15 @@ class OrdersV2(AbstractApi):
         """
         Request download, handling retries.
         """
-        while True:
-            response = self.make_request(method="GET", url=url)
+        with telemetry.span("satellitevu.download.poll", **{"url.full": url}):
+            while True:
+                response = self.make_request(method="GET", url=url)
 
-            if response.status == 202:
-                sleep(retry_factor * int(response.headers["Retry-After"]))
-            elif response.status == 200:
-                break
+                if response.status == 202:
+                    telemetry.retry(self, "retry_after")
+                    sleep(retry_factor * int(response.headers["Retry-After"]))
+                elif response.status == 200:
+                    break
 
         return response.json()
 
@@ -174,6 +227,7 @@ class OrdersV2(AbstractApi):
         item_id: str,
         destdir: str,
         retry_factor: float = 1.0,
+        store: Optional["ImageryStore"] = None,
     ) -> str:
         """
         Download a submitted imagery order.
@@ -196,20 +250,28 @@ class OrdersV2(AbstractApi):
             "Retry-After" header will be observed before the download request
             is retried again. Defaults to 1.0.
 
+            store: Optional ImageryStore used to skip the download if a verified
+            copy of the imagery is already present locally. Defaults to None.
+
         Returns:
             A string specifying the path the imagery has been downloaded to.
 
         """
-        item_url = self.item_download_url(
-            contract_id=contract_id,
-            order_id=order_id,
-            item_id=item_id,
-            retry_factor=retry_factor,
-        )["url"]
+        destfile = os.path.join(destdir, f"{item_id}.zip")
 
-        response = self.make_request(method="GET", url=item_url)
+        def request(headers=None):
+            item_url = self.item_download_url(
+                contract_id=contract_id,
+                order_id=order_id,
+                item_id=item_id,
+                retry_factor=retry_factor,
+            )["url"]
+            return self.make_request(method="GET", url=item_url, headers=headers)
 
-        destfile = os.path.join(destdir, f"{item_id}.zip")
+        if store is not None:
+            return store.fetch(f"orders/{order_id}/{item_id}", destfile, request)
+
+        response = request()
         data = raw_response_to_bytes(response)
 
         return bytes_to_file(data, destfile)
@@ -221,6 +283,7 @@ class OrdersV2(AbstractApi):
         order_id: UUID,
         destdir: str,
         retry_factor: float = 1.0,
+        store: Optional["ImageryStore"] = None,
     ) -> str:
         """
         Downloads entire imagery order.
@@ -240,17 +303,25 @@ class OrdersV2(AbstractApi):
             "Retry-After" header will be observed before the download request
             is retried again. Defaults to 1.0.
 
+            store: Optional ImageryStore used to skip the download if a verified
+            copy of the imagery is already present locally. Defaults to None.
+
         Returns:
             A string specifying the path the imagery has been downloaded to.
             All items will be downloaded into one ZIP file.
         """
-        order_url = self.order_download_url(
-            contract_id=contract_id, order_id=order_id, retry_factor=retry_factor
-        )["url"]
+        destfile = os.path.join(destdir, f"{order_id}.zip")
 
-        response = self.make_request(method="GET", url=order_url)
+        def request(headers=None):
+            order_url = self.order_download_url(
+                contract_id=contract_id, order_id=order_id, retry_factor=retry_factor
+            )["url"]
+            return self.make_request(method="GET", url=order_url, headers=headers)
 
-        destfile = os.path.join(destdir, f"{order_id}.zip")
+        if store is not None:
+            return store.fetch(f"orders/{order_id}", destfile, request)
+
+        response = request()
         data = raw_response_to_bytes(response)
 
         return bytes_to_file(data, destfile)
@@ -1,7 +1,7 @@
 from allure import description, title, suite
 import tempfile
 from io import BytesIO
-from json import dumps
+from json import dumps, loads
 from unittest.mock import patch
 from urllib.parse import urljoin, urlparse
 from uuid import uuid4
@@ -13,6 +13,7 @@ from pytest import mark
 
 from satellitevu.apis.orders import bytes_to_file
 from satellitevu.auth.exc import Api401Error, Api403Error
+from satellitevu.store import ImageryStore
 
 API_PATH = "orders/v2/contract-id/"
 
@@ -52,7 +53,7 @@ class TestOrders:
         assert api_request.path == f"/{api_path}"
         assert api_request.headers["content-type"] == "application/json"
         assert api_request.headers["authorization"] == oauth_token_entry
-        assert api_request.body == payload
+        assert loads(api_request.body) == loads(payload)
 
         assert response.status == 201
         cos_response_body = dumps(
@@ -137,7 +138,7 @@ class TestOrders:
         assert api_request.path == f"/{api_path}"
         assert api_request.headers["content-type"] == "application/json"
         assert api_request.headers["authorization"] == oauth_token_entry
-        assert api_request.body == payload
+        assert loads(api_request.body) == loads(payload)
 
         assert response.status == 201
 
@@ -450,6 +451,26 @@ class TestOrders:
             .with_body(order_list_response)
         )
 
+    @title("Get orders page")
+    @description("Get a page of the list of orders")
+    def test_get_orders_page(self, client, oauth_token_entry, order_list_response):
+        contract_id = str(uuid4())
+        api_path = API_PATH.replace("contract-id", str(contract_id))
+
+        Entry.single_register(
+            "GET",
+            client._gateway_url + f"{api_path}?per_page=100&token=page%2B2%2F%3D",
+            body=dumps(order_list_response),
+        )
+
+        response = client.orders_v2.get_orders(
+            contract_id=contract_id, per_page=100, page_token="page+2/="
+        )
+
+        api_request = Mocket.last_request()
+        assert api_request.path == f"/{api_path}?per_page=100&token=page%2B2%2F%3D"
+        assert isinstance(response, dict)
+
     @title("Get order details (unauthorized)")
     @description("Attempt to get order details without authorization")
     @mark.parametrize(
@@ -530,6 +551,45 @@ class TestOrders:
 
         Mocket.assert_fail_if_entries_not_served()
 
+    @title("Download order into store")
+    @description("Re-download an unchanged order from a local store")
+    def test_download_order_with_store(
+        self, client, oauth_token_entry, redirect_response, tmp_path
+    ):
+        contract_id = str(uuid4())
+        api_path = API_PATH.replace("contract-id", str(contract_id))
+        order_id = "528b0f77-5df1-4ed7-9224-502817170613"
+        store = ImageryStore(str(tmp_path / "store"))
+
+        Entry.register(
+            "GET",
+            client._gateway_url + f"{api_path}{order_id}/download?redirect=False",
+            Response(body=dumps(redirect_response), status=200),
+            Response(body=dumps(redirect_response), status=200),
+        )
+        Entry.register(
+            "GET",
+            redirect_response["url"],
+            Response(body=b"imagery", headers={"ETag": '"v1"'}),
+            Response(status=304),
+        )
+
+        for _ in range(2):
+            response = client.orders_v2.download_order(
+                contract_id=contract_id,
+                order_id=order_id,
+                destdir=str(tmp_path),
+                store=store,
+            )
+
+        download_requests = [
+            r for r in Mocket.request_list() if r.headers["host"] == "image.test"
+        ]
+        assert len(download_requests) == 2
+        assert download_requests[-1].headers["if-none-match"] == '"v1"'
+        assert response == str(tmp_path / f"{order_id}.zip")
+        assert open(response, "rb").read() == b"imagery"
+
     @mark.parametrize(
         ["status", "exception"],
         (
@@ -1,17 +1,43 @@
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import product as cartesian_product
 from time import sleep
-from typing import Any, List, Literal, Optional, Tuple, Union, Dict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterator,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
 from uuid import UUID
 
+from satellitevu import telemetry
+from satellitevu.geometry import PreparedGeometry, Simplifier
+from satellitevu.http import AbstractClient
+
 from .base import AbstractApi
+from .cache import FeasibilityCache, TTLCache, payload_key
 from .exceptions import (
     OTMOrderCancellationError,
     OTMFeasibilityError,
     OTMOrderError,
     OTMParametersError,
+    OTMPriceError,
 )
-from .helpers import raw_response_to_bytes, bytes_to_file
+from .helpers import FilteredResponse, raw_response_to_bytes, bytes_to_file
+from .pagination import MAX_PER_PAGE, paginate
+
+if TYPE_CHECKING:
+    from satellitevu.ledger import CreditLedger
+
+    from .contracts import ContractsV1
+    from satellitevu.store import ImageryStore
 
 MAX_CLOUD_COVER_DEFAULT = 15
 MIN_OFF_NADIR_RANGE = [0, 45]
@@ -20,6 +46,11 @@ MIN_GSD_RANGE = [3.5, 6.8]
 MAX_GSD_RANGE = MIN_GSD_RANGE
 
 
+def _price_value(quote: Dict[str, Any]) -> Any:
+    price = quote.get("price")
+    return price.get("value") if isinstance(price, dict) else price
+
+
 class OtmV2(AbstractApi):
     """
     Client interface to the OTM API located at
@@ -28,6 +59,132 @@ class OtmV2(AbstractApi):
 
     api_path = "otm/v2"
     scopes = []
+    feasibility_cache: Optional[FeasibilityCache]
+    price_cache: Optional[TTLCache]
+    ledger: Optional["CreditLedger"] = None
+    contracts: Optional["ContractsV1"] = None
+    simplifier: Optional[Simplifier] = None
+
+    def __init__(
+        self,
+        client: AbstractClient,
+        base_url: str,
+        *,
+        feasibility_cache: Optional[FeasibilityCache] = None,
+        price_cache: Optional[TTLCache] = None,
+    ):
+        super().__init__(client, base_url)
+        self.feasibility_cache = feasibility_cache
+        self.price_cache = price_cache
+
+    @staticmethod
+    def _tasking_payload(
+        *,
+        coordinates: Union[Tuple[float, float], Tuple[float, float, float]],
+        date_from: datetime,
+        date_to: datetime,
+        day_night_mode: Literal["day", "night", "day-night"],
+        product: Literal["standard", "assured"],
+        max_cloud_cover: Optional[int],
+        min_off_nadir: Optional[int],
+        max_off_nadir: Optional[int],
+        min_gsd: Optional[float],
+        max_gsd: Optional[float],
+        **kwargs,
+    ) -> Dict[str, Any]:
+        payload = {
+            "type": "Feature",
+            "geometry": {
+                "type": "Point",
+                "coordinates": coordinates,
+            },
+            "properties": {
+                "datetime": f"{date_from.isoformat()}/{date_to.isoformat()}",
+                "product": product,
+                **kwargs,
+            },
+        }
+
+        if product == "standard":
+            payload["properties"].update(
+                {
+                    "satvu:day_night_mode": day_night_mode,
+                    "max_cloud_cover": max_cloud_cover,
+                }
+            )
+
+            for k, v in {
+                "min_off_nadir": min_off_nadir,
+                "max_off_nadir": max_off_nadir,
+                "min_gsd": min_gsd,
+                "max_gsd": max_gsd,
+            }.items():
+                if v is None:
+                    continue
+                payload["properties"].update({k: v})
+
+        return payload
+
+    def _price_payload(
+        self,
+        *,
+        coordinates: Union[Tuple[float, float], Tuple[float, float, float]],
+        date_from: datetime,
+        date_to: datetime,
+        day_night_mode: Literal["day", "night", "day-night"] = "day-night",
+        product: Literal["standard", "assured"] = "standard",
+        max_cloud_cover: Optional[int] = None,
+        min_off_nadir: Optional[int] = None,
+        max_off_nadir: Optional[int] = None,
+        min_gsd: Optional[float] = None,
+        max_gsd: Optional[float] = None,
+        **kwargs,
+    ) -> Dict[str, Any]:
+        """
+        Returns the payload of a price request, with the defaults of get_price.
+        """
+        if product == "standard" and not any(
+            [min_gsd, max_gsd, min_off_nadir, max_off_nadir]
+        ):
+            raise OTMParametersError(
+                "One pair of Off Nadir or GSD values must be specified for a "
+                "standard priority order."
+            )
+
+        return self._tasking_payload(
+            coordinates=coordinates,
+            date_from=date_from,
+            date_to=date_to,
+            day_night_mode=day_night_mode,
+            product=product,
+            max_cloud_cover=max_cloud_cover,
+            min_off_nadir=min_off_nadir,
+            max_off_nadir=max_off_nadir,
+            min_gsd=min_gsd,
+            max_gsd=max_gsd,
+            **kwargs,
+        )
+
+    def _quote(
+        self, contract_id: Union[UUID, str], payload: Dict[str, Any]
+    ) -> Tuple[int, Any]:
+        """
+        Returns the status and body of the price request for payload, from the
+        price_cache if possible.
+        """
+        key = None
+        if self.price_cache is not None:
+            key = (str(contract_id), payload_key(payload))
+            cached = self.price_cache.get(key)
+            if cached is not None:
+                return 200, cached
+
+        url = self.url(f"{str(contract_id)}/tasking/price/")
+        response = self.make_request(method="POST", url=url, json=payload)
+        result = response.json()
+        if key is not None and response.status == 200:
+            self.price_cache.set(key, result)
+        return response.status, result
 
     def post_feasibility(
         self,
@@ -109,45 +266,34 @@ class OtmV2(AbstractApi):
                 "standard priority feasibility request."
             )
 
-        payload = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": coordinates,
-            },
-            "properties": {
-                "datetime": f"{date_from.isoformat()}/{date_to.isoformat()}",
-                "product": product,
-                **kwargs,
-            },
-        }
-
-        if product == "standard":
-            payload["properties"].update(
-                {
-                    "satvu:day_night_mode": day_night_mode,
-                    "max_cloud_cover": max_cloud_cover,
-                }
-            )
+        payload = self._tasking_payload(
+            coordinates=coordinates,
+            date_from=date_from,
+            date_to=date_to,
+            day_night_mode=day_night_mode,
+            product=product,
+            max_cloud_cover=max_cloud_cover,
+            min_off_nadir=min_off_nadir,
+            max_off_nadir=max_off_nadir,
+            min_gsd=min_gsd,
+            max_gsd=max_gsd,
+            **kwargs,
+        )
 
-            for k, v in {
-                "min_off_nadir": min_off_nadir,
-                "max_off_nadir": max_off_nadir,
-                "min_gsd": min_gsd,
-                "max_gsd": max_gsd,
-            }.items():
-                if v is None:
-                    continue
-                payload["properties"].update({k: v})
+        if self.feasibility_cache is not None:
+            cached = self.feasibility_cache.lookup(contract_id, payload)
+            if cached:
+                return cached
 
-        response = self.make_request(
-            method="POST", url=url, json={k: v for k, v in payload.items() if v}
-        )
+        response = self.make_request(method="POST", url=url, json=payload)
 
         if response.status != 202:
             raise OTMFeasibilityError(response.status, response.text)
 
-        return response.json()
+        result = response.json()
+        if self.feasibility_cache is not None:
+            self.feasibility_cache.add(contract_id, payload, result)
+        return result
 
     def get_feasibility(self, *, contract_id: Union[UUID, str], id: Union[UUID, str]):
         """
@@ -163,11 +309,19 @@ class OtmV2(AbstractApi):
         Returns:
             A dictionary containing properties of the feasibility request.
         """
+        if self.feasibility_cache is not None:
+            cached = self.feasibility_cache.request(id)
+            if cached:
+                return cached
+
         response = self.make_request(
             method="GET",
             url=self.url(f"{str(contract_id)}/tasking/feasibilities/{str(id)}"),
         )
-        return response.json()
+        result = response.json()
+        if self.feasibility_cache is not None:
+            self.feasibility_cache.update_request(result)
+        return result
 
     def get_feasibility_response(
         self, *, contract_id: Union[UUID, str], id: Union[UUID, str]
@@ -186,13 +340,21 @@ class OtmV2(AbstractApi):
         Returns:
             A dictionary containing the feasibility response.
         """
+        if self.feasibility_cache is not None:
+            cached = self.feasibility_cache.response(id)
+            if cached:
+                return cached
+
         response = self.make_request(
             method="GET",
             url=self.url(
                 f"{str(contract_id)}/tasking/feasibilities/{str(id)}/response"
             ),
         )
-        return response.json()
+        result = response.json()
+        if self.feasibility_cache is not None:
+            self.feasibility_cache.complete(id, result)
+        return result
 
     def list_feasibility_requests(
         self,
@@ -226,6 +388,44 @@ class OtmV2(AbstractApi):
         )
         return response.json()
 
+    def iter_feasibility_requests(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        per_page: int = 25,
+        max_per_page: int = MAX_PER_PAGE,
+        prefetch: bool = True,
+    ) -> Iterator[Dict]:
+        """
+        Iterates over all of your feasibility requests, following page tokens
+        lazily. See satellitevu.apis.pagination.paginate for details.
+
+        Args:
+            contract_id: Associated ID of the Contract for which all feasibility
+            requests will be listed.
+
+            per_page: Initial number of results (defaults to 25) per page. The page
+            size is adapted to the observed latency up to max_per_page.
+
+            max_per_page: Maximum number of results per page. Defaults to 100.
+
+            prefetch: Whether the next page is fetched while the current one is
+            consumed. Defaults to True.
+
+        Returns:
+            An iterator of dictionaries containing properties of each feasibility
+            request.
+        """
+        return paginate(
+            lambda size, token: self.list_feasibility_requests(
+                contract_id=contract_id, per_page=size, page_token=token
+            ),
+            "features",
+            per_page=per_page,
+            max_per_page=max_per_page,
+            prefetch=prefetch,
+        )
+
     def create_order(
         self,
         *,
@@ -373,14 +573,50 @@ class OtmV2(AbstractApi):
                     continue
                 payload["properties"].update({k: v})
 
-        response = self.make_request(
-            method="POST", url=url, json={k: v for k, v in payload.items() if v}
-        )
+        if self.contracts is not None:
+            self.contracts.validate_order(contract_id, products=[product])
+
+        response = self.make_request(method="POST", url=url, json=payload)
 
         if response.status != 201:
             raise OTMOrderError(response.status, response.text)
 
-        return response.json()
+        result = response.json()
+        if self.ledger is not None:
+
+            def price() -> Optional[float]:
+                # Priced from the pricebook validated against above where possible,
+                # otherwise quoted with the order's parameters from the price_cache
+                # or the API. Assured orders placed with a signature only fall back
+                # to the price in the order.
+                from satellitevu.ledger import order_price
+
+                price = self.ledger.product_price(contract_id, product)
+                if price is not None:
+                    return price
+                if coordinates is not None and date_from and date_to:
+                    addons = (
+                        {"addon:withhold": addon_withhold} if addon_withhold else {}
+                    )
+                    payload = self._price_payload(
+                        coordinates=coordinates,
+                        date_from=date_from,
+                        date_to=date_to,
+                        day_night_mode=day_night_mode,
+                        product=product,
+                        max_cloud_cover=max_cloud_cover,
+                        min_off_nadir=min_off_nadir,
+                        max_off_nadir=max_off_nadir,
+                        min_gsd=min_gsd,
+                        max_gsd=max_gsd,
+                        **addons,
+                        **kwargs,
+                    )
+                    return _price_value(self._quote(contract_id, payload)[1])
+                return order_price(result)
+
+            self.ledger.debit_order(contract_id, price)
+        return result
 
     def get_order(self, *, contract_id: Union[UUID, str], order_id: Union[UUID, str]):
         """
@@ -458,6 +694,43 @@ class OtmV2(AbstractApi):
         )
         return response.json()
 
+    def iter_orders(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        per_page: int = 25,
+        max_per_page: int = MAX_PER_PAGE,
+        prefetch: bool = True,
+    ) -> Iterator[Dict]:
+        """
+        Iterates over all of your orders, most recent first, following page tokens
+        lazily. See satellitevu.apis.pagination.paginate for details.
+
+        Args:
+            contract_id: Associated ID of the Contract under which all tasking
+            orders will be listed.
+
+            per_page: Initial number of results (defaults to 25) per page. The page
+            size is adapted to the observed latency up to max_per_page.
+
+            max_per_page: Maximum number of results per page. Defaults to 100.
+
+            prefetch: Whether the next page is fetched while the current one is
+            consumed. Defaults to True.
+
+        Returns:
+            An iterator of dictionaries containing properties of each order.
+        """
+        return paginate(
+            lambda size, token: self.list_orders(
+                contract_id=contract_id, per_page=size, page_token=token
+            ),
+            "features",
+            per_page=per_page,
+            max_per_page=max_per_page,
+            prefetch=prefetch,
+        )
+
     def get_price(
         self,
         *,
@@ -530,51 +803,109 @@ class OtmV2(AbstractApi):
             created_at is the UTC datetime at which the price was calculated.
 
         """
-        url = self.url(f"{str(contract_id)}/tasking/price/")
+        payload = self._price_payload(
+            coordinates=coordinates,
+            date_from=date_from,
+            date_to=date_to,
+            day_night_mode=day_night_mode,
+            product=product,
+            max_cloud_cover=max_cloud_cover,
+            min_off_nadir=min_off_nadir,
+            max_off_nadir=max_off_nadir,
+            min_gsd=min_gsd,
+            max_gsd=max_gsd,
+            **kwargs,
+        )
+        return self._quote(contract_id, payload)[1]
 
-        if product == "standard" and not any(
-            [min_gsd, max_gsd, min_off_nadir, max_off_nadir]
-        ):
-            raise OTMParametersError(
-                "One pair of Off Nadir or GSD values must be specified for a "
-                "standard priority order."
-            )
+    def price_matrix(
+        self,
+        *,
+        contract_id: Union[UUID, str],
+        axes: Dict[str, Sequence[Any]],
+        max_workers: int = 8,
+        **kwargs,
+    ) -> Tuple[Any, Dict[str, List[Any]]]:
+        """
+        Returns prices for all combinations of the given parameter values, e.g. to
+        compare products, day/night modes and cloud cover thresholds.
 
-        payload = {
-            "type": "Feature",
-            "geometry": {
-                "type": "Point",
-                "coordinates": coordinates,
-            },
-            "properties": {
-                "datetime": f"{date_from.isoformat()}/{date_to.isoformat()}",
-                "product": product,
-                **kwargs,
-            },
-        }
+        Combinations resulting in the same request are priced once, and prices not
+        found in the price_cache are requested concurrently.
 
-        if product == "standard":
-            payload["properties"].update(
-                {
-                    "satvu:day_night_mode": day_night_mode,
-                    "max_cloud_cover": max_cloud_cover,
-                }
+        Args:
+            contract_id: Associated ID of the Contract for which prices will be
+            calculated.
+
+            axes: Dictionary mapping get_price parameters to the values to price, e.g.
+            {"product": ["standard", "assured"], "max_cloud_cover": [10, 50]}.
+
+            max_workers: Maximum number of concurrent price requests. Defaults to 8.
+
+        Kwargs:
+            Parameters of get_price common to all combinations, e.g. coordinates,
+            date_from and date_to.
+
+        Returns:
+            A tuple of the prices and the axis labels. Prices are a NumPy array with
+            one dimension per axis if NumPy is installed (satellitevu[numpy]), nested
+            lists otherwise. Axis labels map each parameter to its values in the order
+            of the axes.
+
+        Raises:
+            OTMParametersError: If a combination is not a valid price request.
+
+            OTMPriceError: If any combination could not be priced, listing all
+            failed combinations.
+        """
+        try:
+            import numpy
+        except ImportError:
+            numpy = None
+
+        labels = {name: list(values) for name, values in axes.items()}
+
+        cells = {}
+        payloads = {}
+        for combination in cartesian_product(*labels.values()):
+            arguments = {**kwargs, **dict(zip(labels, combination))}
+            payload = self._price_payload(**arguments)
+            key = payload_key(payload)
+            cells[combination] = key
+            payloads.setdefault(key, payload)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {
+                key: executor.submit(self._quote, contract_id, payload)
+                for key, payload in payloads.items()
+            }
+            quotes = {key: future.result() for key, future in futures.items()}
+
+        failed = [
+            (combination, *quotes[key])
+            for combination, key in cells.items()
+            if quotes[key][0] != 200
+        ]
+        if failed:
+            raise OTMPriceError(
+                failed[0][1],
+                f"{len(failed)} of {len(cells)} combinations could not be priced: "
+                + "; ".join(
+                    f"{dict(zip(labels, combination))}: {status} {body}"
+                    for combination, status, body in failed
+                ),
             )
+        prices = {key: _price_value(body) for key, (_, body) in quotes.items()}
 
-            for k, v in {
-                "min_off_nadir": min_off_nadir,
-                "max_off_nadir": max_off_nadir,
-                "min_gsd": min_gsd,
-                "max_gsd": max_gsd,
-            }.items():
-                if v is None:
-                    continue
-                payload["properties"].update({k: v})
+        def build(prefix: Tuple, remaining: List[List[Any]]):
+            if not remaining:
+                return prices[cells[prefix]]
+            return [build((*prefix, value), remaining[1:]) for value in remaining[0]]
 
-        response = self.make_request(
-            method="POST", url=url, json={k: v for k, v in payload.items() if v}
-        )
-        return response.json()
+        values = build((), list(labels.values()))
+        if numpy is not None:
+            values = numpy.array(values, dtype=float)
+        return values, labels
 
     def search(
         self,
@@ -642,6 +973,11 @@ class OtmV2(AbstractApi):
             field is sortable e.g. [{"field": "status", "direction": "desc"}].
         """
         url = self.url(f"{str(contract_id)}/search/")
+
+        original = intersects
+        if intersects and self.simplifier is not None:
+            intersects = self.simplifier.simplify(intersects)
+
         payload = {
             "token": page_token,
             "limit": per_page,
@@ -658,8 +994,55 @@ class OtmV2(AbstractApi):
         response = self.make_request(
             method="POST", url=url, json={k: v for k, v in payload.items() if v}
         )
+        if intersects is not original:
+            prepared = PreparedGeometry(original)
+            return FilteredResponse(
+                response, lambda feature: Simplifier.matches(feature, prepared)
+            ).json()
         return response.json()
 
+    def iter_search(
+        self,
+        contract_id: Union[str, UUID],
+        per_page: int = 25,
+        max_per_page: int = MAX_PER_PAGE,
+        prefetch: bool = True,
+        **kwargs,
+    ) -> Iterator[Dict]:
+        """
+        Iterates over all results of a search across feasibility requests and orders,
+        following page tokens lazily. See satellitevu.apis.pagination.paginate for
+        details.
+
+        Args:
+            contract_id: Associated ID of the Contract under which the search
+            request will be performed.
+
+            per_page: Initial number of results (defaults to 25) per page. The page
+            size is adapted to the observed latency up to max_per_page.
+
+            max_per_page: Maximum number of results per page. Defaults to 100.
+
+            prefetch: Whether the next page is fetched while the current one is
+            consumed. Defaults to True.
+
+        Kwargs:
+            Search parameters as supported by OtmV2.search, e.g. collections,
+            date_range or intersects.
+
+        Returns:
+            An iterator of dictionaries containing properties of each search result.
+        """
+        return paginate(
+            lambda size, token: self.search(
+                contract_id, page_token=token, per_page=size, **kwargs
+            ),
+            "features",
+            per_page=per_page,
+            max_per_page=max_per_page,
+            prefetch=prefetch,
+        )
+
     def _download_request(
         self,
         url: str,
@@ -668,13 +1051,15 @@ class OtmV2(AbstractApi):
         """
         Request download, handling retries.
         """
-        while True:
-            response = self.make_request(method="GET", url=url)
+        with telemetry.span("satellitevu.download.poll", **{"url.full": url}):
+            while True:
+                response = self.make_request(method="GET", url=url)
 
-            if response.status == 202:
-                sleep(retry_factor * int(response.headers["Retry-After"]))
-            elif response.status == 200:
-                break
+                if response.status == 202:
+                    telemetry.retry(self, "retry_after")
+                    sleep(retry_factor * int(response.headers["Retry-After"]))
+                elif response.status == 200:
+                    break
 
         return response.json()
 
@@ -716,6 +1101,7 @@ class OtmV2(AbstractApi):
         order_id: UUID,
         destdir: str,
         retry_factor: float = 1.0,
+        store: Optional["ImageryStore"] = None,
     ):
         """
         Downloads tasking order.
@@ -735,17 +1121,25 @@ class OtmV2(AbstractApi):
             "Retry-After" header will be observed before the download request
             is retried again. Defaults to 1.0.
 
+            store: Optional ImageryStore used to skip the download if a verified
+            copy of the imagery is already present locally. Defaults to None.
+
         Returns:
             A string specifying the path the imagery has been downloaded to.
             All items will be downloaded into one ZIP file.
         """
-        order_url = self.order_download_url(
-            contract_id=contract_id, order_id=order_id, retry_factor=retry_factor
-        )["url"]
+        destfile = os.path.join(destdir, f"{order_id}.zip")
 
-        response = self.make_request(method="GET", url=order_url)
+        def request(headers=None):
+            order_url = self.order_download_url(
+                contract_id=contract_id, order_id=order_id, retry_factor=retry_factor
+            )["url"]
+            return self.make_request(method="GET", url=order_url, headers=headers)
 
-        destfile = os.path.join(destdir, f"{order_id}.zip")
+        if store is not None:
+            return store.fetch(f"otm/{order_id}", destfile, request)
+
+        response = request()
         data = raw_response_to_bytes(response)
 
         return bytes_to_file(data, destfile)
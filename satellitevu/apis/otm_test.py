@@ -10,7 +10,12 @@ from mocket import Mocket
 from mocket.mockhttp import Entry, Response
 from pytest import mark, raises
 
-from satellitevu.apis.exceptions import OTMOrderCancellationError, OTMParametersError
+from satellitevu.apis.cache import TTLCache
+from satellitevu.apis.exceptions import (
+    OTMOrderCancellationError,
+    OTMParametersError,
+    OTMPriceError,
+)
 
 API_PATH_FEASIBILITY = "otm/v2/contract-id/tasking/feasibilities/"
 API_PATH_ORDERS = "otm/v2/contract-id/tasking/orders/"
@@ -616,6 +621,93 @@ class TestTasking:
         assert api_request.path == "/" + api_path
         assert api_request.headers["authorization"] == oauth_token_entry
 
+    @title("Cached tasking price")
+    @description("Repeated price requests with equivalent parameters use the cache")
+    def test_get_price_cached(self, oauth_token_entry, client, otm_request_parameters):
+        contract_id = otm_request_parameters["contract_id"]
+        api_path = f"otm/v2/{contract_id}/tasking/price/"
+        price = {"price": {"value": 100, "currency": "GBP"}, "created_at": "now"}
+        client.otm_v2.price_cache = TTLCache(ttl=60)
+
+        Entry.single_register(
+            "POST", client._gateway_url + api_path, body=dumps(price), status=200
+        )
+
+        client.otm_v2.get_price(**otm_request_parameters)
+        response = client.otm_v2.get_price(
+            **{**otm_request_parameters, "max_off_nadir": 30.0}
+        )
+
+        assert response == price
+        assert len(Mocket.request_list()) == 2
+
+    @title("Tasking price matrix")
+    @description("Prices are returned for all combinations of parameter values")
+    def test_price_matrix(self, oauth_token_entry, client, otm_request_parameters):
+        contract_id = otm_request_parameters.pop("contract_id")
+        api_path = f"otm/v2/{contract_id}/tasking/price/"
+
+        Entry.register(
+            "POST",
+            client._gateway_url + api_path,
+            *(
+                Response(body=dumps({"price": {"value": value, "currency": "GBP"}}))
+                for value in (1, 2, 3)
+            ),
+        )
+
+        values, labels = client.otm_v2.price_matrix(
+            contract_id=contract_id,
+            axes={"product": ["standard", "assured"], "max_cloud_cover": [10, 50]},
+            max_workers=1,
+            **otm_request_parameters,
+        )
+
+        assert labels == {
+            "product": ["standard", "assured"],
+            "max_cloud_cover": [10, 50],
+        }
+        assert [list(row) for row in values] == [[1, 2], [3, 3]]
+        prices = [loads(r.body) for r in Mocket.request_list()[1:]]
+        assert [p["properties"]["product"] for p in prices] == [
+            "standard",
+            "standard",
+            "assured",
+        ]
+
+    @title("Tasking price matrix errors")
+    @description("Failed and invalid combinations raise instead of missing prices")
+    def test_price_matrix_errors(
+        self, oauth_token_entry, client, otm_request_parameters
+    ):
+        contract_id = otm_request_parameters.pop("contract_id")
+        api_path = f"otm/v2/{contract_id}/tasking/price/"
+
+        Entry.register(
+            "POST",
+            client._gateway_url + api_path,
+            Response(body=dumps({"price": {"value": 1, "currency": "GBP"}})),
+            Response(body=dumps({"detail": "Unavailable"}), status=503),
+        )
+
+        with raises(OTMPriceError, match="1 of 2 combinations") as error:
+            client.otm_v2.price_matrix(
+                contract_id=contract_id,
+                axes={"max_cloud_cover": [10, 50]},
+                max_workers=1,
+                **otm_request_parameters,
+            )
+        assert "{'max_cloud_cover': 50}: 503" in str(error.value)
+
+        requests = len(Mocket.request_list())
+        with raises(OTMParametersError):
+            client.otm_v2.price_matrix(
+                contract_id=contract_id,
+                axes={"max_off_nadir": [None, 30]},
+                **{**otm_request_parameters, "min_off_nadir": None},
+            )
+        assert len(Mocket.request_list()) == requests
+
     @title("Download tasking order")
     @description("Download a specific tasking order")
     def test_download_order(
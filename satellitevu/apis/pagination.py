@@ -0,0 +1,200 @@
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from queue import Full, Queue
+from threading import Event
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .helpers import next_page_token
+
+MIN_PER_PAGE = 10
+MAX_PER_PAGE = 100
+TARGET_LATENCY = 1.0
+
+
+class PageSizer:
+    """
+    Adapts the page size of paginated requests to the observed latency and number of
+    items returned, growing pages while full pages are returned well within the target
+    latency and shrinking them when the target latency is exceeded.
+    """
+
+    per_page: int
+    min_per_page: int
+    max_per_page: int
+    target_latency: float
+
+    def __init__(
+        self,
+        per_page: int,
+        *,
+        min_per_page: int = MIN_PER_PAGE,
+        max_per_page: int = MAX_PER_PAGE,
+        target_latency: float = TARGET_LATENCY,
+    ):
+        self.min_per_page = min(min_per_page, per_page)
+        self.max_per_page = max(max_per_page, per_page)
+        self.per_page = per_page
+        self.target_latency = target_latency
+
+    def update(self, requested: int, returned: int, latency: float):
+        if latency > self.target_latency:
+            self.per_page = max(self.min_per_page, requested // 2)
+        elif latency < self.target_latency / 2 and returned >= requested:
+            self.per_page = min(self.max_per_page, requested * 2)
+
+
+def paginate(
+    fetch: Callable[[int, Optional[str]], Dict[str, Any]],
+    items_key: str,
+    *,
+    per_page: int = 25,
+    min_per_page: int = MIN_PER_PAGE,
+    max_per_page: int = MAX_PER_PAGE,
+    target_latency: float = TARGET_LATENCY,
+    adaptive: bool = True,
+    prefetch: bool = True,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily iterates over the items of all pages of a paginated endpoint, following
+    the tokens of "next" links until a page has none or links itself.
+
+    While the items of a page are consumed, the next page is fetched in the
+    background, so at most two pages are held in memory at any time.
+
+    If adaptive, the page size is adapted to the latency of each page and whether it
+    was full. Response body sizes are not taken into account, since fetch returns
+    decoded pages, so large items only shrink pages through their latency.
+
+    Args:
+        fetch: Callable returning the page for the given page size and page token.
+
+        items_key: Key of the list of items in each page, e.g. "features".
+
+        per_page: Initial number of results per page. Defaults to 25.
+
+        min_per_page: Lower bound for the adapted page size. Defaults to 10.
+
+        max_per_page: Upper bound for the adapted page size. Defaults to 100.
+
+        target_latency: Page latency in seconds the page size is adapted to.
+        Defaults to 1.0.
+
+        adaptive: Whether the page size is adapted at all. Defaults to True.
+
+        prefetch: Whether the next page is fetched in the background. Defaults
+        to True.
+    """
+    sizer = PageSizer(
+        per_page,
+        min_per_page=min_per_page,
+        max_per_page=max_per_page,
+        target_latency=target_latency,
+    )
+
+    def timed_fetch(size: int, token: Optional[str]):
+        start = perf_counter()
+        page = fetch(size, token)
+        return page, size, perf_counter() - start
+
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def request(token: Optional[str]):
+        if executor:
+            return executor.submit(timed_fetch, sizer.per_page, token).result
+        return partial(timed_fetch, sizer.per_page, token)
+
+    try:
+        token = None
+        pending = request(token)
+        while pending:
+            page, size, latency = pending()
+            items = page.get(items_key) or []
+            if adaptive:
+                sizer.update(size, len(items), latency)
+
+            # Pages may be filtered locally, e.g. searches with simplified geometries,
+            # so even empty pages are followed while the server links a new page
+            previous, token = token, next_page_token(page)
+            pending = request(token) if token and token != previous else None
+
+            yield from items
+    finally:
+        if executor:
+            executor.shutdown(wait=False)
+
+
+class _Failure:
+    def __init__(self, exception: BaseException):
+        self.exception = exception
+
+
+_DONE = object()
+
+
+def _put(queue: Queue, item: Any, stop: Event) -> bool:
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=0.1)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _produce(iterator: Iterator[Any], queue: Queue, stop: Event):
+    try:
+        for item in iterator:
+            if not _put(queue, item, stop):
+                return
+    except BaseException as exception:
+        _put(queue, _Failure(exception), stop)
+    else:
+        _put(queue, _DONE, stop)
+
+
+def _consume(queue: Queue, count: int = 1) -> Iterator[Any]:
+    while count:
+        item = queue.get()
+        if item is _DONE:
+            count -= 1
+        elif isinstance(item, _Failure):
+            raise item.exception
+        else:
+            yield item
+
+
+def merge(
+    iterators: List[Iterator[Any]],
+    *,
+    key: Optional[Callable[[Any], Any]] = None,
+    buffer: int = MAX_PER_PAGE,
+) -> Iterator[Any]:
+    """
+    Consumes iterators concurrently, each in its own thread, and yields their items
+    as they arrive. If a key is given, the iterators must be sorted by it and their
+    items are merged in that order.
+
+    Each iterator is read ahead by at most buffer items. Exceptions raised by any of
+    the iterators are raised by the merged iterator.
+    """
+    if not iterators:
+        return
+
+    stop = Event()
+    executor = ThreadPoolExecutor(max_workers=len(iterators))
+    try:
+        if key is None:
+            queue = Queue(maxsize=buffer)
+            for iterator in iterators:
+                executor.submit(_produce, iterator, queue, stop)
+            yield from _consume(queue, len(iterators))
+        else:
+            queues = [Queue(maxsize=buffer) for _ in iterators]
+            for iterator, queue in zip(iterators, queues):
+                executor.submit(_produce, iterator, queue, stop)
+            yield from heapq.merge(*(_consume(queue) for queue in queues), key=key)
+    finally:
+        stop.set()
+        executor.shutdown(wait=False)
@@ -0,0 +1,164 @@
+from allure import description, title, suite
+from json import dumps
+from typing import List, Optional
+from uuid import uuid4
+
+from mocket import Mocket
+from mocket.mockhttp import Entry
+from pytest import mark, raises
+
+from .pagination import PageSizer, merge, paginate
+
+
+def _pages(count: int, size: int = 2):
+    return [
+        {
+            "features": [{"id": f"{page}-{item}"} for item in range(size)],
+            "links": (
+                [{"rel": "next", "body": {"token": f"token-{page + 1}"}}]
+                if page + 1 < count
+                else []
+            ),
+        }
+        for page in range(count)
+    ]
+
+
+@suite("Pagination")
+class TestPagination:
+    @title("Follow page tokens")
+    @description("All items of all pages are returned in order")
+    @mark.parametrize("prefetch", (True, False))
+    def test_paginate(self, prefetch):
+        pages = _pages(3)
+        tokens: List[Optional[str]] = []
+
+        def fetch(per_page, token):
+            tokens.append(token)
+            return pages[int(token.split("-")[1]) if token else 0]
+
+        items = list(paginate(fetch, "features", adaptive=False, prefetch=prefetch))
+
+        assert [item["id"] for item in items] == [
+            "0-0",
+            "0-1",
+            "1-0",
+            "1-1",
+            "2-0",
+            "2-1",
+        ]
+        assert tokens == [None, "token-1", "token-2"]
+
+    @title("Follow empty pages")
+    @description("Pages emptied by local filters do not end the pagination")
+    def test_paginate_empty_page(self):
+        pages = _pages(3)
+        pages[0]["features"] = []
+        pages[2]["links"] = [{"rel": "next", "body": {"token": "token-2"}}]
+        tokens: List[Optional[str]] = []
+
+        def fetch(per_page, token):
+            tokens.append(token)
+            return pages[int(token.split("-")[1]) if token else 0]
+
+        items = list(paginate(fetch, "features", adaptive=False, prefetch=False))
+
+        assert [item["id"] for item in items] == ["1-0", "1-1", "2-0", "2-1"]
+        assert tokens == [None, "token-1", "token-2"]
+
+    @title("Lazy pagination")
+    @description("Pages are not fetched beyond the next page of consumed items")
+    def test_paginate_lazy(self):
+        pages = _pages(5)
+        tokens: List[Optional[str]] = []
+
+        def fetch(per_page, token):
+            tokens.append(token)
+            return pages[int(token.split("-")[1]) if token else 0]
+
+        iterator = paginate(fetch, "features", prefetch=False)
+        next(iterator)
+
+        assert tokens == [None]
+
+    @title("Adapt page size")
+    @description("Page sizes adapt to the observed latency within limits")
+    @mark.parametrize(
+        "requested, returned, latency, expected",
+        (
+            (25, 25, 0.1, 50),
+            (25, 10, 0.1, 25),
+            (25, 25, 0.7, 25),
+            (25, 25, 2.0, 12),
+            (80, 80, 0.1, 100),
+            (12, 12, 5.0, 10),
+        ),
+    )
+    def test_page_sizer(self, requested, returned, latency, expected):
+        sizer = PageSizer(requested, min_per_page=10, max_per_page=100)
+
+        sizer.update(requested, returned, latency)
+
+        assert sizer.per_page == expected
+
+    @title("Iterate tasking orders")
+    @description("Tasking orders are listed across pages of growing size")
+    def test_iter_orders(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        api_path = f"otm/v2/{contract_id}/tasking/orders/"
+        next_link = {"rel": "next", "href": f"http://example.com/{api_path}?token=t"}
+
+        Entry.single_register(
+            "GET",
+            client._gateway_url + f"{api_path}?per_page=2",
+            body=dumps({"features": [{"id": "a"}, {"id": "b"}], "links": [next_link]}),
+        )
+        Entry.single_register(
+            "GET",
+            client._gateway_url + f"{api_path}?per_page=4&token=t",
+            body=dumps({"features": [{"id": "c"}], "links": []}),
+        )
+
+        orders = client.otm_v2.iter_orders(contract_id=contract_id, per_page=2)
+
+        assert [order["id"] for order in orders] == ["a", "b", "c"]
+        Mocket.assert_fail_if_entries_not_served()
+
+    @title("Iterate webhooks")
+    @description("Webhooks are listed across pages")
+    def test_iter_webhooks(self, client, oauth_token_entry):
+        api_path = "id/v2/webhooks/"
+        next_link = {"rel": "next", "href": f"http://example.com/{api_path}?token=t"}
+
+        Entry.single_register(
+            "GET",
+            client._gateway_url + f"{api_path}?per_page=25",
+            body=dumps({"webhooks": [{"id": "a"}], "links": [next_link]}),
+        )
+        Entry.single_register(
+            "GET",
+            client._gateway_url + f"{api_path}?per_page=25&token=t",
+            body=dumps({"webhooks": [{"id": "b"}], "links": []}),
+        )
+
+        webhooks = client.id_v2.iter_webhooks(prefetch=False)
+
+        assert [webhook["id"] for webhook in webhooks] == ["a", "b"]
+
+    @title("Merge iterators")
+    @description("Sorted iterators are merged in order and their errors are raised")
+    def test_merge(self):
+        def failing():
+            yield 1
+            raise ValueError("failed")
+
+        assert list(merge([iter([1, 4, 5]), iter([2, 3, 6])], key=lambda x: x)) == [
+            1,
+            2,
+            3,
+            4,
+            5,
+            6,
+        ]
+        with raises(ValueError):
+            list(merge([iter([1, 2]), failing()]))
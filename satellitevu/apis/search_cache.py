@@ -0,0 +1,262 @@
+import json
+import sqlite3
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import closing
+from datetime import datetime, timezone
+from hashlib import sha256
+from pathlib import Path
+from time import monotonic, time
+from typing import Any, Dict, Optional, Sequence, Tuple, Union
+from uuid import UUID
+
+from appdirs import user_cache_dir
+
+from satellitevu.fork import Lock
+from satellitevu.http import codec
+from satellitevu.http.base import ResponseWrapper
+
+BBOX_DECIMALS = 6
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pages_accessed_at ON pages (accessed_at);
+"""
+
+
+def _utc(value: str) -> str:
+    if value in ("", ".."):
+        return value
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc).isoformat()
+
+
+def normalize_search(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Normalizes a catalog search payload so that equivalent searches are equal: bbox
+    coordinates are rounded, ids and collections sorted and datetimes converted to
+    UTC.
+    """
+    normalized = dict(payload)
+    if normalized.get("bbox"):
+        normalized["bbox"] = [
+            round(float(v), BBOX_DECIMALS) for v in normalized["bbox"]
+        ]
+    for key in ("ids", "collections"):
+        if normalized.get(key):
+            normalized[key] = sorted(normalized[key])
+    if normalized.get("datetime"):
+        normalized["datetime"] = "/".join(
+            _utc(v) for v in normalized["datetime"].split("/")
+        )
+    return normalized
+
+
+def search_key(contract_id: Union[UUID, str], payload: Dict[str, Any]) -> str:
+    """
+    Returns the cache key of a catalog search, a hash of the contract and the
+    normalized payload.
+    """
+    canonical = json.dumps(
+        [str(contract_id), normalize_search(payload)],
+        sort_keys=True,
+        separators=(",", ":"),
+    )
+    return sha256(canonical.encode()).hexdigest()
+
+
+class CachedResponse(ResponseWrapper):
+    """
+    Response of a catalog search served from a search cache.
+    """
+
+    raw: bytes
+
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self.status = 200
+        self.headers = {"Content-Type": "application/json"}
+
+    @property
+    def content(self) -> bytes:
+        return self.raw
+
+    @property
+    def text(self) -> str:
+        return self.raw.decode()
+
+    def json(self):
+        return codec.loads(self.raw)
+
+
+class AbstractSearchCache(ABC):
+    """
+    Abstract search result cache interface, storing response bodies by search key.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: bytes):
+        pass
+
+
+class MemorySearchCache(AbstractSearchCache):
+    """
+    In-memory search result cache storing zlib compressed pages, evicting least
+    recently used pages beyond max_bytes of compressed data.
+    """
+
+    max_bytes: Optional[int]
+    ttl: Optional[float]
+
+    def __init__(
+        self,
+        *,
+        max_bytes: Optional[int] = 16 * 1024 * 1024,
+        ttl: Optional[float] = 300.0,
+    ):
+        """
+        Args:
+            max_bytes: Maximum size of all compressed pages, or None for no limit.
+            Defaults to 16 MiB.
+
+            ttl: Time to live of pages in seconds, or None for no expiry. Defaults to
+            5 minutes.
+        """
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._pages: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+
+    def _pop(self, key: str):
+        _, body = self._pages.pop(key)
+        self._size -= len(body)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            try:
+                expires_at, body = self._pages[key]
+            except KeyError:
+                return None
+            if expires_at < monotonic():
+                self._pop(key)
+                return None
+            self._pages.move_to_end(key)
+        return zlib.decompress(body)
+
+    def set(self, key: str, value: bytes):
+        body = zlib.compress(value)
+        expires_at = monotonic() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if key in self._pages:
+                self._pop(key)
+            self._pages[key] = (expires_at, body)
+            self._size += len(body)
+            while self.max_bytes is not None and self._size > self.max_bytes:
+                self._pop(next(iter(self._pages)))
+
+
+class SQLiteSearchCache(AbstractSearchCache):
+    """
+    Search result cache storing zlib compressed pages in a SQLite database, evicting
+    least recently used pages beyond max_bytes of compressed data.
+    """
+
+    path: Path
+    ttl: float
+    max_bytes: Optional[int]
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        *,
+        ttl: float = 3600.0,
+        max_bytes: Optional[int] = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path: Optional path of the database file. Defaults to "search.sqlite" in
+            the user's cache dir.
+
+            ttl: Time to live of pages in seconds. Defaults to one hour.
+
+            max_bytes: Maximum size of all compressed pages, or None for no limit.
+            Defaults to 64 MiB.
+        """
+        self.path = Path(path or Path(user_cache_dir("SatelliteVu")) / "search.sqlite")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = Lock()
+        with closing(self._connect()) as conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> Optional[bytes]:
+        now = time()
+        with self._lock, closing(self._connect()) as conn, conn:
+            row = conn.execute(
+                "SELECT body FROM pages WHERE key = ? AND expires_at > ?", (key, now)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE pages SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+        return zlib.decompress(row[0]) if row else None
+
+    def set(self, key: str, value: bytes):
+        now = time()
+        body = zlib.compress(value)
+        with self._lock, closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM pages WHERE expires_at <= ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO pages VALUES (?, ?, ?, ?, ?)",
+                (key, body, len(body), now + self.ttl, now),
+            )
+            if self.max_bytes is not None:
+                conn.execute(
+                    "DELETE FROM pages WHERE key IN (SELECT key FROM (SELECT key, "
+                    "SUM(size) OVER (ORDER BY accessed_at DESC, key) AS total "
+                    "FROM pages) WHERE total > ?)",
+                    (self.max_bytes,),
+                )
+
+
+class TieredSearchCache(AbstractSearchCache):
+    """
+    Search result cache combining several caches, e.g. a MemorySearchCache in front
+    of a SQLiteSearchCache. Pages found in a later tier are copied to earlier tiers.
+    """
+
+    tiers: Sequence[AbstractSearchCache]
+
+    def __init__(self, *tiers: AbstractSearchCache):
+        self.tiers = tiers
+
+    def get(self, key: str) -> Optional[bytes]:
+        for i, tier in enumerate(self.tiers):
+            value = tier.get(key)
+            if value is not None:
+                for earlier in self.tiers[:i]:
+                    earlier.set(key, value)
+                return value
+        return None
+
+    def set(self, key: str, value: bytes):
+        for tier in self.tiers:
+            tier.set(key, value)
@@ -0,0 +1,104 @@
+from allure import description, title, suite
+from json import dumps
+from unittest.mock import patch
+from uuid import uuid4
+
+from mocket import Mocket
+from mocket.mockhttp import Entry
+
+from .search_cache import (
+    CachedResponse,
+    MemorySearchCache,
+    SQLiteSearchCache,
+    TieredSearchCache,
+    search_key,
+)
+
+
+@suite("Search Cache")
+class TestSearchCache:
+    @title("Normalized search keys")
+    @description("Equivalent searches have the same key")
+    def test_search_key(self):
+        key = search_key(
+            "contract",
+            {
+                "bbox": [0.1234567, 1, 2, 3],
+                "collections": ["b", "a"],
+                "datetime": "2024-01-01T01:00:00+01:00/2024-01-02T00:00:00Z",
+            },
+        )
+
+        assert key == search_key(
+            "contract",
+            {
+                "datetime": "2024-01-01T00:00:00/2024-01-02T00:00:00+00:00",
+                "collections": ["a", "b"],
+                "bbox": [0.1234569, 1.0, 2.0, 3.0],
+            },
+        )
+        assert key != search_key("other", {"bbox": [0.1234567, 1, 2, 3]})
+
+    @title("SQLite search cache")
+    @description("Pages are stored compressed, expire and are evicted beyond size")
+    def test_sqlite(self, tmp_path):
+        cache = SQLiteSearchCache(str(tmp_path / "search.sqlite"), ttl=10, max_bytes=60)
+        page = dumps({"features": [{"id": "a"}] * 100}).encode()
+
+        with patch("satellitevu.apis.search_cache.time", return_value=100.0):
+            cache.set("a", page)
+        with patch("satellitevu.apis.search_cache.time", return_value=101.0):
+            cache.set("b", page)
+            assert cache.get("a") is None
+            assert cache.get("b") == page
+        with patch("satellitevu.apis.search_cache.time", return_value=112.0):
+            assert cache.get("b") is None
+
+    @title("Memory search cache")
+    @description("Pages are stored compressed, expire and are evicted beyond size")
+    def test_memory(self):
+        cache = MemorySearchCache(ttl=10, max_bytes=60)
+        page = dumps({"features": [{"id": "a"}] * 100}).encode()
+
+        with patch("satellitevu.apis.search_cache.monotonic", return_value=100.0):
+            cache.set("a", page)
+            cache.set("b", page)
+            assert cache.get("a") is None
+            assert cache.get("b") == page
+            assert cache._size < len(page)
+            cache.set("c", b"x" * 1000)
+            assert cache.get("b") is None
+        with patch("satellitevu.apis.search_cache.monotonic", return_value=111.0):
+            assert cache.get("c") is None
+            assert cache._size == 0
+
+    @title("Tiered search cache")
+    @description("Pages found in a later tier are copied to earlier tiers")
+    def test_tiered(self, tmp_path):
+        memory = MemorySearchCache()
+        disk = SQLiteSearchCache(str(tmp_path / "search.sqlite"))
+        disk.set("a", b"{}")
+
+        assert TieredSearchCache(memory, disk).get("a") == b"{}"
+        assert memory.get("a") == b"{}"
+
+    @title("Cached catalog search")
+    @description("Repeated catalog searches are answered from the cache")
+    def test_catalog_search(self, client, oauth_token_entry):
+        contract_id = str(uuid4())
+        client.catalog_v1.search_cache = MemorySearchCache()
+
+        Entry.single_register(
+            "POST",
+            client._gateway_url + f"catalog/v1/{contract_id}/search",
+            body=dumps({"features": [{"id": "a"}]}),
+        )
+
+        client.catalog_v1.search(contract_id=contract_id, collections=["a", "b"])
+        response = client.catalog_v1.search(
+            contract_id=contract_id, collections=["b", "a"]
+        )
+
+        assert isinstance(response, CachedResponse)
+        assert response.json() == {"features": [{"id": "a"}]}
+        assert len(Mocket.request_list()) == 2
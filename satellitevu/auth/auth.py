@@ -1,13 +1,17 @@
 from base64 import b64decode
-from datetime import datetime
+from functools import lru_cache
 from hashlib import sha1
 from json import loads
 from logging import getLogger
 from typing import Optional, List
+from time import time
 from urllib.parse import urljoin
 
+from satellitevu import telemetry
+from satellitevu.fork import Lock
 from satellitevu.config import AUDIENCE, AUTH_URL
-from satellitevu.http import AbstractClient, UrllibClient
+from satellitevu.http import AbstractClient
+from satellitevu.http.timing import current_timing
 
 from .cache import AbstractCache, AppDirCache
 from .exc import AuthError
@@ -15,14 +19,24 @@ from .exc import AuthError
 logger = getLogger(__file__)
 
 
-def is_expired_token(token: str) -> bool:
+@lru_cache(maxsize=64)
+def token_expiry(token: str) -> Optional[float]:
+    """
+    Returns the expiry timestamp of a token, or None if it does not expire. Parsed
+    expiries are cached since tokens are checked on every request.
+    """
     json = b64decode(token.split(".")[1] + "==")
     claims = loads(json)
     if not claims or "exp" not in claims:
+        return None
+    return float(claims["exp"])
+
+
+def is_expired_token(token: str) -> bool:
+    exp = token_expiry(token)
+    if exp is None:
         return False
-    exp = float(claims["exp"])
-    exp_dt = datetime.fromtimestamp(exp)
-    return exp_dt <= datetime.now()
+    return exp <= time()
 
 
 class Auth:
@@ -33,7 +47,7 @@ class Auth:
     cache: AbstractCache
 
     auth_url: str
-    client: AbstractClient
+    _client: Optional[AbstractClient]
 
     def __init__(
         self,
@@ -51,38 +65,71 @@ class Auth:
 
         self.cache = cache or AppDirCache()
         self.auth_url = auth_url or AUTH_URL
-        self.client = client or UrllibClient()
+        self._client = client
+        self._refresh_lock = Lock()
+
+    @property
+    def client(self) -> AbstractClient:
+        """
+        HTTP client used for token requests, a UrllibClient unless given.
+        """
+        if self._client is None:
+            from satellitevu.http import UrllibClient
+
+            self._client = UrllibClient()
+        return self._client
+
+    @client.setter
+    def client(self, client: AbstractClient):
+        self._client = client
 
     def token(self, scopes: Optional[List] = None) -> str:
         if not scopes:
             scopes = []
-        cache_key = sha1(self.client_id.encode("utf-8"))  # nosec B324
-        cache_key.update("".join(scopes).encode("utf-8"))
+        cache_key = self._cache_key(self.client_id, "".join(scopes))
+
+        token = self.cache.load(cache_key)
 
-        token = self.cache.load(cache_key.hexdigest())
+        cache_hit = bool(token) and not is_expired_token(token)
+        if not cache_hit:
+            # Only one thread requests a new token, the others wait for and reuse it
+            with self._refresh_lock:
+                token = self.cache.load(cache_key)
+                if not token or is_expired_token(token):
+                    token = self._auth(scopes)
+                    self.cache.save(cache_key, token)
 
-        if not token or is_expired_token(token):
-            token = self._auth(scopes)
-            self.cache.save(cache_key.hexdigest(), token)
+        timing = current_timing.get()
+        if timing is not None:
+            timing.token_cache_hit = cache_hit
 
         return token
 
+    @staticmethod
+    @lru_cache(maxsize=64)
+    def _cache_key(client_id: str, scopes: str) -> str:
+        cache_key = sha1(client_id.encode("utf-8"))  # nosec B324
+        cache_key.update(scopes.encode("utf-8"))
+        return cache_key.hexdigest()
+
     def _auth(self, scopes: Optional[List] = None) -> str:
         if not scopes:
             scopes = []
         logger.info("Performing client_credential authentication")
         token_url = urljoin(self.auth_url, "oauth/token")
-        response = self.client.post(
-            token_url,
-            headers={"content-type": "application/x-www-form-urlencoded"},
-            data={
-                "grant_type": "client_credentials",
-                "client_id": self.client_id,
-                "client_secret": self.client_secret,
-                "audience": self.audience,
-                "scope": " ".join(scopes),
-            },
-        )
+        telemetry.token_refresh()
+        with telemetry.span("satellitevu.auth.token", **{"url.full": token_url}):
+            response = self.client.post(
+                token_url,
+                headers={"content-type": "application/x-www-form-urlencoded"},
+                data={
+                    "grant_type": "client_credentials",
+                    "client_id": self.client_id,
+                    "client_secret": self.client_secret,
+                    "audience": self.audience,
+                    "scope": " ".join(scopes),
+                },
+            )
 
         if response.status != 200:
             raise AuthError(
@@ -4,9 +4,9 @@ from configparser import ConfigParser, DuplicateSectionError
 from os import replace
 from pathlib import Path
 from tempfile import NamedTemporaryFile
-from typing import Optional
+from typing import Dict, Optional
 
-from appdirs import user_cache_dir
+from satellitevu.fork import Lock
 
 
 class AbstractCache(ABC):
@@ -24,7 +24,15 @@ class AbstractCache(ABC):
 
 
 class MemoryCache(AbstractCache):
-    _items = {}
+    """
+    In-memory token cache of one process. Each instance has its own tokens.
+    """
+
+    _items: Dict[str, str]
+
+    def __init__(self):
+        # Single dict operations are atomic, with and without the GIL
+        self._items = {}
 
     def save(self, client_id: str, value: str):
         self._items[client_id] = value
@@ -42,25 +50,35 @@ class AppDirCache(AbstractCache):
     cache_file: Path
 
     def __init__(self, cache_dir: Optional[str] = None):
-        self.cache_dir = Path(cache_dir if cache_dir else user_cache_dir("SatelliteVu"))
+        if not cache_dir:
+            from appdirs import user_cache_dir
+
+            cache_dir = user_cache_dir("SatelliteVu")
+        self.cache_dir = Path(cache_dir)
         self.cache_file = self.cache_dir / "tokencache"
+        self._lock = Lock()
 
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
 
     def save(self, client_id: str, value: str):
-        parser = ConfigParser()
-        parser.read(self.cache_file)
+        # Serializes read-modify-write cycles of threads sharing this instance, the
+        # atomic replace keeps readers from seeing partially written files
+        with self._lock:
+            parser = ConfigParser()
+            parser.read(self.cache_file)
 
-        try:
-            parser.add_section(client_id)
-        except DuplicateSectionError:
-            pass
-        parser[client_id]["access_token"] = value
-
-        with NamedTemporaryFile("w", dir=str(self.cache_dir), delete=False) as handle:
-            parser.write(handle)
-        replace(handle.name, self.cache_file)
+            try:
+                parser.add_section(client_id)
+            except DuplicateSectionError:
+                pass
+            parser[client_id]["access_token"] = value
+
+            with NamedTemporaryFile(
+                "w", dir=str(self.cache_dir), delete=False
+            ) as handle:
+                parser.write(handle)
+            replace(handle.name, self.cache_file)
 
     def load(self, client_id: str) -> Optional[str]:
         try:
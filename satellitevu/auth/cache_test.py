@@ -86,3 +86,10 @@ class TestCache:
         cache.save("test-client", "bar")
 
         assert cache.load("test-client") == "bar"
+
+    @title("Memory cache instances")
+    def test_memory_cache_instances(self):
+        cache = MemoryCache()
+        cache.save("test-client", "bar")
+
+        assert MemoryCache().load("test-client") is None
@@ -1,27 +1,68 @@
-from typing import Dict, Optional, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, Generic, Optional, TypeVar, Union
 from warnings import warn
 
-from satellitevu.apis.id import IdV2
-from satellitevu.apis.catalog import CatalogV1
-from satellitevu.apis.contracts import ContractsV1
-from satellitevu.apis.orders import OrdersV2
-from satellitevu.apis.otm import OtmV2
 from satellitevu.auth import AbstractCache, Auth
 from satellitevu.config import GATEWAY
-from satellitevu.http import AbstractClient, UrllibClient
+from satellitevu.fork import Lock, RLock
+from satellitevu.http import AbstractClient
+from satellitevu.http.timing import Timings
+
+if TYPE_CHECKING:
+    from os import PathLike
+    from uuid import UUID
+
+    from satellitevu.apis.catalog import CatalogV1
+    from satellitevu.apis.contracts import ContractsV1
+    from satellitevu.apis.id import IdV2
+    from satellitevu.apis.orders import OrdersV2
+    from satellitevu.apis.otm import OtmV2
+    from satellitevu.store import ImageryStore
+    from satellitevu.sync import SyncResult
+
+
+T = TypeVar("T")
+
+
+class cached_property(Generic[T]):
+    """
+    Property computed on first access and then stored on the instance, like
+    functools.cached_property, but computed once even if multiple threads access it
+    at the same time. Computation holds the instance's reentrant _lock, later
+    accesses read the stored value without locking.
+    """
+
+    def __init__(self, func: Callable[[Any], T]):
+        self.func = func
+        self.name = func.__name__
+        self.__doc__ = func.__doc__
+
+    def __set_name__(self, owner: type, name: str):
+        self.name = name
+
+    def __get__(self, instance: Any, owner: Optional[type] = None) -> T:
+        if instance is None:
+            return self
+        with instance._lock:
+            try:
+                return instance.__dict__[self.name]
+            except KeyError:
+                value = instance.__dict__[self.name] = self.func(instance)
+                return value
 
 
 class FutureApis:
-    _called: Dict[str, bool] = {}
+    _called: Dict[str, bool]
 
     def __init__(self, client: AbstractClient, gateway_url: str):
-        pass
+        self._called = {}
+        self._called_lock = Lock()
 
     def __getattribute__(self, __name: str):
         attr = super().__getattribute__(__name)
-        if __name != "_called":
-            has_been_called = self._called.get(__name, False)
-            self._called[__name] = True
+        if __name not in ("_called", "_called_lock"):
+            with self._called_lock:
+                has_been_called = self._called.get(__name, False)
+                self._called[__name] = True
             if not has_been_called:
                 warn(
                     f"{__name} is a not yet a stable API. Use at own risk",
@@ -31,19 +72,13 @@ class FutureApis:
 
 
 class Client:
-    _client: AbstractClient
-    _gateway_url: str
-
-    auth: Auth
-
-    contracts_v1: ContractsV1
+    """
+    Client for SatelliteVu's platform APIs. The HTTP client, auth and API objects
+    are created, and their modules imported, on first access, so that e.g. a single
+    catalog search only pays for the catalog API.
+    """
 
-    catalog_v1: CatalogV1
-    id_v2: IdV2
-    orders_v2: OrdersV2
-    otm_v2: OtmV2
-
-    future: FutureApis
+    _gateway_url: str
 
     def __init__(
         self,
@@ -55,47 +90,149 @@ class Client:
         auth_url: Optional[str] = None,
         http_client: Optional[AbstractClient] = None,
         gateway_url: Optional[str] = None,
+        contracts_cache_ttl: Optional[float] = None,
+        timings: Optional[Timings] = None,
     ):
         self._gateway_url = gateway_url or GATEWAY
-        self._client = http_client or self._setup_client()
-
-        self.auth = Auth(
-            client_id=client_id,
-            client_secret=client_secret,
-            audience=audience,
-            cache=cache,
-            auth_url=auth_url,
+        self._http_client = http_client
+        self._timings = timings
+        self._auth_kwargs: Dict[str, Any] = {
+            "client_id": client_id,
+            "client_secret": client_secret,
+            "audience": audience,
+            "cache": cache,
+            "auth_url": auth_url,
+        }
+        self._contracts_cache_ttl = contracts_cache_ttl
+        self._lock = RLock()
+
+    @cached_property
+    def _client(self) -> AbstractClient:
+        client = self._http_client or self._setup_client()
+        if self._timings is not None:
+            client.timings = self._timings
+        client.set_auth(self._gateway_url, Auth(client=client, **self._auth_kwargs))
+        return client
+
+    @cached_property
+    def auth(self) -> Auth:
+        return self._client.get_auth(self._gateway_url)
+
+    @cached_property
+    def contracts_v1(self) -> "ContractsV1":
+        from satellitevu.apis.contracts import ContractsV1
+
+        return ContractsV1(
             client=self._client,
+            base_url=self._gateway_url,
+            auth=self.auth,
+            cache_ttl=self._contracts_cache_ttl,
         )
-        self._client.set_auth(self._gateway_url, self.auth)
 
-        self.contracts_v1 = ContractsV1(
-            client=self._client, base_url=self._gateway_url, auth=self.auth
-        )
+    @cached_property
+    def catalog_v1(self) -> "CatalogV1":
+        from satellitevu.apis.catalog import CatalogV1
+
+        return CatalogV1(self._client, self._gateway_url, contracts=self.contracts_v1)
+
+    @cached_property
+    def id_v2(self) -> "IdV2":
+        from satellitevu.apis.id import IdV2
+
+        return IdV2(self._client, self._gateway_url)
+
+    @cached_property
+    def orders_v2(self) -> "OrdersV2":
+        from satellitevu.apis.orders import OrdersV2
 
-        self.catalog_v1 = CatalogV1(self._client, self._gateway_url)
-        self.id_v2 = IdV2(self._client, self._gateway_url)
-        self.orders_v2 = OrdersV2(self._client, self._gateway_url)
-        self.otm_v2 = OtmV2(self._client, self._gateway_url)
+        orders = OrdersV2(self._client, self._gateway_url)
+        if self._contracts_cache_ttl:
+            # Orders are validated locally against the cached pricebook
+            orders.contracts = self.contracts_v1
+            orders.catalog = self.catalog_v1
+        return orders
 
-        self.future = FutureApis(self._client, self._gateway_url)
+    @cached_property
+    def otm_v2(self) -> "OtmV2":
+        from satellitevu.apis.otm import OtmV2
+
+        otm = OtmV2(self._client, self._gateway_url)
+        if self._contracts_cache_ttl:
+            otm.contracts = self.contracts_v1
+        return otm
+
+    @cached_property
+    def future(self) -> FutureApis:
+        return FutureApis(self._client, self._gateway_url)
+
+    def sync_orders(
+        self,
+        contract_id: Union["UUID", str],
+        destdir: str,
+        *,
+        max_workers: int = 4,
+        retry_factor: float = 1.0,
+        store: Optional["ImageryStore"] = None,
+    ) -> "SyncResult":
+        """
+        Mirrors all delivered orders of a contract into a local directory, see
+        satellitevu.sync.sync_orders.
+        """
+        from satellitevu.sync import sync_orders
+
+        return sync_orders(
+            self,
+            contract_id,
+            destdir,
+            max_workers=max_workers,
+            retry_factor=retry_factor,
+            store=store,
+        )
+
+    def save_state(
+        self,
+        path: Union[str, "PathLike"],
+        *,
+        ttl: float = 900.0,
+        key: Optional[bytes] = None,
+    ):
+        """
+        Writes the client's warm state, its access tokens and cached contracts and
+        pricebooks, to a signed file expiring after ttl seconds, see
+        satellitevu.state.
+        """
+        from satellitevu.state import save
+
+        save(self, path, ttl=ttl, key=key)
+
+    def load_state(
+        self, path: Union[str, "PathLike"], *, key: Optional[bytes] = None
+    ) -> bool:
+        """
+        Restores the client's warm state from a file written by save_state. Returns
+        False if the file is missing, expired, fails its integrity check or belongs
+        to a different client.
+        """
+        from satellitevu.state import load
+
+        return load(self, path, key=key)
 
     def _setup_client(self) -> AbstractClient:
         client = self._setup_requests_session()
         if client is None:
+            from satellitevu.http import UrllibClient
+
             client = UrllibClient()
         return client
 
     def _setup_requests_session(self) -> Union[AbstractClient, None]:
         try:
-            from requests import Session
-
             from satellitevu.http.requests import RequestsSession
         except ImportError:
             return
 
         # TODO: Retries
         # TODO: Timeout
-        session = Session()
-        client = RequestsSession(instance=session)
+        # Without a session instance each thread gets its own session
+        client = RequestsSession()
         return client
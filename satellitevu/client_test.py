@@ -0,0 +1,57 @@
+import subprocess
+import sys
+
+from allure import description, suite, title
+from pytest import mark
+
+
+def imported_modules(statement: str) -> set:
+    # Runs in a fresh interpreter, since the test session already imported the SDK
+    process = subprocess.run(
+        [sys.executable, "-c", f"{statement}; import sys; print(*sys.modules)"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(process.stdout.split())
+
+
+@suite("Client")
+class TestClient:
+    @title("Lazy imports")
+    @description("Modules are only imported once the APIs using them are accessed")
+    @mark.parametrize(
+        "statement, imported, not_imported",
+        (
+            (
+                "import satellitevu",
+                set(),
+                {"satellitevu.client", "satellitevu.auth", "appdirs"},
+            ),
+            (
+                "from satellitevu import Client; Client('id', 'secret')",
+                {"satellitevu.client"},
+                {"satellitevu.apis.catalog", "satellitevu.http.urllib", "requests"},
+            ),
+            (
+                "from satellitevu import Client; Client('id', 'secret').otm_v2",
+                {"satellitevu.apis.otm"},
+                {"satellitevu.apis.catalog", "satellitevu.apis.orders"},
+            ),
+        ),
+    )
+    def test_lazy_imports(self, statement, imported, not_imported):
+        modules = imported_modules(statement)
+
+        assert imported <= modules
+        assert not (not_imported & modules)
+
+    @title("Lazy API objects")
+    def test_lazy_apis(self, client):
+        assert "otm_v2" not in vars(client)
+
+        otm_v2 = client.otm_v2
+
+        assert client.otm_v2 is otm_v2
+        assert otm_v2.client is client._client
+        assert client._client.get_auth(client._gateway_url) is client.auth
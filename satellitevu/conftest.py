@@ -684,8 +684,19 @@ def search_response(otm_request_parameters):
     }
 
 
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "no_mocketize: run without the autouse Mocketizer, for tests entering their "
+        "own, since nested Mocketizers leave sockets patched with newer mocket releases",
+    )
+
+
 @fixture(autouse=True)
-def mocketize_fixture():
+def mocketize_fixture(request):
+    if request.node.get_closest_marker("no_mocketize"):
+        yield
+        return
     with Mocketizer():
         yield
 
@@ -0,0 +1,82 @@
+"""
+Fork safety of SDK objects, for clients created before os.fork, e.g. by servers
+preloading their application or by multiprocessing with the fork start method.
+
+A forked child inherits the parent's connection pools, whose sockets then serve two
+processes, and its locks, which stay held forever if another thread of the parent
+held them. Locks created with Lock and RLock are therefore reinitialised in the
+child, and objects registered with register have their _after_fork method called to
+drop inherited connections. Caches are kept, so the child reuses valid tokens.
+SQLite connections are replaced with reconnect_sqlite, since SQLite does not support
+using a connection in both processes.
+"""
+
+import os
+from threading import Lock as _Lock
+from threading import RLock as _RLock
+from typing import TYPE_CHECKING, Any, List, TypeVar
+from weakref import WeakSet
+
+if TYPE_CHECKING:
+    import sqlite3
+
+T = TypeVar("T")
+
+_locks: "WeakSet[Any]" = WeakSet()
+_objects: "WeakSet[Any]" = WeakSet()
+_inherited: List[Any] = []
+
+
+def Lock():
+    """
+    Returns a threading.Lock that is released in forked children.
+    """
+    lock = _Lock()
+    _locks.add(lock)
+    return lock
+
+
+def RLock():
+    """
+    Returns a threading.RLock that is released in forked children.
+    """
+    lock = _RLock()
+    _locks.add(lock)
+    return lock
+
+
+def register(obj: T) -> T:
+    """
+    Registers obj to have its _after_fork method called in forked children, as long
+    as obj is alive.
+    """
+    _objects.add(obj)
+    return obj
+
+
+def reconnect_sqlite(
+    conn: "sqlite3.Connection", path: str, **kwargs
+) -> "sqlite3.Connection":
+    """
+    Returns a new connection to the database at path for a forked child, replacing
+    conn inherited from the parent. In-memory databases are copied from conn. conn
+    is left open, as closing it could change files the parent is still using.
+    """
+    import sqlite3
+
+    new = sqlite3.connect(path, **kwargs)
+    if path == ":memory:":
+        conn.backup(new)
+    _inherited.append(conn)
+    return new
+
+
+def _after_fork_in_child():
+    for lock in list(_locks):
+        lock._at_fork_reinit()
+    for obj in list(_objects):
+        obj._after_fork()
+
+
+if hasattr(os, "register_at_fork"):  # Not on Windows, which cannot fork
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -0,0 +1,127 @@
+import os
+from unittest.mock import Mock
+
+from allure import description, suite, title
+from pytest import fixture, mark
+
+from satellitevu import fork
+from satellitevu.auth.cache import MemoryCache
+from satellitevu.http.requests import RequestsSession
+from satellitevu.ledger import CreditLedger
+from satellitevu.otm_store import OtmStore
+from satellitevu.testing.gateway import FakeGateway
+
+
+@fixture(autouse=True)
+def mocketize_fixture():
+    # The gateway is served over real sockets
+    yield
+
+
+def in_child(check) -> int:
+    """
+    Returns the exit status of a forked child running check, 0 if it returned True.
+    """
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os._exit(0 if check() else 1)
+        except BaseException:
+            os._exit(2)
+    return os.waitstatus_to_exitcode(os.waitpid(pid, 0)[1])
+
+
+@mark.skipif(not hasattr(os, "fork"), reason="Requires os.fork")
+@suite("Fork Safety")
+class TestFork:
+    @title("Locks after fork")
+    @description("Locks held when forking are released in the child")
+    def test_locks(self):
+        lock = fork.Lock()
+        rlock = fork.RLock()
+        with lock, rlock:
+            status = in_child(
+                lambda: lock.acquire(blocking=False) and rlock.acquire(blocking=False)
+            )
+
+        assert status == 0
+
+    @title("Client after fork")
+    @description("Children make requests on new connections with the parent's token")
+    def test_client(self):
+        with FakeGateway(seed=4, items=5) as gateway:
+            client = gateway.client(cache=MemoryCache(), http_client=RequestsSession())
+            client.id_v2.get_credit_balance(gateway.contract_id)
+            session = client._client.session
+            token = client.auth.token()
+            requests = gateway.requests
+
+            def check():
+                balance = client.id_v2.get_credit_balance(gateway.contract_id)
+                return (
+                    client._client.session is not session
+                    and client.auth.token() == token
+                    and balance["balance"] == gateway.balance
+                )
+
+            status = in_child(check)
+            # The gateway runs in the parent, where it counts the child's requests
+            child_requests = gateway.requests - requests
+
+        assert status == 0
+        assert child_requests == 1
+        assert client._client.session is session
+
+    @title("Ledger after fork")
+    @description("Children debit ledgers on their own connections")
+    @mark.parametrize("shared", (False, True))
+    def test_ledger(self, tmp_path, shared):
+        id_api = Mock()
+        id_api.get_credit_balance.return_value = {"currency": "GBP", "balance": 1000}
+        ledger = CreditLedger(
+            id_api, str(tmp_path / "ledger.db") if shared else ":memory:"
+        )
+        ledger.balance("contract")
+        conn = ledger._conn
+
+        def check():
+            return (
+                ledger._conn is not conn
+                and ledger.debit("contract", 100).balance == 900
+            )
+
+        # Locked by another thread of the parent while forking
+        with ledger._lock:
+            status = in_child(check)
+
+        assert status == 0
+        # Only ledgers in database files are shared with children
+        assert ledger.balance("contract").balance == (900 if shared else 1000)
+        ledger.close()
+
+    @title("OTM store after fork")
+    @description("Children read a copy of in-memory stores on their own connection")
+    def test_otm_store(self):
+        store = OtmStore()
+        store.upsert(
+            [
+                {
+                    "id": "order",
+                    "contract_id": "contract",
+                    "geometry": {"type": "Point", "coordinates": [10.0, 50.0]},
+                    "properties": {"status": "pending"},
+                }
+            ]
+        )
+        conn = store._conn
+
+        def check():
+            return store._conn is not conn and [
+                item["id"] for item in store.covering((10.0, 50.0))
+            ] == ["order"]
+
+        with store._lock:
+            status = in_child(check)
+
+        assert status == 0
+        store.close()
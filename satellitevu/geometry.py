@@ -0,0 +1,527 @@
+from dataclasses import dataclass
+from math import ceil, floor
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+BBox = Tuple[float, float, float, float]
+Geometry = Dict[str, Any]
+
+
+def iter_positions(geometry: Geometry) -> Iterator[Sequence[float]]:
+    """
+    Iterates over all positions of a GeoJSON geometry.
+    """
+    if geometry["type"] == "GeometryCollection":
+        for member in geometry["geometries"]:
+            yield from iter_positions(member)
+        return
+
+    def walk(coordinates):
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            yield coordinates
+        else:
+            for member in coordinates:
+                yield from walk(member)
+
+    yield from walk(geometry["coordinates"])
+
+
+def bbox(geometry: Geometry) -> BBox:
+    """
+    Returns the bounding box (min longitude, min latitude, max longitude, max
+    latitude) of a GeoJSON geometry.
+    """
+    xs, ys = [], []
+    for position in iter_positions(geometry):
+        xs.append(position[0])
+        ys.append(position[1])
+    return min(xs), min(ys), max(xs), max(ys)
+
+
+def _polygons(geometry: Geometry) -> List[List[Sequence[Sequence[float]]]]:
+    if geometry["type"] == "Polygon":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiPolygon":
+        return geometry["coordinates"]
+    if geometry["type"] == "GeometryCollection":
+        return [p for member in geometry["geometries"] for p in _polygons(member)]
+    return []
+
+
+def _ring_contains(ring: Sequence[Sequence[float]], x: float, y: float) -> bool:
+    inside = False
+    for (x1, y1), (x2, y2) in zip(
+        (p[:2] for p in ring), (p[:2] for p in [*ring[1:], ring[0]])
+    ):
+        if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+            inside = not inside
+    return inside
+
+
+def _segment_distance(x: float, y: float, a: Sequence[float], b: Sequence[float]):
+    (x1, y1), (x2, y2) = a[:2], b[:2]
+    dx, dy = x2 - x1, y2 - y1
+    if dx == dy == 0:
+        t = 0.0
+    else:
+        t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    return ((x - x1 - t * dx) ** 2 + (y - y1 - t * dy) ** 2) ** 0.5
+
+
+def _lines(geometry: Geometry) -> List[Sequence[Sequence[float]]]:
+    if geometry["type"] == "LineString":
+        return [geometry["coordinates"]]
+    if geometry["type"] == "MultiLineString":
+        return geometry["coordinates"]
+    if geometry["type"] == "GeometryCollection":
+        return [line for member in geometry["geometries"] for line in _lines(member)]
+    return []
+
+
+def contains_point(
+    geometry: Geometry, x: float, y: float, tolerance: float = 0.0
+) -> bool:
+    """
+    Whether a GeoJSON geometry covers the given point. Points and lines cover points
+    within the given tolerance (in degrees), polygons cover points in their interior.
+    """
+    for polygon in _polygons(geometry):
+        exterior, holes = polygon[0], polygon[1:]
+        if _ring_contains(exterior, x, y) and not any(
+            _ring_contains(hole, x, y) for hole in holes
+        ):
+            return True
+
+    for line in _lines(geometry):
+        if len(line) == 1 and _segment_distance(x, y, line[0], line[0]) <= tolerance:
+            return True
+        if any(
+            _segment_distance(x, y, a, b) <= tolerance for a, b in zip(line, line[1:])
+        ):
+            return True
+
+    if geometry["type"] in ("Point", "MultiPoint"):
+        return any(
+            _segment_distance(x, y, p, p) <= tolerance for p in iter_positions(geometry)
+        )
+
+    return False
+
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(x: float, y: float, precision: int = 9) -> str:
+    """
+    Encodes a point as geohash of the given length. A precision of 9 quantizes points
+    into cells of about 5 by 5 metres.
+    """
+    lon, lat = [-180.0, 180.0], [-90.0, 90.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lon, x) if even else (lat, y)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def bbox_polygon(box: BBox) -> Geometry:
+    """
+    Returns a GeoJSON polygon of a bounding box.
+    """
+    minx, miny, maxx, maxy = box
+    return {
+        "type": "Polygon",
+        "coordinates": [
+            [[minx, miny], [maxx, miny], [maxx, maxy], [minx, maxy], [minx, miny]]
+        ],
+    }
+
+
+def bbox_intersects(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+
+def _segments(geometry: Geometry) -> Iterator[Tuple[Sequence[float], ...]]:
+    rings = [ring for polygon in _polygons(geometry) for ring in polygon]
+    for line in [*rings, *_lines(geometry)]:
+        yield from zip(line, line[1:])
+    for ring in rings:
+        if ring and ring[0] != ring[-1]:
+            yield ring[-1], ring[0]
+    if geometry["type"] in ("Point", "MultiPoint"):
+        for position in iter_positions(geometry):
+            yield position, position
+
+
+def _orientation(a: Sequence[float], b: Sequence[float], c: Sequence[float]) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+
+def _segments_intersect(a, b, c, d) -> bool:
+    if _orientation(a, b, c) * _orientation(a, b, d) < 0 and (
+        _orientation(c, d, a) * _orientation(c, d, b) < 0
+    ):
+        return True
+    return any(
+        _segment_distance(p[0], p[1], q, r) == 0
+        for p, q, r in ((c, a, b), (d, a, b), (a, c, d), (b, c, d))
+    )
+
+
+def intersects(a: Geometry, b: Geometry) -> bool:
+    """
+    Whether two GeoJSON geometries intersect, i.e. share at least one point.
+    """
+    if not bbox_intersects(bbox(a), bbox(b)):
+        return False
+    if any(contains_point(b, p[0], p[1]) for p in iter_positions(a)):
+        return True
+    if any(contains_point(a, p[0], p[1]) for p in iter_positions(b)):
+        return True
+    b_segments = list(_segments(b))
+    return any(
+        _segments_intersect(p, q, r, s) for p, q in _segments(a) for r, s in b_segments
+    )
+
+
+class GridIndex:
+    """
+    Spatial index of bounding boxes on a regular grid of cells of the given size in
+    degrees, returning the keys of all boxes sharing a cell with a queried box.
+    """
+
+    cell_size: float
+
+    def __init__(self, cell_size: float):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[Any]] = {}
+        self._boxes: Dict[Any, Tuple[int, BBox]] = {}
+
+    def _cell_range(self, box: BBox) -> Iterator[Tuple[int, int]]:
+        minx, miny, maxx, maxy = (int(floor(v / self.cell_size)) for v in box)
+        for i in range(minx, maxx + 1):
+            for j in range(miny, maxy + 1):
+                yield i, j
+
+    def insert(self, key: Any, box: BBox):
+        self._boxes[key] = (len(self._boxes), box)
+        for cell in self._cell_range(box):
+            self._cells.setdefault(cell, []).append(key)
+
+    def query(self, box: BBox) -> List[Any]:
+        """
+        Returns the keys of all inserted boxes intersecting the given box, in
+        insertion order.
+        """
+        keys = {
+            key
+            for cell in self._cell_range(box)
+            for key in self._cells.get(cell, ())
+            if bbox_intersects(self._boxes[key][1], box)
+        }
+        return sorted(keys, key=lambda key: self._boxes[key][0])
+
+
+class PreparedGeometry:
+    """
+    GeoJSON geometry prepared for repeated intersection tests against small
+    geometries, e.g. a large area of interest against search results.
+
+    Segments are indexed on a grid and polygon edges by horizontal band of the same
+    grid, so that each test only compares the segments near the other geometry and
+    casts rays across the edges of a single band, instead of comparing all pairs of
+    segments of both geometries.
+    """
+
+    geometry: Geometry
+
+    def __init__(self, geometry: Geometry):
+        self.geometry = geometry
+        self.bbox = bbox(geometry)
+        self._segments = list(_segments(geometry))
+        minx, miny, maxx, maxy = self.bbox
+        cells = ceil(len(self._segments) ** 0.5) or 1
+        self.cell_size = max(maxx - minx, maxy - miny) / cells or 1.0
+
+        self._index = GridIndex(self.cell_size)
+        for key, (p, q) in enumerate(self._segments):
+            self._index.insert(key, _segment_bbox(p, q))
+
+        # Edges of polygon rings by band, with the ring's polygon and whether the
+        # ring is a hole
+        self._bands: Dict[int, List[Tuple[int, Sequence[float], Sequence[float]]]] = {}
+        self._rings: List[Tuple[int, bool]] = []
+        for polygon_id, polygon in enumerate(_polygons(geometry)):
+            for ring_number, ring in enumerate(polygon):
+                ring_id = len(self._rings)
+                self._rings.append((polygon_id, ring_number > 0))
+                for p, q in zip(ring, [*ring[1:], ring[0]]):
+                    if p[1] == q[1]:
+                        continue  # Horizontal edges never cross a ray
+                    for band in range(
+                        self._band(min(p[1], q[1])), self._band(max(p[1], q[1])) + 1
+                    ):
+                        self._bands.setdefault(band, []).append((ring_id, p, q))
+
+    def _band(self, y: float) -> int:
+        return int(floor(y / self.cell_size))
+
+    def _near(self, box: BBox) -> Iterator[Tuple[Sequence[float], Sequence[float]]]:
+        for key in self._index.query(box):
+            yield self._segments[key]
+
+    def contains_point(self, x: float, y: float) -> bool:
+        """
+        Whether the geometry covers the given point, like contains_point without
+        tolerance.
+        """
+        if not bbox_intersects(self.bbox, (x, y, x, y)):
+            return False
+
+        crossings = [False] * len(self._rings)
+        for ring_id, p, q in self._bands.get(self._band(y), ()):
+            (x1, y1), (x2, y2) = p[:2], q[:2]
+            if (y1 > y) != (y2 > y) and x < (x2 - x1) * (y - y1) / (y2 - y1) + x1:
+                crossings[ring_id] = not crossings[ring_id]
+        inside: Dict[int, bool] = {}
+        for (polygon_id, hole), crossed in zip(self._rings, crossings):
+            if hole:
+                inside[polygon_id] = inside[polygon_id] and not crossed
+            else:
+                inside[polygon_id] = crossed
+        if any(inside.values()):
+            return True
+
+        if self.geometry["type"] in ("Polygon", "MultiPolygon"):
+            return False
+        return any(
+            _segment_distance(x, y, p, q) == 0 for p, q in self._near((x, y, x, y))
+        )
+
+    def intersects(self, other: Geometry) -> bool:
+        """
+        Whether the geometry and other share at least one point, like intersects.
+        """
+        box = bbox(other)
+        if not bbox_intersects(self.bbox, box):
+            return False
+        if any(self.contains_point(p[0], p[1]) for p in iter_positions(other)):
+            return True
+        near = list(self._near(box))
+        if any(contains_point(other, p[0], p[1]) for segment in near for p in segment):
+            return True
+        return any(
+            _segments_intersect(p, q, r, s)
+            for p, q in _segments(other)
+            for r, s in near
+            if bbox_intersects(_segment_bbox(p, q), _segment_bbox(r, s))
+        )
+
+
+def _segment_bbox(p: Sequence[float], q: Sequence[float]) -> BBox:
+    return min(p[0], q[0]), min(p[1], q[1]), max(p[0], q[0]), max(p[1], q[1])
+
+
+Point = Tuple[float, float]
+
+
+def convex_hull(points: Iterable[Sequence[float]]) -> List[Point]:
+    """
+    Returns the convex hull of points as counter-clockwise list of vertices without
+    collinear vertices, using Andrew's monotone chain algorithm.
+    """
+    points = sorted({(p[0], p[1]) for p in points})
+    if len(points) < 3:
+        return points
+
+    def chain(points):
+        hull = []
+        for p in points:
+            while len(hull) >= 2 and _orientation(hull[-2], hull[-1], p) <= 0:
+                hull.pop()
+            hull.append(p)
+        return hull[:-1]
+
+    return chain(points) + chain(reversed(points))
+
+
+def _deviations(points: Sequence[Point], a: Point, b: Point) -> Tuple[int, float]:
+    """
+    Returns the index and distance of the point farthest from the segment a-b.
+    """
+    if numpy is None:
+        distances = [_segment_distance(p[0], p[1], a, b) for p in points]
+        index = max(range(len(distances)), key=distances.__getitem__)
+        return index, distances[index]
+
+    xy = numpy.asarray(points, dtype=float) - a
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    length = dx * dx + dy * dy
+    t = numpy.zeros(len(xy))
+    if length:
+        t = numpy.clip((xy[:, 0] * dx + xy[:, 1] * dy) / length, 0.0, 1.0)
+    distances = numpy.hypot(xy[:, 0] - t * dx, xy[:, 1] - t * dy)
+    index = int(numpy.argmax(distances))
+    return index, float(distances[index])
+
+
+def simplify_line(points: Sequence[Point], tolerance: float) -> List[Point]:
+    """
+    Simplifies a line with the Douglas-Peucker algorithm, keeping its first and last
+    vertices. All removed vertices lie within tolerance of the simplified line.
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack:
+        start, end = stack.pop()
+        if end - start < 2:
+            continue
+        index, deviation = _deviations(
+            points[start + 1 : end], points[start], points[end]
+        )
+        if deviation > tolerance:
+            index += start + 1
+            keep[index] = True
+            stack.extend(((start, index), (index, end)))
+    return [p for p, k in zip(points, keep) if k]
+
+
+def _offset_convex(vertices: List[Point], distance: float) -> List[Point]:
+    """
+    Offsets the edges of a counter-clockwise convex polygon outward by distance,
+    joining them with mitres.
+    """
+    lines = []
+    for (x1, y1), (x2, y2) in zip(vertices, [*vertices[1:], vertices[0]]):
+        length = ((x2 - x1) ** 2 + (y2 - y1) ** 2) ** 0.5
+        nx, ny = (y2 - y1) / length, (x1 - x2) / length
+        lines.append((nx, ny, nx * x1 + ny * y1 + distance))
+
+    offset = []
+    for (a1, b1, c1), (a2, b2, c2) in zip([lines[-1], *lines[:-1]], lines):
+        determinant = a1 * b2 - a2 * b1
+        offset.append(
+            ((c1 * b2 - c2 * b1) / determinant, (a1 * c2 - a2 * c1) / determinant)
+        )
+    return offset
+
+
+def _covering_polygon(
+    points: Iterable[Sequence[float]], tolerance: float, precision: int
+) -> List[List[float]]:
+    unit = 10.0**-precision
+    hull = convex_hull(points)
+    if len(hull) >= 3:
+        vertices = simplify_line([*hull, hull[0]], tolerance)[:-1]
+        if len(vertices) >= 3:
+            ring = [
+                [round(x, precision), round(y, precision)]
+                for x, y in _offset_convex(vertices, tolerance + unit)
+            ]
+            return [*ring, ring[0]]
+    box = bbox({"type": "MultiPoint", "coordinates": hull})
+    return bbox_polygon(_round_outward(box, precision, tolerance + unit))[
+        "coordinates"
+    ][0]
+
+
+def _round_outward(box: BBox, precision: int, margin: float = 0.0) -> BBox:
+    scale = 10**precision
+    minx, miny, maxx, maxy = box
+    return (
+        floor((minx - margin) * scale) / scale,
+        floor((miny - margin) * scale) / scale,
+        ceil((maxx + margin) * scale) / scale,
+        ceil((maxy + margin) * scale) / scale,
+    )
+
+
+@dataclass(frozen=True)
+class Simplifier:
+    """
+    Replaces large area of interest geometries sent to search endpoints by simpler
+    geometries covering them, so that searches with the simplified geometry find at
+    least all results of the original. Results are then filtered locally with the
+    original geometry.
+
+    Each polygon is replaced by its convex hull, simplified with the Douglas-Peucker
+    algorithm within tolerance degrees and offset outward by tolerance plus one unit
+    of the coordinate precision, so that neither simplification nor rounding
+    uncovers any part of the original. Overlapping hulls are merged. With bbox_only,
+    geometries are replaced by their bounding box instead.
+    """
+
+    precision: int = 6
+    tolerance: float = 0.0
+    bbox_only: bool = False
+    min_vertices: int = 0
+
+    def simplify(self, geometry: Geometry) -> Geometry:
+        """
+        Returns a geometry covering the given geometry, or the geometry itself if it
+        has at most min_vertices vertices.
+        """
+        positions = list(iter_positions(geometry))
+        if len(positions) <= self.min_vertices:
+            return geometry
+        if self.bbox_only:
+            margin = 10.0**-self.precision
+            return bbox_polygon(_round_outward(bbox(geometry), self.precision, margin))
+
+        parts = [positions]
+        if geometry["type"] in ("Polygon", "MultiPolygon"):
+            parts = [polygon[0] for polygon in _polygons(geometry)]
+        hulls = [
+            _covering_polygon(part, self.tolerance, self.precision) for part in parts
+        ]
+        merged = True
+        while merged and len(hulls) > 1:
+            merged = False
+            for i in range(len(hulls)):
+                for j in range(i + 1, len(hulls)):
+                    a = {"type": "Polygon", "coordinates": [hulls[i]]}
+                    b = {"type": "Polygon", "coordinates": [hulls[j]]}
+                    if intersects(a, b):
+                        hulls[i] = _covering_polygon(
+                            [*hulls[i], *hulls.pop(j)], 0.0, self.precision
+                        )
+                        merged = True
+                        break
+                if merged:
+                    break
+
+        if len(hulls) == 1:
+            return {"type": "Polygon", "coordinates": [hulls[0]]}
+        return {"type": "MultiPolygon", "coordinates": [[hull] for hull in hulls]}
+
+    @staticmethod
+    def matches(
+        feature: Dict[str, Any], geometry: Union[Geometry, PreparedGeometry]
+    ) -> bool:
+        """
+        Whether a feature intersects the original geometry, which should be prepared
+        when matching many features.
+        """
+        if not feature.get("geometry"):
+            return False
+        if isinstance(geometry, PreparedGeometry):
+            return geometry.intersects(feature["geometry"])
+        return intersects(feature["geometry"], geometry)
@@ -0,0 +1,166 @@
+from allure import description, title, suite
+from math import cos, pi, sin
+from random import Random
+from time import perf_counter
+
+from pytest import mark
+
+from .geometry import (
+    GridIndex,
+    PreparedGeometry,
+    Simplifier,
+    bbox_polygon,
+    contains_point,
+    geohash,
+    intersects,
+)
+
+SQUARE = bbox_polygon((0, 0, 2, 2))
+
+
+def wavy_ring(vertices: int, radius: float):
+    ring = [
+        [
+            cos(2 * pi * i / vertices)
+            * radius
+            * (1 + 0.05 * sin(20 * pi * i / vertices)),
+            sin(2 * pi * i / vertices)
+            * radius
+            * (1 + 0.05 * sin(20 * pi * i / vertices)),
+        ]
+        for i in range(vertices)
+    ]
+    return [*ring, ring[0]]
+
+
+@suite("Geometry")
+class TestGeometry:
+    @title("Geohash")
+    @description("Points are encoded as geohashes of the given precision")
+    def test_geohash(self):
+        assert geohash(-5.6, 42.6, 5) == "ezs42"
+        assert geohash(10.40744, 57.64911, 11) == "u4pruydqqvj"
+
+    @title("Intersection")
+    @description("Intersections of points, lines and polygons are detected")
+    @mark.parametrize(
+        "geometry, expected",
+        (
+            ({"type": "Point", "coordinates": [1, 1]}, True),
+            ({"type": "Point", "coordinates": [3, 1]}, False),
+            ({"type": "Point", "coordinates": [2, 1]}, True),
+            ({"type": "LineString", "coordinates": [[-1, 1], [3, 1]]}, True),
+            ({"type": "LineString", "coordinates": [[-1, 3], [3, 3]]}, False),
+            (bbox_polygon((1, 1, 3, 3)), True),
+            (bbox_polygon((-1, -1, 3, 3)), True),
+            (bbox_polygon((0.5, -1, 1.5, 3)), True),
+            (bbox_polygon((2, 2, 3, 3)), True),
+            (bbox_polygon((2.5, 0, 3, 2)), False),
+            (
+                {
+                    "type": "Polygon",
+                    "coordinates": [[[1.6, 2.5], [3, 1.1], [3, 2.5], [1.6, 2.5]]],
+                },
+                False,
+            ),
+        ),
+    )
+    def test_intersects(self, geometry, expected):
+        assert intersects(SQUARE, geometry) is expected
+        assert intersects(geometry, SQUARE) is expected
+        assert PreparedGeometry(SQUARE).intersects(geometry) is expected
+        assert PreparedGeometry(geometry).intersects(SQUARE) is expected
+
+    @title("Prepared geometry")
+    @description("Prepared geometries intersect the same geometries as unprepared")
+    def test_prepared(self):
+        rng = Random(1)
+        outer, inner = wavy_ring(200, 1.0), wavy_ring(50, 0.4)
+        geometry = {
+            "type": "MultiPolygon",
+            "coordinates": [
+                [outer, inner[::-1]],
+                bbox_polygon((3, 0, 4, 1))["coordinates"],
+            ],
+        }
+        prepared = PreparedGeometry(geometry)
+        others = []
+        for _ in range(200):
+            x, y = rng.uniform(-1.5, 4.5), rng.uniform(-1.5, 1.5)
+            size = rng.choice((0, 0.01, 0.1, 0.5))
+            others.append(
+                bbox_polygon((x, y, x + size, y + size))
+                if size
+                else {"type": "Point", "coordinates": [x, y]}
+            )
+
+        results = [prepared.intersects(other) for other in others]
+
+        assert results == [intersects(other, geometry) for other in others]
+        assert 0 < sum(results) < len(results)
+
+    @title("Prepared geometry with many vertices")
+    @description("Features are matched without comparing all pairs of segments")
+    def test_prepared_many_vertices(self):
+        geometry = {"type": "Polygon", "coordinates": [wavy_ring(20_000, 1.0)]}
+        # Small boxes in a trough of the ring, inside its convex hull but outside
+        # the ring, and one box across the ring
+        features = [
+            {
+                "geometry": bbox_polygon(
+                    (
+                        radius * cos(0.471 + i * 1e-4),
+                        radius * sin(0.471 + i * 1e-4),
+                        radius * cos(0.471 + i * 1e-4) + 0.001,
+                        radius * sin(0.471 + i * 1e-4) + 0.001,
+                    )
+                )
+            }
+            for i in range(100)
+            for radius in [0.975 if i else 0.945]
+        ]
+
+        start = perf_counter()
+        prepared = PreparedGeometry(geometry)
+        matches = [Simplifier.matches(feature, prepared) for feature in features]
+        elapsed = perf_counter() - start
+
+        assert matches == [True] + [False] * 99
+        assert elapsed < 5.0
+
+    @title("Grid index")
+    @description("Boxes intersecting a query box are found in insertion order")
+    def test_grid_index(self):
+        index = GridIndex(1.0)
+        index.insert("b", (2.5, 2.5, 3.5, 3.5))
+        index.insert("a", (0, 0, 0.5, 0.5))
+        index.insert("c", (10, 10, 11, 11))
+
+        assert index.query((0.2, 0.2, 3, 3)) == ["b", "a"]
+        assert index.query((0.6, 0.6, 0.9, 0.9)) == []
+
+    @title("Covering simplification")
+    @description("Simplified geometries have fewer vertices and cover the original")
+    @mark.parametrize("bbox_only", (False, True))
+    def test_simplifier(self, bbox_only):
+        ring = [
+            [
+                10 + cos(2 * pi * i / 5000) * (1 + 0.05 * sin(100 * pi * i / 5000)),
+                50 + sin(2 * pi * i / 5000) * (1 + 0.05 * sin(100 * pi * i / 5000)),
+            ]
+            for i in range(5000)
+        ]
+        geometry = {"type": "Polygon", "coordinates": [[*ring, ring[0]]]}
+
+        simplified = Simplifier(
+            precision=4, tolerance=0.01, bbox_only=bbox_only
+        ).simplify(geometry)
+
+        assert simplified["type"] == "Polygon"
+        assert len(simplified["coordinates"][0]) < 100
+        assert all(contains_point(simplified, x, y) for x, y in ring)
+
+    @title("Small geometries")
+    @description("Geometries with few vertices are not simplified")
+    def test_simplifier_min_vertices(self):
+        assert Simplifier(min_vertices=10).simplify(SQUARE) is SQUARE
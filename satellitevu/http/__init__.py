@@ -1,4 +1,24 @@
+from importlib import import_module
+from typing import TYPE_CHECKING
+
 from .base import AbstractClient, ResponseWrapper
-from .urllib import UrllibClient
+
+if TYPE_CHECKING:
+    from .urllib import UrllibClient
 
 __all__ = ["AbstractClient", "ResponseWrapper", "UrllibClient"]
+
+# urllib.request and http.client are only imported once a client is used (PEP 562)
+_LAZY = {"UrllibClient": ".urllib"}
+
+
+def __getattr__(name: str):
+    if name in _LAZY:
+        value = getattr(import_module(_LAZY[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -1,22 +1,57 @@
+import gzip
 from abc import ABC, abstractmethod, abstractproperty
-from importlib.metadata import version
-from typing import TYPE_CHECKING, Any, Dict, Iterable, Mapping, Optional
+from functools import lru_cache
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from satellitevu.fork import Lock
+
+from . import codec
+from .timing import NO_TIMING, RequestTiming, Timings, current_timing
 
 if TYPE_CHECKING:
     from satellitevu import Auth
 
 
+@lru_cache(maxsize=None)
+def sdk_comment() -> str:
+    """
+    Returns the User-Agent comment identifying the SDK. Looking up the package
+    version reads package metadata from disk, so it is only done once, and
+    importlib.metadata is only imported then.
+    """
+    from importlib.metadata import version
+
+    return f"(satellitevu/{version('satellitevu')})"
+
+
+def _origin(url: str) -> str:
+    # Scheme and authority, e.g. "https://api.example.com"
+    return "/".join(url.split("/", 3)[:3])
+
+
 class ResponseWrapper(ABC):
     raw: Any
     headers: Dict[str, str]
     status: int
+    content: bytes
     json: Any
     text: str
+    timing: Optional[RequestTiming] = None
 
     @abstractmethod
     def json(self):
         pass
 
+    def _loads(self, content: bytes) -> Any:
+        timing = self.timing
+        if timing is None:
+            return codec.loads(content)
+        start = perf_counter()
+        value = codec.loads(content)
+        timing.add("decode", perf_counter() - start)
+        return value
+
 
 class AbstractClient(ABC):
     """
@@ -24,9 +59,31 @@ class AbstractClient(ABC):
     """
 
     _auth: Dict[str, "Auth"]
+    _auth_index: Dict[str, List[Tuple[str, "Auth"]]]
+    _user_agent: Optional[str] = None
+    compress_threshold: Optional[int]
+    timings: Optional[Timings]
 
-    def __init__(self):
+    def __init__(
+        self,
+        *,
+        compress_threshold: Optional[int] = None,
+        timings: Optional[Timings] = None,
+    ):
+        """
+        Args:
+            compress_threshold: Optional size in bytes above which JSON request bodies
+            are sent gzip compressed with a "Content-Encoding: gzip" header. Request
+            bodies are not compressed by default.
+
+            timings: Optional Timings recording a timing breakdown of each request
+            into per-endpoint latency histograms, see satellitevu.http.timing.
+        """
         self._auth = {}
+        self._auth_index = {}
+        self._auth_lock = Lock()
+        self.compress_threshold = compress_threshold
+        self.timings = timings
 
     def post(
         self,
@@ -51,8 +108,38 @@ class AbstractClient(ABC):
     ) -> ResponseWrapper:
         pass
 
+    def timed(self, method: str, url: str):
+        """
+        Returns a context manager timing a request, which enters as the request's
+        RequestTiming, or as None when timings are disabled.
+        """
+        if self.timings is None:
+            return NO_TIMING
+        return self.timings.request(method, url)
+
     def set_auth(self, base_url: str, auth):
-        self._auth[base_url] = auth
+        # Writers build new mappings under the lock and publish them by assignment,
+        # so that get_auth can read without locking
+        with self._auth_lock:
+            providers = {**self._auth, base_url: auth}
+            # Index base URLs by origin, longest first, so that lookups only compare
+            # the few base URLs of the request's host and the most specific one wins
+            index = {}
+            for prefix, value in providers.items():
+                index.setdefault(_origin(prefix), []).append((prefix, value))
+            for entries in index.values():
+                entries.sort(key=lambda entry: len(entry[0]), reverse=True)
+            self._auth = providers
+            self._auth_index = index
+
+    def get_auth(self, url: str) -> Optional["Auth"]:
+        """
+        Returns the auth provider of the longest base URL the url starts with.
+        """
+        for prefix, auth in self._auth_index.get(_origin(url), ()):
+            if url.startswith(prefix):
+                return auth
+        return None
 
     def _set_auth(
         self,
@@ -60,14 +147,19 @@ class AbstractClient(ABC):
         headers: Mapping[str, str],
         scopes: Optional[Iterable[str]] = None,
     ):
-        if not scopes:
-            scopes = []
-        auth = next((v for k, v in self._auth.items() if url.startswith(k)), None)
-        has_auth = next(
-            (True for k in headers.keys() if k.lower() == "authorization"), False
-        )
-        if auth and not has_auth:
-            headers["Authorization"] = f"Bearer {auth.token(scopes)}"
+        auth = self.get_auth(url)
+        if auth is None:
+            return
+        if any(k.lower() == "authorization" for k in headers):
+            return
+        timing = current_timing.get() if self.timings is not None else None
+        if timing is None:
+            token = auth.token(scopes or [])
+        else:
+            start = perf_counter()
+            token = auth.token(scopes or [])
+            timing.add("token", perf_counter() - start)
+        headers["Authorization"] = f"Bearer {token}"
 
     def prepare_headers(
         self,
@@ -75,15 +167,29 @@ class AbstractClient(ABC):
         headers: Mapping[str, str],
         scopes: Optional[Iterable[str]] = None,
     ):
-        _headers = {**(headers or {})}
+        _headers = dict(headers) if headers else {}
 
         self._set_auth(url, _headers, scopes)
 
-        sv_comment = f"(satellitevu/{version('satellitevu')})"
-        _headers["User-Agent"] = f"{self.user_agent} {sv_comment}"
+        user_agent = self._user_agent
+        if user_agent is None:
+            user_agent = self._user_agent = f"{self.user_agent} {sdk_comment()}"
+        _headers["User-Agent"] = user_agent
 
         return _headers
 
+    def encode_json(self, json: Any, headers: Dict[str, str]) -> bytes:
+        """
+        Serializes a JSON request body, compressing it if it is larger than
+        compress_threshold, and sets the matching request headers.
+        """
+        body = codec.dumps(json)
+        headers["Content-Type"] = "application/json"
+        if self.compress_threshold is not None and len(body) > self.compress_threshold:
+            body = gzip.compress(body)
+            headers["Content-Encoding"] = "gzip"
+        return body
+
     @abstractproperty
     def user_agent(self) -> str:
         pass
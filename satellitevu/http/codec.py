@@ -0,0 +1,142 @@
+import json
+from importlib import import_module
+from types import ModuleType
+from typing import Any, Optional, Union
+
+# orjson and msgspec are imported when a codec is first used rather than on import,
+# and are available as module attributes, None if not installed (PEP 562)
+_OPTIONAL = ("orjson", "msgspec")
+
+
+def _optional(name: str) -> Optional[ModuleType]:
+    if name not in globals():
+        try:
+            globals()[name] = import_module(name)
+        except ImportError:  # pragma: no cover
+            globals()[name] = None
+    return globals()[name]
+
+
+def __getattr__(name: str):
+    if name in _OPTIONAL:
+        return _optional(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+class StdlibCodec:
+    """
+    JSON codec using the standard library's json module.
+    """
+
+    name = "json"
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, separators=(",", ":")).encode("utf-8")
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return json.loads(data)
+
+
+class OrjsonCodec:
+    """
+    JSON codec using orjson, which natively serializes dataclasses, datetimes, UUIDs
+    and NumPy arrays.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        orjson = _optional("orjson")
+        self._dumps = orjson.dumps
+        self._loads = orjson.loads
+        self._options = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._dumps(obj, option=self._options)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._loads(data)
+
+
+class MsgspecCodec:
+    """
+    JSON codec using msgspec.
+    """
+
+    name = "msgspec"
+
+    def __init__(self):
+        msgspec = _optional("msgspec")
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+
+    def dumps(self, obj: Any) -> bytes:
+        return self._encoder.encode(obj)
+
+    def loads(self, data: Union[bytes, str]) -> Any:
+        return self._decoder.decode(data)
+
+
+Codec = Union[StdlibCodec, OrjsonCodec, MsgspecCodec]
+
+CODECS = {
+    "json": StdlibCodec,
+    "orjson": OrjsonCodec,
+    "msgspec": MsgspecCodec,
+}
+
+
+def default_codec() -> Codec:
+    """
+    Returns the fastest available codec: orjson, msgspec or the standard library.
+    """
+    if _optional("orjson") is not None:
+        return OrjsonCodec()
+    if _optional("msgspec") is not None:  # pragma: no cover
+        return MsgspecCodec()
+    return StdlibCodec()  # pragma: no cover
+
+
+_codec: Optional[Codec] = None
+
+
+def get_codec() -> Codec:
+    global _codec
+    if _codec is None:
+        _codec = default_codec()
+    return _codec
+
+
+def set_codec(codec: Optional[Union[str, Codec]] = None) -> Codec:
+    """
+    Sets the JSON codec used by all HTTP clients and responses, either by name
+    ("json", "orjson" or "msgspec") or as a codec instance. Passing None restores the
+    default codec.
+    """
+    global _codec
+    if codec is None:
+        _codec = default_codec()
+    elif isinstance(codec, str):
+        if codec not in CODECS:
+            raise ValueError(f"Unknown JSON codec {codec}")
+        if codec in _OPTIONAL and _optional(codec) is None:
+            raise ValueError(f"JSON codec {codec} is not installed")
+        _codec = CODECS[codec]()
+    else:
+        _codec = codec
+    return _codec
+
+
+def dumps(obj: Any) -> bytes:
+    """
+    Serializes obj to UTF-8 encoded JSON using the current codec.
+    """
+    return (_codec or get_codec()).dumps(obj)
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserializes JSON from bytes or str using the current codec, decoding bytes
+    without an intermediate str where the codec supports it.
+    """
+    return (_codec or get_codec()).loads(data)
@@ -0,0 +1,46 @@
+from allure import description, title, suite
+from json import dumps
+
+from pytest import fixture, mark, raises, skip
+
+from . import codec
+
+
+@fixture
+def reset_codec():
+    yield
+    codec.set_codec()
+
+
+@suite("JSON Codec")
+class TestCodec:
+    @title("Codec round trip")
+    @description("Codecs encode to bytes and decode from bytes or str")
+    @mark.parametrize("name", ("json", "orjson"))
+    def test_round_trip(self, reset_codec, name):
+        if name == "orjson" and codec.orjson is None:
+            skip("orjson is not installed")
+        obj = {"features": [{"id": "a", "bbox": [0.5, -1, 2.25, 3]}], "next": None}
+        codec.set_codec(name)
+
+        encoded = codec.dumps(obj)
+
+        assert isinstance(encoded, bytes)
+        assert codec.loads(encoded) == obj
+        assert codec.loads(dumps(obj)) == obj
+
+    @title("Default codec")
+    @description("The fastest installed codec is used by default")
+    def test_default(self):
+        expected = "json"
+        if codec.orjson is not None:
+            expected = "orjson"
+        elif codec.msgspec is not None:
+            expected = "msgspec"
+
+        assert codec.get_codec().name == expected
+
+    @title("Unknown codecs")
+    def test_unknown(self, reset_codec):
+        with raises(ValueError):
+            codec.set_codec("yaml")
@@ -1,10 +1,13 @@
-from allure import title, suite
+from allure import description, title, suite
 from importlib.metadata import version
-from json import dumps
+import gzip
+import zlib
+from json import dumps, loads
+from threading import Thread
 from unittest.mock import Mock
 
 from mocket import Mocket, Mocketizer
-from mocket.mockhttp import Entry
+from mocket.mockhttp import Entry, Request
 from pytest import mark, skip
 
 from satellitevu.auth.auth import Auth
@@ -12,7 +15,24 @@ from satellitevu.auth.auth import Auth
 from . import ResponseWrapper, UrllibClient
 
 
+class RawRequest(Request):
+    # Request.body decodes the body as UTF-8, which fails for compressed bodies, so
+    # the bytes mocket receives are kept as well
+    def __init__(self, data: bytes):
+        self.data = b""
+        super().__init__(data)
+
+    def add_data(self, data: bytes):
+        super().add_data(data)
+        self.data += data
+
+
+class RawEntry(Entry):
+    request_cls = RawRequest
+
+
 @suite("HTTP")
+@mark.no_mocketize
 class TestHttp:
     @title("HTTP client")
     @mark.parametrize("method", ("GET", "POST"))
@@ -88,6 +108,20 @@ class TestHttp:
             requests[0].headers.get("authorization") == "Bearer mock-token"
         ) == uses_injected_auth
 
+    @title("Most specific auth")
+    @description("The auth of the longest matching base URL is used")
+    def test_http_longest_auth_prefix(self):
+        client = UrllibClient()
+        general, specific = Mock(), Mock()
+        client.set_auth("http://api.example.com/", general)
+        client.set_auth("http://api.example.com/authed/", specific)
+        client.set_auth("http://other.example.com/authed/", Mock())
+
+        assert client.get_auth("http://api.example.com/authed/a") is specific
+        assert client.get_auth("http://api.example.com/a") is general
+        assert client.get_auth("http://api.example.com.evil/a") is None
+        assert client.get_auth("http://example.com/") is None
+
     @mark.parametrize(
         "data, json, body, content_type",
         (
@@ -110,4 +144,83 @@ class TestHttp:
             client.request("POST", "http://api.example.com", data=data, json=json)
             request = Mocket.last_request()
         assert request.headers["content-type"] == content_type
-        assert request.body == body
+        if content_type == "application/json":
+            assert loads(request.body) == loads(body)
+        else:
+            assert request.body == body
+
+    @title("Request compression")
+    @mark.parametrize(
+        "threshold, compressed", ((None, False), (10, True), (100, False))
+    )
+    def test_request_compression(self, http_client_class, threshold, compressed):
+        client = http_client_class(compress_threshold=threshold)
+        payload = {"features": ["a"] * 10}
+        RawEntry.single_register("POST", "http://api.example.com")
+
+        with Mocketizer():
+            client.request("POST", "http://api.example.com", json=payload)
+            request = Mocket.last_request()
+
+        assert request.headers["content-type"] == "application/json"
+        assert (request.headers.get("content-encoding") == "gzip") == compressed
+        body = request.data.split(b"\r\n\r\n", 1)[1]
+        if compressed:
+            body = gzip.decompress(body)
+        assert loads(body) == payload
+
+    @title("Response decompression")
+    @mark.parametrize("encoding", ("gzip", "deflate", "gzip, deflate"))
+    def test_response_decompression(self, encoding):
+        body = dumps({"message": "Hello"}).encode()
+        for coding in encoding.split(", "):
+            body = gzip.compress(body) if coding == "gzip" else zlib.compress(body)
+        Entry.single_register(
+            "GET",
+            "http://example.com/",
+            body=body,
+            headers={"Content-Encoding": encoding},
+        )
+
+        with Mocketizer():
+            response = UrllibClient().request("GET", "http://example.com/")
+            request = Mocket.last_request()
+
+        assert "gzip" in request.headers["accept-encoding"]
+        assert response.json() == {"message": "Hello"}
+        assert response.text == dumps({"message": "Hello"})
+
+    @title("Streamed response body")
+    @description("Bodies are read in chunks unless they have to be decoded")
+    @mark.parametrize("encoding", (None, "gzip"))
+    def test_iter_content(self, encoding):
+        body = b"imagery" * 10
+        Entry.single_register(
+            "GET",
+            "http://example.com/",
+            body=gzip.compress(body) if encoding else body,
+            headers={"Content-Encoding": encoding} if encoding else {},
+        )
+
+        with Mocketizer():
+            response = UrllibClient().request("GET", "http://example.com/")
+            chunks = list(response.iter_content(16))
+
+        assert b"".join(chunks) == body
+        assert len(chunks) == (1 if encoding else 5)
+
+    @title("Requests sessions per thread")
+    def test_requests_session_per_thread(self):
+        from .requests import RequestsSession
+
+        client = RequestsSession()
+        sessions = []
+        threads = [
+            Thread(target=lambda: sessions.append(client.session)) for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+            thread.join()
+
+        assert client.session is client.session
+        assert len({id(session) for session in sessions + [client.session]}) == 3
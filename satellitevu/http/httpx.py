@@ -1,34 +1,109 @@
+from logging import getLogger
+from time import perf_counter
 from typing import Any, Dict, Iterable, Optional
 
 from httpx import Client, Response
 from httpx.__version__ import __version__
 
+from satellitevu import fork
+
 from .base import AbstractClient
 from .base import ResponseWrapper as BaseResponse
+from .timing import RequestTiming, Timings
+
+logger = getLogger(__file__)
 
 
 class ResponseWrapper(BaseResponse):
     raw: Response
 
-    def __init__(self, raw: Response):
+    def __init__(self, raw: Response, timing: Optional[RequestTiming] = None):
         self.raw = raw
         self.status = raw.status_code
         self.headers = raw.headers
+        self.timing = timing
+
+    @property
+    def content(self) -> bytes:
+        return self.raw.content
 
     def json(self):
-        return self.raw.json()
+        return self._loads(self.raw.content)
 
     @property
     def text(self):
         return self.raw.text
 
 
+class Trace:
+    """
+    Trace extension callback collecting the times of httpcore's connection and
+    HTTP/1.1 or HTTP/2 events of a request, by event name without the protocol.
+    """
+
+    __slots__ = ("events",)
+
+    def __init__(self):
+        self.events: Dict[str, float] = {}
+
+    def __call__(self, name: str, info: Dict[str, Any]):
+        if name.startswith("http"):
+            name = name.partition(".")[2]
+        self.events.setdefault(name, perf_counter())
+
+    def add_phases(self, timing: RequestTiming, start: float, end: float):
+        events = self.events
+
+        def between(first: str, last: str) -> Optional[float]:
+            if first in events and last in events:
+                return max(events[last] - events[first], 0.0)
+            return None
+
+        timing.connection_reused = "connection.connect_tcp.started" not in events
+        send = events.get("send_request_headers.started")
+        phases = {
+            "connection": send - start if send is not None else None,
+            "connect": between(
+                "connection.connect_tcp.started", "connection.connect_tcp.complete"
+            ),
+            "tls": between(
+                "connection.start_tls.started", "connection.start_tls.complete"
+            ),
+            "first_byte": between(
+                "send_request_headers.started", "receive_response_headers.complete"
+            ),
+        }
+        if "receive_response_headers.complete" in events:
+            phases["transfer"] = end - events["receive_response_headers.complete"]
+        for phase, seconds in phases.items():
+            if seconds is not None:
+                timing.add(phase, seconds)
+
+
 class HttpxClient(AbstractClient):
     client: Client
 
-    def __init__(self, instance: Optional[Client] = None):
-        super().__init__()
+    def __init__(
+        self,
+        instance: Optional[Client] = None,
+        *,
+        compress_threshold: Optional[int] = None,
+        timings: Optional[Timings] = None,
+    ):
+        super().__init__(compress_threshold=compress_threshold, timings=timings)
         self.client = instance or Client()
+        self._owns_client = instance is None
+        fork.register(self)
+
+    def _after_fork(self):
+        # Connections pooled by the parent's client must not be used by the child
+        if self._owns_client:
+            self.client = Client()
+        else:
+            logger.warning(
+                "httpx client instance shares its connections with the parent process"
+                " after fork, create it after forking instead"
+            )
 
     def request(
         self,
@@ -40,14 +115,29 @@ class HttpxClient(AbstractClient):
         data: Optional[Dict] = None,
         json: Optional[Any] = None,
     ) -> ResponseWrapper:
-        response = self.client.request(
-            method=method,
-            url=url,
-            headers=self.prepare_headers(url, headers, scopes),
-            data=data,
-            json=json,
-        )
-        return ResponseWrapper(response)
+        with self.timed(method, url) as timing:
+            headers = self.prepare_headers(url, headers, scopes)
+            content = None
+            if json is not None and not data:
+                # Serialized here so that large bodies can be compressed
+                content = self.encode_json(json, headers)
+                json = None
+            trace = Trace() if timing is not None else None
+            start = perf_counter()
+            response = self.client.request(
+                method=method,
+                url=url,
+                headers=headers,
+                content=content,
+                data=data,
+                json=json,
+                extensions={"trace": trace} if trace is not None else None,
+            )
+            if timing is not None:
+                trace.add_phases(timing, start, perf_counter())
+                timing.status = response.status_code
+            wrapper = ResponseWrapper(response, timing)
+        return wrapper
 
     @property
     def user_agent(self) -> str:
@@ -1,23 +1,34 @@
 from ast import Dict
-from typing import Any, Iterable, Optional
+from threading import local
+from time import perf_counter
+from typing import Any, Callable, Iterable, Optional
 
 from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.utils import default_user_agent
 
+from satellitevu import fork
+
 from .base import AbstractClient
 from .base import ResponseWrapper as BaseResponse
+from .timing import RequestTiming, Timings
 
 
 class ResponseWrapper(BaseResponse):
     raw: Response
 
-    def __init__(self, raw: Response):
+    def __init__(self, raw: Response, timing: Optional[RequestTiming] = None):
         self.raw = raw
         self.status = raw.status_code
         self.headers = raw.headers
+        self.timing = timing
+
+    @property
+    def content(self) -> bytes:
+        return self.raw.content
 
     def json(self):
-        return self.raw.json()
+        return self._loads(self.raw.content)
 
     @property
     def text(self):
@@ -25,11 +36,62 @@ class ResponseWrapper(BaseResponse):
 
 
 class RequestsSession(AbstractClient):
-    session: Session
+    """
+    HTTP client using requests. Sessions of requests are not thread-safe, so each
+    thread uses its own session unless a session instance is given.
+    """
+
+    def __init__(
+        self,
+        instance: Optional[Session] = None,
+        *,
+        compress_threshold: Optional[int] = None,
+        timings: Optional[Timings] = None,
+        session_factory: Callable[[], Session] = Session,
+    ):
+        """
+        Args:
+            instance: Optional session used by all threads, which is only safe if
+            requests are not made from multiple threads at once.
+
+            session_factory: Callable creating the session of each thread unless
+            instance is given, e.g. to mount adapters with retries. Defaults to
+            Session.
+        """
+        super().__init__(compress_threshold=compress_threshold, timings=timings)
+        self._instance = instance
+        self._session_factory = session_factory
+        self._local = local()
+        fork.register(self)
+
+    @property
+    def session(self) -> Session:
+        """
+        The session of the calling thread.
+        """
+        if self._instance is not None:
+            return self._instance
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = self._session_factory()
+        return session
+
+    @session.setter
+    def session(self, session: Session):
+        self._instance = session
 
-    def __init__(self, instance: Optional[Session] = None):
-        super().__init__()
-        self.session = instance or Session()
+    def _after_fork(self):
+        # Connections pooled by the parent's sessions must not be used by the child
+        self._local = local()
+        if self._instance is not None:
+            for adapter in self._instance.adapters.values():
+                if isinstance(adapter, HTTPAdapter):
+                    adapter.init_poolmanager(
+                        adapter._pool_connections,
+                        adapter._pool_maxsize,
+                        block=adapter._pool_block,
+                    )
+                    adapter.proxy_manager = {}
 
     def request(
         self,
@@ -41,14 +103,29 @@ class RequestsSession(AbstractClient):
         data: Optional[Dict] = None,
         json: Optional[Any] = None,
     ) -> ResponseWrapper:
-        response = self.session.request(
-            method=method,
-            url=url,
-            headers=self.prepare_headers(url, headers, scopes),
-            data=data,
-            json=json,
-        )
-        return ResponseWrapper(response)
+        with self.timed(method, url) as timing:
+            headers = self.prepare_headers(url, headers, scopes)
+            if json is not None and not data:
+                # Serialized here so that large bodies can be compressed
+                data = self.encode_json(json, headers)
+                json = None
+            start = perf_counter()
+            response = self.session.request(
+                method=method,
+                url=url,
+                headers=headers,
+                data=data,
+                json=json,
+            )
+            if timing is not None:
+                # elapsed ends when the response headers were parsed, the body
+                # has been read by the time request returns
+                elapsed = response.elapsed.total_seconds()
+                timing.add("first_byte", elapsed)
+                timing.add("transfer", max(perf_counter() - start - elapsed, 0.0))
+                timing.status = response.status_code
+            wrapper = ResponseWrapper(response, timing)
+        return wrapper
 
     @property
     def user_agent(self) -> str:
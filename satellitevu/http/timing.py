@@ -0,0 +1,261 @@
+"""
+Per-request timing breakdown aggregated into per-endpoint latency histograms.
+
+Enable timings on an HTTP client and inspect them with Timings.snapshot, e.g.:
+
+    timings = Timings()
+    client = Client(client_id, client_secret, timings=timings)
+    ...
+    timings.snapshot()["GET /catalog/v1/{id}/search/"]["total"]["p99"]
+
+Each request records the phases its backend exposes, in seconds:
+
+- token: getting the access token, with token_cache_hit telling whether it came
+  from the token cache
+- connection: getting a connection from the pool, including connect and tls for
+  new connections (httpx only)
+- connect, tls: DNS resolution and TCP connect, and the TLS handshake of new
+  connections (httpx only)
+- first_byte: sending the request until the response headers arrived
+- transfer: reading the response body
+- decode: decoding the response body's JSON
+- total: the request from preparing its headers until the response was returned
+"""
+
+from contextvars import ContextVar
+from functools import lru_cache
+from math import ceil
+from time import perf_counter
+from typing import Dict, Optional, Tuple
+
+from satellitevu.fork import Lock
+
+PHASES = (
+    "token",
+    "connection",
+    "connect",
+    "tls",
+    "first_byte",
+    "transfer",
+    "decode",
+    "total",
+)
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+current_timing: ContextVar[Optional["RequestTiming"]] = ContextVar(
+    "current_timing", default=None
+)
+
+
+class Histogram:
+    """
+    HDR-style histogram of positive durations in seconds, recorded in microseconds
+    into logarithmic buckets subdivided into 2**precision linear sub-buckets. The
+    relative error of recorded values is below 2**-precision, 0.8% by default, and
+    memory only grows with the number of distinct buckets, not the number of values.
+    """
+
+    precision: int
+    counts: Dict[int, int]
+    count: int
+    total: int
+    min: int
+    max: int
+
+    def __init__(self, precision: int = 7):
+        self.precision = precision
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        # Values below 2 * 2**precision have a bucket each, larger values share
+        # buckets of 2**shift values
+        shift = value.bit_length() - self.precision - 1
+        if shift <= 0:
+            return value
+        return (shift << self.precision) + (value >> shift)
+
+    def _value(self, index: int) -> int:
+        # The highest value of a bucket, so percentiles never understate latency
+        shift = (index >> self.precision) - 1
+        if shift <= 0:
+            return index
+        sub_bucket = index - (shift << self.precision)
+        return ((sub_bucket + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value = max(int(seconds * 1e6), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        if not self.count or value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.count += 1
+        self.total += value
+
+    def percentile(self, percentile: float) -> float:
+        """
+        Returns the value in seconds below or at which percentile percent of the
+        recorded values are.
+        """
+        if not self.count:
+            return 0.0
+        rank = max(ceil(self.count * percentile / 100), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._value(index), self.max) / 1e6
+        return self.max / 1e6  # pragma: no cover
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count / 1e6 if self.count else 0.0
+
+    def snapshot(self) -> Dict[str, float]:
+        summary = {
+            "count": self.count,
+            "min": self.min / 1e6,
+            "mean": self.mean,
+            "max": self.max / 1e6,
+        }
+        for percentile in PERCENTILES:
+            summary[f"p{percentile:g}"] = self.percentile(percentile)
+        return summary
+
+
+@lru_cache(maxsize=1024)
+def endpoint(method: str, url: str) -> str:
+    """
+    Returns the endpoint of a request, its method and URL path with path segments
+    containing digits other than API versions replaced by "{id}", so that e.g.
+    requests for different orders share one set of histograms.
+    """
+    path = url.split("?", 1)[0].split("#", 1)[0]
+    if "://" in path:
+        path = "/" + path.split("://", 1)[1].partition("/")[2]
+    segments = [
+        (
+            "{id}"
+            if any(c.isdigit() for c in segment)
+            and not (segment[:1] == "v" and segment[1:].isdigit())
+            else segment
+        )
+        for segment in path.split("/")
+    ]
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+class RequestTiming:
+    """
+    Timing breakdown of one request, available as the timing attribute of its
+    response. Phases are recorded into the histograms of the request's endpoint as
+    they complete, so that transfer and decode times of responses read after the
+    request returned are included.
+    """
+
+    __slots__ = (
+        "endpoint",
+        "phases",
+        "token_cache_hit",
+        "connection_reused",
+        "status",
+        "_timings",
+        "_start",
+        "_token",
+    )
+
+    endpoint: str
+    phases: Dict[str, float]
+    token_cache_hit: Optional[bool]
+    connection_reused: Optional[bool]
+    status: Optional[int]
+
+    def __init__(self, timings: "Timings", method: str, url: str):
+        self.endpoint = endpoint(method, url)
+        self.phases = {}
+        self.token_cache_hit = None
+        self.connection_reused = None
+        self.status = None
+        self._timings = timings
+
+    def add(self, phase: str, seconds: float):
+        self.phases[phase] = seconds
+        self._timings.record(self.endpoint, phase, seconds)
+
+    def __enter__(self) -> "RequestTiming":
+        self._token = current_timing.set(self)
+        self._start = self._timings.clock()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.add("total", self._timings.clock() - self._start)
+        current_timing.reset(self._token)
+
+    def __repr__(self) -> str:
+        phases = ", ".join(f"{k}={v * 1000:.3f}ms" for k, v in self.phases.items())
+        return f"RequestTiming({self.endpoint}, {phases})"
+
+
+class _NoTiming:
+    # Shared stand-in for RequestTiming while timings are disabled
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info):
+        pass
+
+
+NO_TIMING = _NoTiming()
+
+
+class Timings:
+    """
+    In-memory per-endpoint, per-phase latency histograms of an HTTP client's
+    requests. Safe to share between threads and clients.
+    """
+
+    histograms: Dict[Tuple[str, str], Histogram]
+
+    def __init__(self, precision: int = 7):
+        """
+        Args:
+            precision: Number of bits of the histograms' sub-buckets, the relative
+            error of recorded durations is below 2**-precision.
+        """
+        self.clock = perf_counter
+        self.precision = precision
+        self.histograms = {}
+        self._lock = Lock()
+
+    def request(self, method: str, url: str) -> RequestTiming:
+        return RequestTiming(self, method, url)
+
+    def record(self, endpoint: str, phase: str, seconds: float):
+        key = (endpoint, phase)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(self.precision)
+            histogram.record(seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Returns count, min, mean, max and percentiles in seconds of each phase by
+        endpoint, e.g. {"GET /otm/v2/{id}/tasking/orders/": {"total": {"p99": ...}}}.
+        """
+        snapshot: Dict[str, Dict[str, Dict[str, float]]] = {}
+        with self._lock:
+            for (endpoint, phase), histogram in sorted(self.histograms.items()):
+                snapshot.setdefault(endpoint, {})[phase] = histogram.snapshot()
+        return snapshot
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
@@ -0,0 +1,102 @@
+from json import dumps
+from random import Random
+
+from allure import description, suite, title
+from mocket.mockhttp import Entry
+from pytest import approx, mark
+
+from satellitevu.auth.auth import Auth
+
+from .timing import Histogram, Timings, endpoint
+from ..conftest import MemoryCache
+
+
+@suite("HTTP Timing")
+class TestTiming:
+    @title("Histogram percentiles")
+    @description("Percentiles stay within the histogram's precision")
+    def test_histogram(self):
+        rng = Random(1)
+        values = sorted(rng.lognormvariate(-5, 1) for _ in range(10000))
+        histogram = Histogram()
+        for value in values:
+            histogram.record(value)
+
+        assert histogram.count == 10000
+        assert histogram.mean == approx(sum(values) / len(values), rel=1e-3)
+        for percentile in (50, 90, 99, 99.9):
+            expected = values[int(len(values) * percentile / 100) - 1]
+            assert histogram.percentile(percentile) == approx(expected, rel=0.01)
+        assert histogram.percentile(100) == approx(values[-1], rel=1e-4)
+        assert len(histogram.counts) < 1500
+
+    @title("Endpoint normalization")
+    @mark.parametrize(
+        "method, url, expected",
+        (
+            ("get", "https://api.example.com/otm/v2/", "GET /otm/v2/"),
+            (
+                "GET",
+                "https://api.example.com/otm/v2/5b5c1b5e-57e0-4f1c-a5f3-8c1d1c0b1c0a"
+                "/tasking/orders/?per_page=25",
+                "GET /otm/v2/{id}/tasking/orders/",
+            ),
+            ("POST", "https://auth.example.com/oauth/token", "POST /oauth/token"),
+        ),
+    )
+    def test_endpoint(self, method, url, expected):
+        assert endpoint(method, url) == expected
+
+    @title("Request timing breakdown")
+    @description("Records token, transfer, decode and total time per endpoint")
+    def test_request_timing(self, http_client_class, auth0_token_factory):
+        timings = Timings()
+        client = http_client_class(timings=timings)
+        auth = Auth(
+            client_id="mocked",
+            client_secret="mocked",
+            auth_url="http://auth.example.com/",
+            cache=MemoryCache(),
+            client=client,
+        )
+        client.set_auth("http://api.example.com/", auth)
+        Entry.single_register(
+            "POST",
+            "http://auth.example.com/oauth/token",
+            body=dumps({"access_token": auth0_token_factory("John Doe")}),
+        )
+        Entry.single_register(
+            "GET", "http://api.example.com/orders/v2/1234", body=dumps({"id": 1234})
+        )
+
+        responses = [
+            client.request("GET", "http://api.example.com/orders/v2/1234")
+            for _ in range(2)
+        ]
+        assert [response.json() for response in responses] == [{"id": 1234}] * 2
+
+        assert [r.timing.token_cache_hit for r in responses] == [False, True]
+        assert responses[0].timing.endpoint == "GET /orders/v2/{id}"
+        assert responses[0].timing.status == 200
+        phases = set(responses[0].timing.phases)
+        assert {"token", "first_byte", "transfer", "decode", "total"} <= phases
+
+        snapshot = timings.snapshot()
+        assert set(snapshot) == {"GET /orders/v2/{id}", "POST /oauth/token"}
+        total = snapshot["GET /orders/v2/{id}"]["total"]
+        assert total["count"] == 2
+        assert 0 < total["min"] <= total["p50"] <= total["p99"] <= total["max"]
+        assert snapshot["GET /orders/v2/{id}"]["decode"]["count"] == 2
+
+        timings.reset()
+        assert timings.snapshot() == {}
+
+    @title("Timings disabled")
+    def test_no_timings(self, http_client_class):
+        client = http_client_class()
+        Entry.single_register("GET", "http://api.example.com/", body="{}")
+
+        response = client.request("GET", "http://api.example.com/")
+
+        assert response.json() == {}
+        assert response.timing is None
@@ -1,29 +1,116 @@
+import gzip
+import zlib
 from http.client import HTTPResponse
-from json import dumps, loads
 from sys import version_info
-from typing import Any, Dict, Iterable, Optional
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional
 from urllib.error import HTTPError
 from urllib.parse import urlencode
 from urllib.request import Request, urlopen
 
 from .base import AbstractClient
 from .base import ResponseWrapper as BaseResponse
+from .timing import RequestTiming
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+
+def _inflate(data: bytes) -> bytes:
+    try:
+        return zlib.decompress(data)
+    except zlib.error:
+        # Some servers send raw deflate streams without the zlib header
+        return zlib.decompress(data, -zlib.MAX_WBITS)
+
+
+DECODERS: Dict[str, Callable[[bytes], bytes]] = {
+    "gzip": gzip.decompress,
+    "x-gzip": gzip.decompress,
+    "deflate": _inflate,
+    "identity": lambda data: data,
+}
+if brotli is not None:  # pragma: no cover
+    DECODERS["br"] = brotli.decompress
+if zstandard is not None:  # pragma: no cover
+    DECODERS["zstd"] = (
+        lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    )
+
+ACCEPT_ENCODING = ", ".join(
+    encoding for encoding in ("gzip", "deflate", "br", "zstd") if encoding in DECODERS
+)
+
+
+def decode_content(data: bytes, content_encoding: Optional[str]) -> bytes:
+    """
+    Decodes a response body according to its Content-Encoding header. Encodings are
+    undone in the reverse order they were applied in.
+    """
+    if not content_encoding:
+        return data
+    encodings = [e.strip().lower() for e in content_encoding.split(",")]
+    for encoding in reversed(encodings):
+        if encoding not in DECODERS:
+            raise ValueError(f"Unsupported content encoding {encoding}")
+        data = DECODERS[encoding](data)
+    return data
 
 
 class ResponseWrapper(BaseResponse):
     raw: HTTPResponse
 
-    def __init__(self, raw: HTTPResponse):
+    def __init__(self, raw: HTTPResponse, timing: Optional[RequestTiming] = None):
         self.raw = raw
         self.status = raw.status
         self.headers = {k: v for k, v in raw.getheaders()}
+        self.timing = timing
+        self._content = None
+
+    @property
+    def content(self) -> bytes:
+        """
+        Response body, decoded according to its Content-Encoding header. The body is
+        read once, so that json() and text can both be used.
+        """
+        if self._content is None:
+            start = perf_counter()
+            data = self.raw.read()
+            if self.timing is not None:
+                self.timing.add("transfer", perf_counter() - start)
+            self._content = decode_content(
+                data, self.raw.headers.get("Content-Encoding")
+            )
+        return self._content
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        """
+        Yields the response body in chunks, read from the connection as they are
+        consumed unless the body was already read or has to be decoded.
+        """
+        encoding = self.raw.headers.get("Content-Encoding", "identity")
+        if self._content is not None or encoding.strip().lower() != "identity":
+            yield self.content
+            return
+        start = perf_counter()
+        for chunk in iter(lambda: self.raw.read(chunk_size), b""):
+            yield chunk
+        if self.timing is not None:
+            self.timing.add("transfer", perf_counter() - start)
 
     def json(self):
-        return loads(self.raw.read().decode("utf-8"))
+        return self._loads(self.content)
 
     @property
     def text(self):
-        return self.raw.read().decode("utf-8")
+        return self.content.decode("utf-8")
 
 
 class UrllibClient(AbstractClient):
@@ -37,22 +124,28 @@ class UrllibClient(AbstractClient):
         data: Optional[Dict] = None,
         json: Optional[Any] = None,
     ) -> ResponseWrapper:
-        headers = self.prepare_headers(url, headers, scopes)
-        body = None
-        if data:
-            body = urlencode(data).encode("utf-8")
-            headers["Content-Type"] = "application/x-www-form-urlencoded"
-        elif json:
-            body = dumps(json).encode("utf-8")
-            headers["Content-Type"] = "application/json"
-
-        request = Request(method=method, url=url, data=body, headers=headers)
-        try:
-            response = urlopen(request)
-        except HTTPError as error:
-            response = error
-
-        wrapper = ResponseWrapper(raw=response)
+        with self.timed(method, url) as timing:
+            headers = self.prepare_headers(url, headers, scopes)
+            headers.setdefault("Accept-Encoding", ACCEPT_ENCODING)
+            body = None
+            if data:
+                body = urlencode(data).encode("utf-8")
+                headers["Content-Type"] = "application/x-www-form-urlencoded"
+            elif json:
+                body = self.encode_json(json, headers)
+
+            request = Request(method=method, url=url, data=body, headers=headers)
+            start = perf_counter()
+            try:
+                response = urlopen(request)
+            except HTTPError as error:
+                response = error
+            if timing is not None:
+                # urlopen returns once the response headers were read
+                timing.add("first_byte", perf_counter() - start)
+                timing.status = response.status
+
+            wrapper = ResponseWrapper(raw=response, timing=timing)
         return wrapper
 
     @property
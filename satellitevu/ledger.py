@@ -0,0 +1,271 @@
+import sqlite3
+from dataclasses import dataclass
+from logging import getLogger
+from time import time
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional, Union
+from uuid import UUID
+
+from satellitevu import fork
+from satellitevu.fork import Lock
+
+if TYPE_CHECKING:
+    from satellitevu.apis.contracts import ContractsV1
+    from satellitevu.apis.id import IdV2
+
+logger = getLogger(__file__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS balances (
+    contract_id TEXT PRIMARY KEY,
+    currency TEXT,
+    balance REAL NOT NULL,
+    debited REAL NOT NULL,
+    reconciled_at REAL NOT NULL
+);
+"""
+
+
+class InsufficientCreditError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class Balance:
+    contract_id: str
+    currency: Optional[str]
+    balance: float
+    debited: float
+    reconciled_at: float
+
+
+def order_price(order: Dict[str, Any]) -> Optional[float]:
+    """
+    Returns the total price of an order as returned by OtmV2.create_order or
+    OrdersV2.submit, or None if the order has no price, which is the case unless the
+    API includes one.
+    """
+    price = order.get("price") or (order.get("properties") or {}).get("price")
+    if isinstance(price, dict):
+        price = price.get("total", price.get("value"))
+    if price is None and order.get("features"):
+        prices = [order_price(feature) for feature in order["features"]]
+        if any(p is not None for p in prices):
+            return sum(p for p in prices if p is not None)
+    return price
+
+
+class CreditLedger:
+    """
+    Local copy of contract credit balances, seeded from IdV2.get_credit_balance and
+    debited locally when orders are placed, so that budget checks before ordering do
+    not need a request.
+
+    Balances are reconciled against the server once they are older than
+    reconcile_interval seconds or once more than drift_threshold credits were debited
+    locally since the last reconciliation.
+
+    The ledger is thread-safe. Passing a file path shares the ledger between
+    processes, debits are then serialized by SQLite.
+
+    Attach the ledger to OtmV2 and OrdersV2 to debit orders automatically, tasking
+    orders with their price from OtmV2.get_price and imagery orders with the prices of
+    their items' collections from the contract's pricebook:
+
+        ledger = CreditLedger(client.id_v2, contracts=client.contracts_v1)
+        client.otm_v2.ledger = client.orders_v2.ledger = ledger
+
+    Debiting placed orders never raises, failures are logged instead.
+    """
+
+    path: str
+    reconcile_interval: Optional[float]
+    drift_threshold: Optional[float]
+
+    def __init__(
+        self,
+        id_api: "IdV2",
+        path: str = ":memory:",
+        *,
+        reconcile_interval: Optional[float] = 300.0,
+        drift_threshold: Optional[float] = None,
+        contracts: Optional["ContractsV1"] = None,
+    ):
+        """
+        Args:
+            id_api: IdV2 instance used to fetch balances, e.g. client.id_v2.
+
+            path: Path of the SQLite database file shared between processes.
+            Defaults to an in-memory database private to this ledger.
+
+            reconcile_interval: Maximum age of balances in seconds, or None to only
+            reconcile explicitly. Defaults to 5 minutes.
+
+            drift_threshold: Optional amount of credits debited locally after which
+            balances are reconciled.
+
+            contracts: ContractsV1 instance whose pricebooks price imagery orders,
+            e.g. client.contracts_v1. Imagery orders are not debited without it.
+        """
+        self.id_api = id_api
+        self.contracts = contracts
+        self.path = path
+        self.reconcile_interval = reconcile_interval
+        self.drift_threshold = drift_threshold
+        self._lock = Lock()
+        self._conn = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+        fork.register(self)
+
+    def _after_fork(self):
+        self._conn = fork.reconnect_sqlite(
+            self._conn, self.path, check_same_thread=False, isolation_level=None
+        )
+
+    def _get(self, contract_id: str) -> Optional[Balance]:
+        row = self._conn.execute(
+            "SELECT contract_id, currency, balance, debited, reconciled_at "
+            "FROM balances WHERE contract_id = ?",
+            (contract_id,),
+        ).fetchone()
+        return Balance(*row) if row else None
+
+    def _is_stale(self, balance: Optional[Balance]) -> bool:
+        if balance is None:
+            return True
+        if (
+            self.reconcile_interval is not None
+            and time() - balance.reconciled_at > self.reconcile_interval
+        ):
+            return True
+        return (
+            self.drift_threshold is not None and balance.debited > self.drift_threshold
+        )
+
+    def reconcile(self, contract_id: Union[UUID, str]) -> Balance:
+        """
+        Replaces the local balance of a contract with the server's balance.
+        """
+        response = self.id_api.get_credit_balance(contract_id)
+        balance = Balance(
+            str(contract_id),
+            response.get("currency"),
+            response["balance"],
+            0.0,
+            time(),
+        )
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO balances VALUES (?, ?, ?, ?, ?)",
+                (
+                    balance.contract_id,
+                    balance.currency,
+                    balance.balance,
+                    balance.debited,
+                    balance.reconciled_at,
+                ),
+            )
+        return balance
+
+    def balance(self, contract_id: Union[UUID, str]) -> Balance:
+        """
+        Returns the local balance of a contract, reconciling it first if needed.
+        """
+        with self._lock:
+            balance = self._get(str(contract_id))
+        if self._is_stale(balance):
+            balance = self.reconcile(contract_id)
+        return balance
+
+    def can_afford(self, contract_id: Union[UUID, str], amount: float) -> bool:
+        return self.balance(contract_id).balance >= amount
+
+    def check(self, contract_id: Union[UUID, str], amount: float):
+        """
+        Raises InsufficientCreditError if the contract's balance is below amount.
+        """
+        balance = self.balance(contract_id)
+        if balance.balance < amount:
+            raise InsufficientCreditError(
+                f"Balance of {balance.balance} for contract {contract_id} is below "
+                f"{amount}"
+            )
+
+    def debit(self, contract_id: Union[UUID, str], amount: float) -> Optional[Balance]:
+        """
+        Debits an amount from the local balance of a contract, without reconciling
+        it: debits follow orders the server has already accounted for, so a balance
+        fetched now would already include them. Contracts without a local balance are
+        not debited and None is returned, as they are seeded from the server later.
+        """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "UPDATE balances SET balance = balance - ?, debited = debited + ? "
+                    "WHERE contract_id = ?",
+                    (amount, amount, str(contract_id)),
+                )
+                balance = self._get(str(contract_id))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return balance
+
+    def product_price(
+        self, contract_id: Union[UUID, str], product: str
+    ) -> Optional[float]:
+        """
+        Returns the pricebook price of a tasking product, or None if it is not priced
+        or there is no contracts API to price it with.
+        """
+        if self.contracts is None:
+            return None
+        return self.contracts.get_pricebook_index(contract_id).product_price(product)
+
+    def item_order_price(
+        self, contract_id: Union[UUID, str], order: Dict[str, Any]
+    ) -> Optional[float]:
+        """
+        Returns the price of an imagery order as returned by OrdersV2.submit, the sum
+        of the pricebook prices of its items' collections, or None if any item's
+        collection is not priced or there is no contracts API to price it with.
+        """
+        if self.contracts is None:
+            return None
+        index = self.contracts.get_pricebook_index(contract_id)
+        prices = [
+            index.collection_price(feature.get("collection"))
+            for feature in order.get("features") or []
+        ]
+        if not prices or any(price is None for price in prices):
+            return None
+        return sum(prices)
+
+    def debit_order(
+        self,
+        contract_id: Union[UUID, str],
+        price: Callable[[], Optional[float]],
+    ) -> Optional[Balance]:
+        """
+        Debits the price of a placed order, returned by calling price. Errors are
+        logged and not raised, so that they never hide an order the server accepted,
+        and orders without a price are logged as not debited.
+        """
+        try:
+            amount = price()
+            if amount is None:
+                logger.warning(
+                    "Order for contract %s has no price and is not debited", contract_id
+                )
+                return None
+            return self.debit(contract_id, amount)
+        except Exception:
+            logger.exception("Failed to debit order for contract %s", contract_id)
+            return None
+
+    def close(self):
+        self._conn.close()
@@ -0,0 +1,206 @@
+from allure import description, title, suite
+from json import dumps, loads
+from unittest.mock import Mock, patch
+from uuid import uuid4
+
+from mocket import Mocket
+from mocket.mockhttp import Entry
+from pytest import fixture, mark, raises
+
+from .apis.cache import TTLCache
+from .apis.contracts import PricebookIndex
+from .ledger import CreditLedger, InsufficientCreditError, order_price
+
+
+@fixture
+def id_api():
+    id_api = Mock()
+    id_api.get_credit_balance.return_value = {"currency": "GBP", "balance": 1000}
+    return id_api
+
+
+@suite("Credit Ledger")
+class TestCreditLedger:
+    @title("Local debits")
+    @description("Balances are seeded once and debited locally")
+    def test_debit(self, id_api):
+        ledger = CreditLedger(id_api)
+
+        unseeded = ledger.debit("contract", 100)
+        ledger.balance("contract")
+        ledger.debit("contract", 300)
+        ledger.debit_order("contract", lambda: 200)
+
+        assert unseeded is None
+        assert ledger.balance("contract").balance == 500
+        assert ledger.can_afford("contract", 500)
+        with raises(InsufficientCreditError):
+            ledger.check("contract", 501)
+        id_api.get_credit_balance.assert_called_once_with("contract")
+
+    @title("Reconcile on drift")
+    @description("Balances are reconciled once local debits exceed the threshold")
+    def test_drift_threshold(self, id_api):
+        ledger = CreditLedger(id_api, drift_threshold=250)
+
+        ledger.balance("contract")
+        ledger.debit("contract", 200)
+        ledger.debit("contract", 100)
+
+        assert ledger.balance("contract").balance == 1000
+        assert id_api.get_credit_balance.call_count == 2
+
+    @title("Reconcile on interval")
+    @description("Balances are reconciled once they are older than the interval")
+    def test_reconcile_interval(self, id_api):
+        ledger = CreditLedger(id_api, reconcile_interval=60)
+
+        with patch("satellitevu.ledger.time", return_value=1000.0):
+            ledger.balance("contract")
+            ledger.debit("contract", 100)
+        with patch("satellitevu.ledger.time", return_value=1059.0):
+            assert ledger.balance("contract").balance == 900
+        with patch("satellitevu.ledger.time", return_value=1061.0):
+            assert ledger.balance("contract").balance == 1000
+
+    @title("Shared ledger")
+    @description("Ledgers using the same file share balances")
+    def test_shared(self, id_api, tmp_path):
+        path = str(tmp_path / "ledger.sqlite")
+        first, second = CreditLedger(id_api, path), CreditLedger(id_api, path)
+
+        first.balance("contract")
+        first.debit("contract", 100)
+        second.debit("contract", 100)
+
+        assert first.balance("contract").balance == 800
+        id_api.get_credit_balance.assert_called_once()
+
+    @title("Order prices")
+    @description("Prices of tasking and imagery orders are found")
+    @mark.parametrize(
+        "order, expected",
+        (
+            ({"price": {"currency": "GBP", "base": 10, "total": 12}}, 12),
+            ({"price": {"currency": "GBP", "value": 2}}, 2),
+            ({"properties": {"price": {"value": 3}}}, 3),
+            ({"features": [{"properties": {"price": {"value": 2}}}] * 2}, 4),
+            ({"features": []}, None),
+        ),
+    )
+    def test_order_price(self, order, expected):
+        assert order_price(order) == expected
+
+    @title("Debit submitted orders")
+    @description("Imagery orders are debited with their pricebook prices")
+    def test_submit(self, client, oauth_token_entry, id_api):
+        contract_id = str(uuid4())
+        contracts = Mock()
+        contracts.get_pricebook_index.return_value = PricebookIndex.build(
+            contract_id,
+            [
+                {
+                    "code": "visual-archive",
+                    "collections": ["visual"],
+                    "price": {"value": 25, "currency": "GBP"},
+                }
+            ],
+        )
+        ledger = CreditLedger(id_api, contracts=contracts)
+        ledger.balance(contract_id)
+        client.orders_v2.ledger = ledger
+        order = {"id": "order", "features": [{"id": "item", "collection": "visual"}]}
+
+        Entry.single_register(
+            "POST",
+            client._gateway_url + f"orders/v2/{contract_id}/",
+            body=dumps(order),
+            status=201,
+        )
+
+        client.orders_v2.submit(contract_id=contract_id, item_ids="item")
+
+        assert ledger.balance(contract_id).balance == 975
+        id_api.get_credit_balance.assert_called_once()
+
+    @title("Debit tasking orders")
+    @description("Tasking orders are debited with their quoted price")
+    def test_create_order(
+        self, client, oauth_token_entry, id_api, otm_request_parameters
+    ):
+        contract_id = otm_request_parameters["contract_id"]
+        ledger = CreditLedger(id_api)
+        ledger.balance(contract_id)
+        client.otm_v2.ledger = ledger
+        base = client._gateway_url + f"otm/v2/{contract_id}/tasking/"
+        Entry.single_register(
+            "POST", base + "orders/", body=dumps({"id": "order"}), status=201
+        )
+        Entry.single_register(
+            "POST",
+            base + "price/",
+            body=dumps({"price": {"value": 120, "currency": "GBP"}}),
+        )
+
+        client.otm_v2.create_order(**otm_request_parameters)
+
+        assert ledger.balance(contract_id).balance == 880
+        quote = loads(Mocket.last_request().body)
+        assert quote["properties"]["addon:withhold"] == "0d"
+
+    @title("Debit tasking orders without quotes")
+    @description("Tasking orders are priced from the pricebook or cached quotes first")
+    def test_create_order_cached_price(
+        self, client, oauth_token_entry, id_api, otm_request_parameters
+    ):
+        contract_id = otm_request_parameters["contract_id"]
+        contracts = Mock()
+        contracts.get_pricebook_index.return_value = PricebookIndex.build(
+            contract_id, [{"code": "assured", "price": {"value": 300}}]
+        )
+        ledger = CreditLedger(id_api, contracts=contracts)
+        ledger.balance(contract_id)
+        client.otm_v2.ledger = ledger
+        client.otm_v2.price_cache = TTLCache()
+        base = client._gateway_url + f"otm/v2/{contract_id}/tasking/"
+        Entry.single_register(
+            "POST", base + "orders/", body=dumps({"id": "order"}), status=201
+        )
+        Entry.single_register(
+            "POST",
+            base + "price/",
+            body=dumps({"price": {"value": 120, "currency": "GBP"}}),
+        )
+
+        parameters = {**otm_request_parameters}
+        withhold = parameters.pop("addon_withhold")
+        client.otm_v2.get_price(**parameters, **{"addon:withhold": withhold})
+        client.otm_v2.create_order(**otm_request_parameters)
+        client.otm_v2.create_order(
+            contract_id=contract_id, product="assured", signature="token"
+        )
+
+        assert ledger.balance(contract_id).balance == 580
+        paths = [request.path for request in Mocket.request_list()]
+        assert sum(path.endswith("/price/") for path in paths) == 1
+
+    @title("Ledger failures")
+    @description("Failing debits are logged and never hide a placed order")
+    def test_debit_failures(self, client, oauth_token_entry, id_api, caplog):
+        contract_id = str(uuid4())
+        id_api.get_credit_balance.side_effect = ConnectionError("offline")
+        client.orders_v2.ledger = CreditLedger(id_api)
+        Entry.single_register(
+            "POST",
+            client._gateway_url + f"orders/v2/{contract_id}/",
+            body=dumps({"id": "order", "features": []}),
+            status=201,
+        )
+
+        response = client.orders_v2.submit(contract_id=contract_id, item_ids="item")
+
+        assert response.status == 201
+        assert client.orders_v2.ledger.debit_order(contract_id, lambda: 1 / 0) is None
+        assert "has no price" in caplog.text
+        assert "Failed to debit order" in caplog.text
+        id_api.get_credit_balance.assert_not_called()
@@ -0,0 +1,229 @@
+import json
+import re
+from typing import Any, ClassVar, Dict, Iterable, List, Optional, Tuple, Type, Union
+
+from satellitevu.http import codec
+
+_decoder = json.JSONDecoder()
+_whitespace = re.compile(r"[ \t\n\r]*")
+
+
+def _expect(text: str, idx: int, char: str) -> int:
+    # Index of the first token after char, which has to be next in text
+    if text[idx : idx + 1] != char:
+        raise json.JSONDecodeError(f"Expecting {char!r}", text, idx)
+    return _whitespace.match(text, idx + 1).end()
+
+
+def _split_features(
+    raw: Union[bytes, str],
+) -> Tuple[Dict[str, Any], Optional[List[Tuple[bytes, Dict[str, Any]]]]]:
+    """
+    Decodes a JSON object with a features array, returning its other members and the
+    JSON text of each feature together with its decoded value, or None for features
+    if the object has no features array.
+    """
+    text = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+    members: Dict[str, Any] = {}
+    features = None
+    idx = _expect(text, _whitespace.match(text).end(), "{")
+    while text[idx : idx + 1] != "}":
+        if members or features is not None:
+            idx = _expect(text, idx, ",")
+        key, idx = _decoder.raw_decode(text, idx)
+        idx = _expect(text, _whitespace.match(text, idx).end(), ":")
+        if key == "features" and text[idx : idx + 1] == "[":
+            features = []
+            idx = _expect(text, idx, "[")
+            while text[idx : idx + 1] != "]":
+                if features:
+                    idx = _expect(text, idx, ",")
+                value, end = _decoder.raw_decode(text, idx)
+                features.append((text[idx:end].encode("utf-8"), value))
+                idx = _whitespace.match(text, end).end()
+            idx = _expect(text, idx, "]")
+        else:
+            members[key], idx = _decoder.raw_decode(text, idx)
+            idx = _whitespace.match(text, idx).end()
+    return members, features
+
+
+class Model:
+    """
+    Read-only view of a JSON object returned by the APIs, keeping the object's raw
+    JSON bytes instead of nested dictionaries. Small top-level fields listed in
+    _eager are decoded on construction. Nested fields listed in _lazy are decoded
+    together on first access of any of them and then read from their slots. Use
+    to_dict for the full object.
+
+    Create models from API results, e.g.:
+
+        items = Item.from_collection(client.catalog_v1.search(...).content)
+    """
+
+    __slots__ = ("_raw",)
+
+    _eager: ClassVar[Tuple[str, ...]] = ()
+    _lazy: ClassVar[Tuple[str, ...]] = ()
+
+    def __init__(self, raw: bytes, data: Optional[Dict[str, Any]] = None):
+        """
+        Args:
+            raw: JSON encoded object.
+
+            data: Optional decoded object, to avoid decoding raw again.
+        """
+        self._raw = raw
+        if data is None:
+            data = codec.loads(raw)
+        for name in self._eager:
+            setattr(self, name, data.get(name))
+
+    def __getattr__(self, name: str) -> Any:
+        # Only called for unset slots, so lazy fields are decoded on first access and
+        # read straight from their slots afterwards
+        if name not in type(self)._lazy:
+            raise AttributeError(
+                f"{type(self).__name__!r} object has no attribute {name!r}"
+            )
+        self._decode()
+        return getattr(self, name)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]):
+        return cls(codec.dumps(data), data)
+
+    @classmethod
+    def from_json(cls, raw: Union[bytes, str]):
+        if isinstance(raw, str):
+            raw = raw.encode("utf-8")
+        return cls(raw)
+
+    @classmethod
+    def many(cls, objects: Iterable[Dict[str, Any]]) -> List["Model"]:
+        return [cls.from_dict(obj) for obj in objects]
+
+    def _decode(self):
+        data = codec.loads(self._raw)
+        for name in self._lazy:
+            setattr(self, name, data.get(name))
+
+    @property
+    def raw(self) -> bytes:
+        return self._raw
+
+    def to_dict(self) -> Dict[str, Any]:
+        return codec.loads(self._raw)
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, Model):
+            return NotImplemented
+        return type(self) is type(other) and self._raw == other._raw
+
+    def __hash__(self) -> int:
+        return hash(self._raw)
+
+    def __repr__(self) -> str:
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._eager)
+        return f"{type(self).__name__}({fields})"
+
+
+class Feature(Model):
+    """
+    GeoJSON feature.
+    """
+
+    __slots__ = ("id", "type", "bbox", "geometry", "properties", "links")
+
+    _eager = ("id", "type")
+    _lazy = ("bbox", "geometry", "properties", "links")
+
+    @classmethod
+    def from_collection(cls, raw: Union[bytes, str]) -> List["Feature"]:
+        """
+        Creates models for the features of a JSON encoded feature collection, e.g. a
+        search response body, keeping each feature's JSON as sent instead of encoding
+        the decoded feature again.
+        """
+        return [cls(feature, data) for feature, data in _split_features(raw)[1] or ()]
+
+
+class Item(Feature):
+    """
+    STAC item as returned by CatalogV1 searches.
+    """
+
+    __slots__ = ("collection", "assets")
+
+    _eager = ("id", "type", "collection")
+    _lazy = Feature._lazy + ("assets",)
+
+
+class FeasibilityRequest(Feature):
+    """
+    Tasking feasibility request as returned by OtmV2.post_feasibility and
+    OtmV2.get_feasibility.
+    """
+
+    __slots__ = ()
+
+    @property
+    def status(self) -> Optional[str]:
+        return (self.properties or {}).get("status")
+
+
+class TaskingOrder(Feature):
+    """
+    Tasking order as returned by OtmV2.get_order and OtmV2.create_order.
+    """
+
+    __slots__ = ("contract_id",)
+
+    _eager = ("id", "type", "contract_id")
+
+    @property
+    def status(self) -> Optional[str]:
+        return (self.properties or {}).get("status")
+
+
+class FeatureCollection(Model):
+    """
+    GeoJSON feature collection, whose features are decoded into feature_class models
+    on first access, each keeping its own part of the collection's JSON.
+    """
+
+    __slots__ = ("id", "type", "bbox", "features", "links")
+
+    _eager = ("id", "type")
+    _lazy = ("bbox", "features", "links")
+
+    feature_class: ClassVar[Type[Feature]] = Feature
+
+    def _decode(self):
+        data, features = _split_features(self._raw)
+        for name in self._lazy:
+            setattr(self, name, data.get(name))
+        if features is not None:
+            self.features = [self.feature_class(raw, value) for raw, value in features]
+
+
+class FeasibilityResponse(FeatureCollection):
+    """
+    Opportunities found by a feasibility request as returned by
+    OtmV2.get_feasibility_response.
+    """
+
+    __slots__ = ()
+
+
+class Order(FeatureCollection):
+    """
+    Imagery order as returned by OrdersV2.get_order_details, with the ordered items
+    as features.
+    """
+
+    __slots__ = ("contract_id", "owned_by", "created_at")
+
+    _eager = ("id", "type", "contract_id", "owned_by", "created_at")
+
+    feature_class = Item
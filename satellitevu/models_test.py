@@ -0,0 +1,133 @@
+import json
+import tracemalloc
+from allure import description, title, suite
+from copy import deepcopy
+
+from pytest import raises
+
+from .http import codec
+from .models import FeasibilityResponse, Item, Order, TaskingOrder
+
+
+def item(id: str):
+    return {
+        "type": "Feature",
+        "id": id,
+        "collection": "visual",
+        "bbox": [0.0, 0.0, 1.0, 1.0],
+        "geometry": {
+            "type": "Polygon",
+            "coordinates": [[[0, 0], [1, 0], [1, 1], [0, 1], [0, 0]]],
+        },
+        "properties": {
+            "datetime": "2024-01-01T00:00:00Z",
+            "eo:cloud_cover": 5.5,
+            "view:off_nadir": 12.25,
+            "platform": "hotsat-1",
+        },
+        "assets": {
+            "thumbnail": {"href": f"https://example.com/{id}.png", "roles": ["x"]},
+            "visual": {"href": f"https://example.com/{id}.tif", "roles": ["data"]},
+        },
+        "links": [{"rel": "self", "href": f"https://example.com/{id}"}],
+    }
+
+
+@suite("Models")
+class TestModels:
+    @title("Lazy fields")
+    @description("Nested fields are decoded on first access")
+    def test_lazy(self):
+        model = Item.from_dict(item("a"))
+
+        assert model.id == "a"
+        assert model.collection == "visual"
+        assert model.properties["eo:cloud_cover"] == 5.5
+        assert model.properties is model.properties
+        assert model.assets["visual"]["roles"] == ["data"]
+        assert model.to_dict() == item("a")
+        assert Item.from_json(model.raw) == model
+        with raises(AttributeError):
+            model.extra = True
+        with raises(AttributeError):
+            model.extra
+
+    @title("Single decode")
+    @description("Lazy fields are decoded together on first access of any of them")
+    def test_single_decode(self, monkeypatch):
+        model = Item.from_dict(item("a"))
+        calls = []
+        loads = codec.loads
+        monkeypatch.setattr(codec, "loads", lambda raw: calls.append(raw) or loads(raw))
+
+        assert model.geometry["type"] == "Polygon"
+        assert model.bbox == [0.0, 0.0, 1.0, 1.0]
+        assert model.assets["thumbnail"]["roles"] == ["x"]
+        assert model.links[0]["rel"] == "self"
+        assert len(calls) == 1
+
+    @title("Models from collections")
+    @description("Features keep their own JSON from the collection's body")
+    def test_from_collection(self):
+        body = json.dumps(
+            {"type": "FeatureCollection", "features": [item("a"), item("ä")]},
+            indent=2,
+            ensure_ascii=False,
+        ).encode("utf-8")
+
+        models = Item.from_collection(body)
+
+        assert [m.id for m in models] == ["a", "ä"]
+        assert models[1].raw == json.dumps(
+            item("ä"), indent=2, ensure_ascii=False
+        ).replace("\n", "\n    ").encode("utf-8")
+        assert models[1].to_dict() == item("ä")
+        assert Item.from_collection(b'{"features": []}') == []
+        assert Item.from_collection(b'{"type": "FeatureCollection"}') == []
+        with raises(ValueError):
+            Item.from_collection(b'{"features": [{}')
+
+    @title("Feature collections")
+    @description("Features of collections are decoded into models")
+    def test_collections(self, otm_feasibility_response_body):
+        response = FeasibilityResponse.from_dict(otm_feasibility_response_body)
+        order = Order.from_dict(
+            {
+                "id": "order",
+                "type": "FeatureCollection",
+                "contract_id": "contract",
+                "features": [item("a"), item("b")],
+            }
+        )
+
+        assert response.features[0].properties["max_gsd"] == 6.8
+        assert order.contract_id == "contract"
+        assert [f.collection for f in order.features] == ["visual", "visual"]
+        assert order.features[1] == Item.from_dict(item("b"))
+        assert order.bbox is None
+
+    @title("Tasking order status")
+    def test_tasking_order(self, otm_response):
+        order = TaskingOrder.from_dict(otm_response)
+
+        assert order.contract_id == otm_response["contract_id"]
+        assert order.status == "feasible"
+
+    @title("Memory use")
+    @description("Models use less memory than dictionaries")
+    def test_memory(self):
+        pages = [item(str(i)) for i in range(1000)]
+
+        tracemalloc.start()
+        try:
+            start = tracemalloc.get_traced_memory()[0]
+            dicts = deepcopy(pages)
+            dicts_size = tracemalloc.get_traced_memory()[0] - start
+            start = tracemalloc.get_traced_memory()[0]
+            models = Item.many(pages)
+            models_size = tracemalloc.get_traced_memory()[0] - start
+        finally:
+            tracemalloc.stop()
+
+        assert len(dicts) == len(models)
+        assert models_size * 2 < dicts_size
@@ -0,0 +1,233 @@
+import json
+import sqlite3
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+from uuid import UUID
+
+from satellitevu import fork
+from satellitevu.apis.helpers import parse_datetime, parse_interval
+from satellitevu.fork import Lock
+from satellitevu.geometry import bbox, contains_point
+
+if TYPE_CHECKING:
+    from satellitevu.apis.otm import OtmV2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    rowid INTEGER PRIMARY KEY,
+    id TEXT NOT NULL UNIQUE,
+    contract_id TEXT NOT NULL,
+    collection TEXT,
+    status TEXT,
+    product TEXT,
+    date_from REAL,
+    date_to REAL,
+    updated_at REAL,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_status ON items (contract_id, status);
+CREATE INDEX IF NOT EXISTS items_window ON items (contract_id, date_from, date_to);
+CREATE INDEX IF NOT EXISTS items_product ON items (contract_id, product);
+CREATE VIRTUAL TABLE IF NOT EXISTS items_rtree USING rtree (
+    rowid, min_x, max_x, min_y, max_y
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    contract_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class OtmStore:
+    """
+    Local store of OTM feasibility requests and orders, kept in sync with OtmV2.search
+    and indexed by geometry (R*Tree), status, datetime window and product.
+
+    Answers questions like "which pending orders cover this point and time window"
+    without a round-trip to the API.
+    """
+
+    path: str
+
+    def __init__(self, path: str = ":memory:"):
+        """
+        Args:
+            path: Path of the SQLite database file. Defaults to an in-memory database.
+        """
+        self.path = path
+        self._lock = Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+        fork.register(self)
+
+    def _after_fork(self):
+        self._conn = fork.reconnect_sqlite(
+            self._conn, self.path, check_same_thread=False
+        )
+
+    def upsert(
+        self, items: Iterable[Dict], contract_id: Optional[Union[UUID, str]] = None
+    ) -> int:
+        """
+        Adds or replaces feasibility requests and orders as returned by OtmV2.search or
+        OtmV2.list_orders. Returns the number of items stored.
+
+        Args:
+            items: Iterable of dictionaries containing properties of each item.
+
+            contract_id: Optional contract for items not specifying their contract.
+        """
+        count = 0
+        with self._lock, self._conn:
+            for item in items:
+                properties = item.get("properties") or {}
+                date_from, date_to = parse_interval(properties.get("datetime"))
+                updated_at = parse_datetime(properties.get("updated_at"))
+                item_contract_id = str(item.get("contract_id") or contract_id or "")
+
+                row = self._conn.execute(
+                    "SELECT rowid FROM items WHERE id = ?", (item["id"],)
+                ).fetchone()
+                if row:
+                    self._conn.execute("DELETE FROM items_rtree WHERE rowid = ?", row)
+                    self._conn.execute("DELETE FROM items WHERE rowid = ?", row)
+                cursor = self._conn.execute(
+                    "INSERT INTO items (id, contract_id, collection, status, product, "
+                    "date_from, date_to, updated_at, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        item["id"],
+                        item_contract_id,
+                        item.get("collection"),
+                        properties.get("status") or item.get("status"),
+                        properties.get("product"),
+                        date_from,
+                        date_to,
+                        updated_at,
+                        json.dumps(item),
+                    ),
+                )
+                if item.get("geometry"):
+                    min_x, min_y, max_x, max_y = bbox(item["geometry"])
+                    self._conn.execute(
+                        "INSERT INTO items_rtree VALUES (?, ?, ?, ?, ?)",
+                        (cursor.lastrowid, min_x, max_x, min_y, max_y),
+                    )
+                if updated_at is not None:
+                    self._conn.execute(
+                        "INSERT INTO watermarks (contract_id, updated_at) "
+                        "VALUES (?, ?) ON CONFLICT (contract_id) DO UPDATE SET "
+                        "updated_at = MAX(updated_at, excluded.updated_at)",
+                        (item_contract_id, updated_at),
+                    )
+                count += 1
+        return count
+
+    def watermark(self, contract_id: Union[UUID, str]) -> Optional[datetime]:
+        """
+        Returns the most recent updated_at of all items stored for a contract.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at FROM watermarks WHERE contract_id = ?",
+                (str(contract_id),),
+            ).fetchone()
+        return datetime.fromtimestamp(row[0], tz=timezone.utc) if row else None
+
+    def sync(self, otm: "OtmV2", contract_id: Union[UUID, str], **kwargs) -> int:
+        """
+        Fetches all feasibility requests and orders of a contract which were updated
+        since the last sync. Returns the number of items fetched.
+
+        Args:
+            otm: OtmV2 instance used to search, e.g. client.otm_v2.
+
+            contract_id: Associated ID of the Contract to sync.
+
+        Kwargs:
+            Additional parameters passed to OtmV2.iter_search.
+        """
+        watermark = self.watermark(contract_id)
+        if watermark is not None:
+            now = datetime.now(tz=timezone.utc)
+            kwargs["updated_at"] = f"{watermark.isoformat()}/{now.isoformat()}"
+
+        return self.upsert(otm.iter_search(str(contract_id), **kwargs), contract_id)
+
+    def covering(
+        self,
+        coordinates: Tuple[float, float],
+        *,
+        contract_id: Optional[Union[UUID, str]] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        statuses: Optional[Iterable[str]] = None,
+        collections: Optional[Iterable[str]] = None,
+        product: Optional[str] = None,
+        tolerance: float = 1e-6,
+    ) -> List[Dict]:
+        """
+        Returns stored items whose geometry covers a point and whose datetime window
+        overlaps the given time window.
+
+        Args:
+            coordinates: Point as (longitude, latitude).
+
+            contract_id: Optional contract the items must belong to.
+
+            date_from: Optional start of the time window.
+
+            date_to: Optional end of the time window.
+
+            statuses: Optional statuses the items must have, e.g. ["pending"].
+
+            collections: Optional collections the items must belong to, e.g.
+            ["orders"].
+
+            product: Optional product the items must have, e.g. "standard".
+
+            tolerance: Distance in degrees within which point geometries are
+            considered to cover the given point. Defaults to 1e-6.
+
+        Returns:
+            A list of dictionaries as returned by OtmV2.search.
+        """
+        x, y = coordinates[0], coordinates[1]
+        query = [
+            "SELECT items.body FROM items_rtree JOIN items "
+            "ON items.rowid = items_rtree.rowid "
+            "WHERE min_x <= ? AND max_x >= ? AND min_y <= ? AND max_y >= ?"
+        ]
+        params = [x + tolerance, x - tolerance, y + tolerance, y - tolerance]
+
+        if contract_id is not None:
+            query.append("items.contract_id = ?")
+            params.append(str(contract_id))
+        if date_from is not None:
+            query.append("(items.date_to IS NULL OR items.date_to >= ?)")
+            params.append(parse_datetime(date_from))
+        if date_to is not None:
+            query.append("(items.date_from IS NULL OR items.date_from <= ?)")
+            params.append(parse_datetime(date_to))
+        for column, values in (("status", statuses), ("collection", collections)):
+            if values is not None:
+                values = list(values)
+                query.append(f"items.{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        if product is not None:
+            query.append("items.product = ?")
+            params.append(product)
+
+        with self._lock:
+            rows = self._conn.execute(" AND ".join(query), params).fetchall()
+
+        items = (json.loads(body) for (body,) in rows)
+        return [
+            item
+            for item in items
+            if contains_point(item["geometry"], x, y, tolerance=tolerance)
+        ]
+
+    def close(self):
+        self._conn.close()
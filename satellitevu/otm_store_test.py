@@ -0,0 +1,114 @@
+from allure import description, title, suite
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock
+
+from pytest import fixture, mark
+
+from .otm_store import OtmStore
+
+NOW = datetime(2024, 5, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _item(id, geometry, status="pending", collection="orders", days=(0, 7)):
+    date_from, date_to = (NOW + timedelta(days=d) for d in days)
+    return {
+        "type": "Feature",
+        "id": id,
+        "contract_id": "contract",
+        "collection": collection,
+        "geometry": geometry,
+        "properties": {
+            "datetime": f"{date_from.isoformat()}/{date_to.isoformat()}",
+            "status": status,
+            "product": "standard",
+            "updated_at": "2024-05-01T12:00:00Z",
+        },
+    }
+
+
+@fixture
+def store():
+    store = OtmStore()
+    store.upsert(
+        [
+            _item("point", {"type": "Point", "coordinates": [10.0, 50.0]}),
+            _item(
+                "polygon",
+                {
+                    "type": "Polygon",
+                    "coordinates": [[[0, 0], [2, 0], [2, 2], [0, 2], [0, 0]]],
+                },
+                status="committed",
+                collection="feasibility",
+                days=(10, 20),
+            ),
+        ]
+    )
+    yield store
+    store.close()
+
+
+@suite("OTM Store")
+class TestOtmStore:
+    @title("Covering items")
+    @description("Items covering a point and overlapping a time window are found")
+    @mark.parametrize(
+        "coordinates, kwargs, expected",
+        (
+            ((10.0, 50.0), {}, ["point"]),
+            ((10.1, 50.0), {}, []),
+            ((1.0, 1.0), {}, ["polygon"]),
+            ((3.0, 1.0), {}, []),
+            ((10.0, 50.0), {"statuses": ["pending"]}, ["point"]),
+            ((10.0, 50.0), {"statuses": ["failed"]}, []),
+            ((1.0, 1.0), {"collections": ["orders"]}, []),
+            ((1.0, 1.0), {"product": "standard"}, ["polygon"]),
+            (
+                (1.0, 1.0),
+                {"date_from": NOW, "date_to": NOW + timedelta(days=5)},
+                [],
+            ),
+            (
+                (1.0, 1.0),
+                {"date_from": NOW + timedelta(days=15)},
+                ["polygon"],
+            ),
+        ),
+    )
+    def test_covering(self, store, coordinates, kwargs, expected):
+        items = store.covering(coordinates, **kwargs)
+
+        assert [item["id"] for item in items] == expected
+
+    @title("Replace items")
+    @description("Updated items replace stored items and their index entries")
+    def test_upsert_replace(self, store):
+        store.upsert([_item("point", {"type": "Point", "coordinates": [20.0, 50.0]})])
+
+        assert store.covering((10.0, 50.0)) == []
+        assert [item["id"] for item in store.covering((20.0, 50.0))] == ["point"]
+
+    @title("Incremental sync")
+    @description("Only items updated since the last sync are requested")
+    def test_sync(self, store):
+        otm = Mock()
+        otm.iter_search.return_value = iter([])
+
+        store.sync(otm, "contract", collections=["orders"])
+
+        _, kwargs = otm.iter_search.call_args
+        assert kwargs["collections"] == ["orders"]
+        assert kwargs["updated_at"].startswith("2024-05-01T12:00:00+00:00/")
+
+    @title("Initial sync")
+    @description("All items are requested for contracts without stored items")
+    def test_initial_sync(self):
+        otm = Mock()
+        otm.iter_search.return_value = iter(
+            [_item("point", {"type": "Point", "coordinates": [10.0, 50.0]})]
+        )
+        store = OtmStore()
+
+        assert store.sync(otm, "other-contract") == 1
+        assert "updated_at" not in otm.iter_search.call_args.kwargs
+        assert store.watermark("contract") == NOW
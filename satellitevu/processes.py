@@ -0,0 +1,122 @@
+"""
+Process pools with a Client per worker process, to spread CPU-heavy work on SDK
+results over all cores, e.g.:
+
+    from satellitevu.processes import ClientPoolExecutor, worker_client
+
+    def footprint_area(item_ids):
+        catalog = worker_client().catalog_v1
+        items = catalog.get_items(contract_id=contract_id, ids=item_ids)
+        return sum(area(item["geometry"]) for item in items.items)
+
+    with ClientPoolExecutor(client) as executor:
+        areas = list(executor.map(footprint_area, batches))
+
+Each worker creates its own client, with its own connections, when it starts. The
+workers' clients use the pool client's credentials and URLs and start with its warm
+state, so they reuse its valid tokens instead of requesting their own.
+"""
+
+from concurrent.futures import Future, ProcessPoolExecutor
+from functools import partial
+from secrets import token_bytes
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+from satellitevu import state
+from satellitevu.auth.cache import MemoryCache
+from satellitevu.client import Client
+
+_client: Optional[Client] = None
+
+
+def worker_client() -> Client:
+    """
+    Returns the client of the current worker process of a ClientPoolExecutor.
+    """
+    if _client is None:
+        raise RuntimeError("Not in a worker process of a ClientPoolExecutor")
+    return _client
+
+
+def _initialize(
+    kwargs: Dict[str, Any],
+    warm_state: bytes,
+    key: bytes,
+    initializer: Optional[Callable[..., Any]],
+    initargs: Tuple[Any, ...],
+):
+    global _client
+    _client = Client(cache=MemoryCache(), **kwargs)
+    state.loads(_client, warm_state, key=key)
+    if initializer is not None:
+        initializer(*initargs)
+
+
+def _call_with_client(fn: Callable[..., Any], *args, **kwargs) -> Any:
+    return fn(worker_client(), *args, **kwargs)
+
+
+class ClientPoolExecutor(ProcessPoolExecutor):
+    """
+    ProcessPoolExecutor whose worker processes each create a Client like client,
+    returned by worker_client in functions run by the pool.
+    """
+
+    def __init__(
+        self,
+        client: Client,
+        max_workers: Optional[int] = None,
+        *,
+        mp_context: Any = None,
+        initializer: Optional[Callable[..., Any]] = None,
+        initargs: Tuple[Any, ...] = (),
+    ):
+        """
+        Args:
+            client: Client whose credentials, URLs and warm state the workers'
+            clients are created with.
+
+            max_workers: Number of worker processes, defaults to the number of CPUs.
+
+            mp_context: Multiprocessing context starting the workers, see
+            ProcessPoolExecutor.
+
+            initializer: Optional callable run with initargs in each worker after
+            its client was created.
+        """
+        kwargs = {
+            key: value for key, value in client._auth_kwargs.items() if key != "cache"
+        }
+        kwargs["gateway_url"] = client._gateway_url
+        kwargs["contracts_cache_ttl"] = client._contracts_cache_ttl
+        # The warm state only lives as long as the pool, signed with a key of its own
+        key = token_bytes(32)
+        super().__init__(
+            max_workers,
+            mp_context,
+            initializer=_initialize,
+            initargs=(kwargs, state.dumps(client, key=key), key, initializer, initargs),
+        )
+
+    def submit_with_client(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """
+        Schedules fn(client, *args, **kwargs) with the worker's client.
+        """
+        return self.submit(_call_with_client, fn, *args, **kwargs)
+
+    def map_with_client(
+        self,
+        fn: Callable[..., Any],
+        *iterables: Iterable[Any],
+        timeout: Optional[float] = None,
+        chunksize: int = 1,
+    ) -> Iterator[Any]:
+        """
+        Like map, calling fn with the worker's client before the items of iterables.
+        """
+        return self.map(
+            partial(_call_with_client, fn),
+            *iterables,
+            timeout=timeout,
+            chunksize=chunksize,
+        )
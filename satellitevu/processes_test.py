@@ -0,0 +1,65 @@
+import os
+from multiprocessing import get_context, get_all_start_methods
+
+from allure import description, suite, title
+from pytest import fixture, mark, raises
+
+from satellitevu.auth.cache import MemoryCache
+from satellitevu.http import UrllibClient
+from satellitevu.testing.gateway import FakeGateway
+
+from .processes import ClientPoolExecutor, worker_client
+
+
+@fixture(autouse=True)
+def mocketize_fixture():
+    # The gateway is served over real sockets
+    yield
+
+
+def balance(contract_id):
+    return worker_client().id_v2.get_credit_balance(contract_id)["balance"]
+
+
+def search(client, contract_id, limit):
+    response = client.catalog_v1.search(contract_id=contract_id, limit=limit)
+    return os.getpid(), len(response.json()["features"])
+
+
+@suite("Process Pools")
+class TestProcesses:
+    @title("Worker clients")
+    @description("Workers make requests with their own clients and the pool's token")
+    @mark.parametrize(
+        "method", [m for m in ("fork", "spawn") if m in get_all_start_methods()]
+    )
+    def test_workers(self, method):
+        with FakeGateway(seed=5, items=20) as gateway:
+            client = gateway.client(cache=MemoryCache(), http_client=UrllibClient())
+            client.auth.token()
+            requests = gateway.requests
+
+            with ClientPoolExecutor(
+                client, max_workers=2, mp_context=get_context(method)
+            ) as executor:
+                balances = list(executor.map(balance, [gateway.contract_id] * 4))
+                results = list(
+                    executor.map_with_client(
+                        search, [gateway.contract_id] * 4, [1, 2, 3, 4]
+                    )
+                )
+                future = executor.submit_with_client(search, gateway.contract_id, 5)
+                results.append(future.result())
+
+            # Only API requests, the workers reuse the pool client's token
+            worker_requests = gateway.requests - requests
+
+        assert balances == [gateway.balance] * 4
+        assert [count for _, count in results] == [1, 2, 3, 4, 5]
+        assert os.getpid() not in {pid for pid, _ in results}
+        assert worker_requests == 9
+
+    @title("Worker client outside workers")
+    def test_not_a_worker(self):
+        with raises(RuntimeError):
+            worker_client()
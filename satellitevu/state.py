@@ -0,0 +1,173 @@
+"""
+Warm-state snapshots of a Client, for short-lived workers like AWS Lambda functions
+that would otherwise request a token and fetch contracts on every cold start, e.g.:
+
+    client = Client(client_id, client_secret, contracts_cache_ttl=3600)
+    client.load_state("/tmp/satellitevu.state")
+    ...
+    client.save_state("/tmp/satellitevu.state")
+
+A snapshot holds the client's unexpired access tokens and cached contracts and
+pricebooks. It is signed with HMAC-SHA256, keyed with the client secret unless a key
+is given, and only restored into a client with the same client ID, audience, auth and
+gateway URLs, before the snapshot's expiry.
+"""
+
+import hmac
+import os
+from hashlib import sha256
+from logging import getLogger
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import TYPE_CHECKING, Any, Dict, Optional, Set, Tuple, Union
+
+from satellitevu.auth.auth import is_expired_token
+from satellitevu.http import codec
+
+if TYPE_CHECKING:
+    from satellitevu.client import Client
+
+logger = getLogger(__file__)
+
+FORMAT = b"satellitevu-state/1"
+
+DEFAULT_TTL = 900.0
+
+# Contract cache entries holding plain JSON, pricebook indexes are rebuilt from these
+CONTRACT_ENTRIES = ("contracts", "contracts_by_id", "pricebook")
+
+APIS = ("contracts_v1", "catalog_v1", "id_v2", "orders_v2", "otm_v2")
+
+
+def _signing_key(client: "Client", key: Optional[bytes]) -> bytes:
+    if key is not None:
+        return key
+    secret = client._auth_kwargs["client_secret"]
+    return sha256(b"satellitevu-state:" + secret.encode("utf-8")).digest()
+
+
+def _identity(client: "Client") -> Dict[str, str]:
+    auth = client.auth
+    return {
+        "client_id": auth.client_id,
+        "audience": auth.audience,
+        "auth_url": auth.auth_url,
+        "gateway_url": client._gateway_url,
+    }
+
+
+def _scopes(client: "Client") -> Set[Tuple[str, ...]]:
+    # Tokens are cached per scopes, these are the scopes of the APIs in use
+    apis = vars(client)
+    return {()} | {tuple(apis[name].scopes) for name in APIS if name in apis}
+
+
+def dumps(
+    client: "Client", *, ttl: float = DEFAULT_TTL, key: Optional[bytes] = None
+) -> bytes:
+    """
+    Returns the signed warm state of client, expiring after ttl seconds.
+    """
+    now = time()
+    auth = client.auth
+
+    tokens = {}
+    for scopes in _scopes(client):
+        cache_key = auth._cache_key(auth.client_id, "".join(scopes))
+        token = auth.cache.load(cache_key)
+        if token and not is_expired_token(token):
+            tokens[cache_key] = token
+
+    contracts = []
+    contracts_v1 = vars(client).get("contracts_v1")
+    if contracts_v1 is not None and contracts_v1._cache is not None:
+        for cache_key, expires_in, value in contracts_v1._cache.items():
+            name = cache_key[0] if isinstance(cache_key, tuple) else cache_key
+            if name in CONTRACT_ENTRIES:
+                expires = now + expires_in if expires_in is not None else None
+                contracts.append([cache_key, expires, value])
+
+    state = {
+        **_identity(client),
+        "created": now,
+        "expires": now + ttl,
+        "tokens": tokens,
+        "contracts": contracts,
+    }
+    payload = codec.dumps(state)
+    signature = hmac.new(_signing_key(client, key), payload, sha256).hexdigest()
+    return FORMAT + b" " + signature.encode("ascii") + b"\n" + payload
+
+
+def loads(client: "Client", data: bytes, *, key: Optional[bytes] = None) -> bool:
+    """
+    Restores the warm state of client from data returned by dumps. Returns False
+    without changing client if data is invalid, expired or for a different client.
+    """
+    header, _, payload = data.partition(b"\n")
+    prefix, _, signature = header.partition(b" ")
+    if prefix != FORMAT:
+        logger.warning("Ignoring warm state of unknown format")
+        return False
+    expected = hmac.new(_signing_key(client, key), payload, sha256).hexdigest()
+    if not hmac.compare_digest(signature, expected.encode("ascii")):
+        logger.warning("Ignoring warm state failing its integrity check")
+        return False
+
+    state: Dict[str, Any] = codec.loads(payload)
+    now = time()
+    if state["expires"] <= now:
+        return False
+    if any(state.get(k) != v for k, v in _identity(client).items()):
+        logger.warning("Ignoring warm state of a different client")
+        return False
+
+    auth = client.auth
+    for cache_key, token in state["tokens"].items():
+        if not is_expired_token(token):
+            auth.cache.save(cache_key, token)
+
+    if state["contracts"] and client._contracts_cache_ttl:
+        cache = client.contracts_v1._cache
+        for cache_key, expires, value in state["contracts"]:
+            if expires is not None and expires <= now:
+                continue
+            if isinstance(cache_key, list):
+                cache_key = tuple(cache_key)
+            cache.set(cache_key, value, ttl=expires - now if expires else None)
+    return True
+
+
+def save(
+    client: "Client",
+    path: Union[str, os.PathLike],
+    *,
+    ttl: float = DEFAULT_TTL,
+    key: Optional[bytes] = None,
+):
+    """
+    Writes the warm state of client to path, readable only by the current user.
+    """
+    data = dumps(client, ttl=ttl, key=key)
+    directory = os.path.dirname(os.path.abspath(path))
+    with NamedTemporaryFile("wb", dir=directory, delete=False) as handle:
+        handle.write(data)
+    os.replace(handle.name, path)
+
+
+def load(
+    client: "Client",
+    path: Union[str, os.PathLike],
+    *,
+    key: Optional[bytes] = None,
+) -> bool:
+    """
+    Restores the warm state of client from path, see loads. Returns False if there is
+    no state at path.
+    """
+    try:
+        with open(path, "rb") as handle:
+            data = handle.read()
+    except FileNotFoundError:
+        return False
+    return loads(client, data, key=key)
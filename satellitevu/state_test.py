@@ -0,0 +1,109 @@
+from json import dumps
+from uuid import uuid4
+
+from allure import description, suite, title
+from mocket import Mocket
+from mocket.mockhttp import Entry
+from pytest import fixture, mark
+
+from satellitevu.client import Client
+
+from .conftest import MemoryCache
+
+
+@fixture
+def contract_id():
+    return str(uuid4())
+
+
+@fixture
+def warm_client(memory_cache, auth0_token_factory, contract_id):
+    client = Client(
+        client_id="mock-id",
+        client_secret="mock-secret",
+        cache=memory_cache,
+        contracts_cache_ttl=3600,
+    )
+    Entry.single_register(
+        "POST",
+        client.auth.auth_url + "oauth/token",
+        body=dumps({"access_token": auth0_token_factory("John Doe")}),
+    )
+    Entry.single_register(
+        "POST",
+        client._gateway_url + "policy/v1/contracts",
+        body=dumps(
+            {"result": [{"contract_id": contract_id, "allowed_collections": []}]}
+        ),
+    )
+    Entry.single_register(
+        "POST",
+        client._gateway_url + "policy/v1/policy/query/products",
+        body=dumps(
+            {
+                "result": [
+                    {"code": "standard", "price": {"value": 100, "currency": "GBP"}}
+                ]
+            }
+        ),
+    )
+    client.contracts_v1.get_contracts()
+    client.contracts_v1.get_contract_pricebook(contract_id)
+    return client
+
+
+def cold_client(**kwargs) -> Client:
+    return Client(
+        **{
+            "client_id": "mock-id",
+            "client_secret": "mock-secret",
+            "cache": MemoryCache(),
+            "contracts_cache_ttl": 3600,
+            **kwargs,
+        }
+    )
+
+
+@suite("Warm State")
+class TestState:
+    @title("Restore warm state")
+    @description("Restored clients reuse tokens and contracts without requests")
+    def test_restore(self, warm_client, contract_id, tmp_path):
+        path = tmp_path / "client.state"
+        warm_client.save_state(path)
+        Mocket.reset()
+
+        client = cold_client()
+        assert client.load_state(path)
+
+        assert client.auth.token() == warm_client.auth.token()
+        assert client.contracts_v1.get_contract(contract_id)
+        index = client.contracts_v1.get_pricebook_index(contract_id)
+        assert index.product_price("standard") == 100
+        assert Mocket.request_list() == []
+
+    @title("Invalid warm state")
+    @description("Tampered, expired, foreign and missing states are not restored")
+    @mark.parametrize(
+        "case",
+        ("tampered", "expired", "other-client", "other-secret", "missing"),
+    )
+    def test_invalid(self, warm_client, tmp_path, case):
+        path = tmp_path / "client.state"
+        warm_client.save_state(path, ttl=-1 if case == "expired" else 60)
+        kwargs = {}
+        if case == "tampered":
+            path.write_bytes(path.read_bytes().replace(b"mock-id", b"mock-ID"))
+            kwargs["client_id"] = "mock-ID"
+        elif case == "other-client":
+            kwargs["client_id"] = "other-id"
+        elif case == "other-secret":
+            kwargs["client_secret"] = "other-secret"
+        elif case == "missing":
+            path = tmp_path / "missing.state"
+        Mocket.reset()
+
+        client = cold_client(**kwargs)
+
+        assert not client.load_state(path)
+        assert client.auth.cache.load(client.auth._cache_key("mock-id", "")) is None
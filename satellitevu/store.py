@@ -0,0 +1,294 @@
+import os
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from hashlib import sha256
+from pathlib import Path
+from shutil import copyfile
+from tempfile import NamedTemporaryFile
+from time import time
+from typing import Any, Callable, Dict, Optional
+
+from appdirs import user_cache_dir
+
+from satellitevu.apis.helpers import copy_response, get_header
+from satellitevu.http.base import ResponseWrapper
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    etag TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_sha256 ON entries (sha256);
+CREATE TABLE IF NOT EXISTS blobs (
+    sha256 TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS blobs_accessed_at ON blobs (accessed_at);
+"""
+
+
+class ImageryStoreError(Exception):
+    pass
+
+
+@dataclass(frozen=True)
+class StoreEntry:
+    key: str
+    sha256: str
+    etag: Optional[str]
+    size: int
+    path: Path
+
+
+class ImageryStore:
+    """
+    Content-addressed local store for downloaded imagery.
+
+    Payloads are streamed to disk and stored once under their SHA-256 digest, indexed
+    by a SQLite manifest mapping download keys (order or item ids) to the digest, the
+    remote ETag and the payload size. Identical payloads delivered by different orders
+    are stored once. Destination files are copies of stored payloads, sharing their
+    data on copy-on-write filesystems, so that editing them cannot corrupt the store.
+
+    If a quota (in bytes) is given, least recently used payloads are evicted once the
+    store grows beyond it. Files already copied into a destination directory are not
+    affected by eviction.
+    """
+
+    root: Path
+    quota: Optional[int]
+    revalidate: bool
+    verify_checksum: bool
+
+    def __init__(
+        self,
+        root: Optional[str] = None,
+        *,
+        quota: Optional[int] = None,
+        revalidate: bool = True,
+        verify_checksum: bool = False,
+    ):
+        """
+        Args:
+            root: Optional directory for the store. Defaults to an "imagery" directory
+            in the user's cache dir.
+
+            quota: Optional maximum size of all stored payloads in bytes.
+
+            revalidate: Whether stored copies are revalidated against the remote ETag
+            with a conditional request before being reused. When False, a verified
+            local copy is reused without any request being made. Defaults to True.
+
+            verify_checksum: Whether stored copies are verified by recomputing their
+            SHA-256 digest instead of only comparing their size. Defaults to False.
+        """
+        self.root = Path(root if root else user_cache_dir("SatelliteVu")) / "imagery"
+        self.quota = quota
+        self.revalidate = revalidate
+        self.verify_checksum = verify_checksum
+
+        os.makedirs(self.root / "blobs", exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.root / "manifest.sqlite", timeout=30)
+
+    def _blob_path(self, digest: str) -> Path:
+        return self.root / "blobs" / digest[:2] / digest
+
+    def lookup(self, key: str) -> Optional[StoreEntry]:
+        """
+        Returns the entry stored for the given key if its payload is present and
+        verified, otherwise None.
+        """
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT sha256, etag, size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+
+        digest, etag, size = row
+        path = self._blob_path(digest)
+        try:
+            if path.stat().st_size != size:
+                return None
+        except FileNotFoundError:
+            return None
+        if self.verify_checksum and _file_digest(path) != digest:
+            return None
+
+        return StoreEntry(key=key, sha256=digest, etag=etag, size=size, path=path)
+
+    def put(self, key: str, data: bytes, *, etag: Optional[str] = None) -> StoreEntry:
+        """
+        Adds a payload to the store and records it for the given key.
+        """
+        return self._put(key, lambda write: write(data), etag=etag)
+
+    def _put(
+        self,
+        key: str,
+        copy: Callable[[Callable[[bytes], Any]], Any],
+        *,
+        etag: Optional[str] = None,
+    ) -> StoreEntry:
+        # copy passes the payload in chunks, which are hashed while being written
+        digest = sha256()
+        handle = NamedTemporaryFile("wb", dir=str(self.root / "blobs"), delete=False)
+
+        def write(chunk: bytes):
+            digest.update(chunk)
+            handle.write(chunk)
+
+        try:
+            with handle:
+                copy(write)
+        except BaseException:
+            os.remove(handle.name)
+            raise
+
+        sha = digest.hexdigest()
+        size = os.path.getsize(handle.name)
+        path = self._blob_path(sha)
+        if path.exists():
+            os.remove(handle.name)
+        else:
+            os.makedirs(path.parent, exist_ok=True)
+            os.replace(handle.name, path)
+
+        now = time()
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO blobs (sha256, size, accessed_at) "
+                "VALUES (?, ?, ?)",
+                (sha, size, now),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, sha256, etag, size, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, sha, etag, size, now),
+            )
+
+        return StoreEntry(key=key, sha256=sha, etag=etag, size=size, path=path)
+
+    def copy(self, entry: StoreEntry, destfile: str) -> str:
+        """
+        Makes the payload of an entry available at destfile as a copy, sharing the
+        stored data on copy-on-write filesystems.
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "UPDATE blobs SET accessed_at = ? WHERE sha256 = ?",
+                (time(), entry.sha256),
+            )
+
+        tmpfile = f"{destfile}.{os.getpid()}.tmp"
+        _copy_file(entry.path, tmpfile)
+        os.replace(tmpfile, destfile)
+
+        return destfile
+
+    def fetch(
+        self,
+        key: str,
+        destfile: str,
+        request: Callable[[Dict[str, str]], ResponseWrapper],
+    ) -> str:
+        """
+        Makes the payload for the given key available at destfile, downloading it
+        only if there is no verified copy in the store or the remote copy changed.
+
+        Args:
+            key: String identifying the payload, e.g. an order or item id.
+
+            destfile: A string (file path) the payload will be made available at.
+
+            request: Callable performing the download request with the given
+            additional headers and returning its response.
+
+        Returns:
+            A string specifying the path the payload is available at.
+        """
+        entry = self.lookup(key)
+        if entry and not self.revalidate:
+            return self.copy(entry, destfile)
+
+        headers = {}
+        if entry and entry.etag:
+            headers["If-None-Match"] = entry.etag
+
+        response = request(headers)
+        if response.status == 304 and entry:
+            return self.copy(entry, destfile)
+        if response.status != 200:
+            raise ImageryStoreError(
+                f"Unexpected status code for download of {key}: {response.status}"
+            )
+
+        entry = self._put(
+            key,
+            lambda write: copy_response(response, write),
+            etag=get_header(response, "ETag"),
+        )
+        destfile = self.copy(entry, destfile)
+        self.evict()
+
+        return destfile
+
+    def evict(self):
+        """
+        Removes least recently used payloads until the store fits into its quota.
+        """
+        if self.quota is None:
+            return
+
+        with closing(self._connect()) as conn, conn:
+            (total,) = conn.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT sha256, size FROM blobs ORDER BY accessed_at"
+            ).fetchall()
+            for digest, size in rows:
+                if total <= self.quota:
+                    break
+                conn.execute("DELETE FROM entries WHERE sha256 = ?", (digest,))
+                conn.execute("DELETE FROM blobs WHERE sha256 = ?", (digest,))
+                try:
+                    os.remove(self._blob_path(digest))
+                except FileNotFoundError:
+                    pass
+                total -= size
+
+
+def _copy_file(source: Path, destfile: str):
+    # copy_file_range shares the data on copy-on-write filesystems like Btrfs and XFS
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(source, "rb") as src, open(destfile, "wb") as dst:
+                remaining = os.fstat(src.fileno()).st_size
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if not copied:
+                        break
+                    remaining -= copied
+            if remaining == 0:
+                return
+        except OSError:
+            pass
+    copyfile(source, destfile)
+
+
+def _file_digest(path: Path) -> str:
+    digest = sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -0,0 +1,168 @@
+from allure import description, title, suite
+from typing import Dict, List, Optional
+
+from pytest import raises
+
+from satellitevu.http.base import ResponseWrapper
+
+from .store import ImageryStore, ImageryStoreError
+
+
+class MockResponse(ResponseWrapper):
+    def __init__(self, status: int, body: bytes = b"", etag: Optional[str] = None):
+        self.raw = body
+        self.status = status
+        self.headers = {"ETag": etag} if etag else {}
+
+    def json(self):
+        raise NotImplementedError
+
+    @property
+    def text(self):
+        return self.raw.decode("utf-8")
+
+
+class MockRequest:
+    calls: List[Dict[str, str]]
+
+    def __init__(self, *responses: MockResponse):
+        self.calls = []
+        self.responses = list(responses)
+
+    def __call__(self, headers: Dict[str, str]) -> MockResponse:
+        self.calls.append(headers)
+        return self.responses.pop(0)
+
+
+@suite("Store")
+class TestImageryStore:
+    @title("Download into empty store")
+    @description("Payloads are downloaded and copied into the destination")
+    def test_fetch(self, tmp_path):
+        store = ImageryStore(tmp_path / "store")
+        request = MockRequest(MockResponse(200, b"imagery", etag='"v1"'))
+
+        destfile = store.fetch("orders/a", str(tmp_path / "a.zip"), request)
+
+        assert open(destfile, "rb").read() == b"imagery"
+        assert request.calls == [{}]
+        entry = store.lookup("orders/a")
+        assert entry.etag == '"v1"'
+        assert entry.size == len(b"imagery")
+
+    @title("Revalidate stored copy")
+    @description("Stored copies are revalidated with the remote ETag")
+    def test_fetch_not_modified(self, tmp_path):
+        store = ImageryStore(tmp_path / "store")
+        store.fetch(
+            "orders/a",
+            str(tmp_path / "a.zip"),
+            MockRequest(MockResponse(200, b"imagery", etag='"v1"')),
+        )
+        request = MockRequest(MockResponse(304))
+
+        destfile = store.fetch("orders/a", str(tmp_path / "b.zip"), request)
+
+        assert request.calls == [{"If-None-Match": '"v1"'}]
+        assert open(destfile, "rb").read() == b"imagery"
+
+    @title("Skip request for stored copy")
+    @description("No request is made for verified copies if revalidation is off")
+    def test_fetch_without_revalidation(self, tmp_path):
+        store = ImageryStore(tmp_path / "store", revalidate=False)
+        store.fetch(
+            "orders/a",
+            str(tmp_path / "a.zip"),
+            MockRequest(MockResponse(200, b"imagery")),
+        )
+        request = MockRequest()
+
+        destfile = store.fetch("orders/a", str(tmp_path / "b.zip"), request)
+
+        assert request.calls == []
+        assert open(destfile, "rb").read() == b"imagery"
+
+    @title("Corrupted stored copy")
+    @description("Stored copies failing verification are downloaded again")
+    def test_fetch_corrupted(self, tmp_path):
+        store = ImageryStore(tmp_path / "store", revalidate=False)
+        store.fetch(
+            "orders/a",
+            str(tmp_path / "a.zip"),
+            MockRequest(MockResponse(200, b"imagery")),
+        )
+        store.lookup("orders/a").path.unlink()
+        request = MockRequest(MockResponse(200, b"imagery"))
+
+        store.fetch("orders/a", str(tmp_path / "b.zip"), request)
+
+        assert request.calls == [{}]
+
+    @title("Deduplicate payloads")
+    @description("Identical payloads of different orders are stored once")
+    def test_deduplication(self, tmp_path):
+        store = ImageryStore(tmp_path / "store")
+
+        first = store.fetch(
+            "orders/a",
+            str(tmp_path / "a.zip"),
+            MockRequest(MockResponse(200, b"imagery")),
+        )
+        second = store.fetch(
+            "orders/b",
+            str(tmp_path / "b.zip"),
+            MockRequest(MockResponse(200, b"imagery")),
+        )
+
+        assert store.lookup("orders/a").path == store.lookup("orders/b").path
+        blobs = (tmp_path / "store" / "imagery" / "blobs").rglob("*")
+        assert len([path for path in blobs if path.is_file()]) == 1
+        assert open(first, "rb").read() == open(second, "rb").read() == b"imagery"
+
+    @title("Edited destination file")
+    @description("Editing a destination file does not change the stored payload")
+    def test_edited_destination(self, tmp_path):
+        store = ImageryStore(tmp_path / "store", revalidate=False)
+        destfile = store.fetch(
+            "orders/a",
+            str(tmp_path / "a.zip"),
+            MockRequest(MockResponse(200, b"imagery")),
+        )
+        with open(destfile, "r+b") as handle:
+            handle.write(b"edited")
+
+        copy = store.fetch("orders/a", str(tmp_path / "b.zip"), MockRequest())
+
+        assert open(copy, "rb").read() == b"imagery"
+        assert store.lookup("orders/a") is not None
+
+    @title("Evict under quota")
+    @description("Least recently used payloads are evicted beyond the quota")
+    def test_eviction(self, tmp_path):
+        store = ImageryStore(tmp_path / "store", quota=10)
+
+        for key, body in (("a", b"aaaaaa"), ("b", b"bbbbbb")):
+            store.fetch(
+                f"orders/{key}",
+                str(tmp_path / f"{key}.zip"),
+                MockRequest(MockResponse(200, body)),
+            )
+
+        assert store.lookup("orders/a") is None
+        assert store.lookup("orders/b") is not None
+        assert open(tmp_path / "a.zip", "rb").read() == b"aaaaaa"
+
+    @title("Failed download")
+    @description("Unsuccessful downloads are not stored")
+    def test_fetch_failure(self, tmp_path):
+        store = ImageryStore(tmp_path / "store")
+
+        with raises(ImageryStoreError):
+            store.fetch(
+                "orders/a",
+                str(tmp_path / "a.zip"),
+                MockRequest(MockResponse(403, b"denied")),
+            )
+
+        assert store.lookup("orders/a") is None
+        assert not (tmp_path / "a.zip").exists()
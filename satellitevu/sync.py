@@ -0,0 +1,185 @@
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from logging import getLogger
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple, Union
+from uuid import UUID
+
+from satellitevu.apis.pagination import paginate
+
+if TYPE_CHECKING:
+    from satellitevu.client import Client
+    from satellitevu.store import ImageryStore
+
+logger = getLogger(__file__)
+
+STATE_FILE = ".satellitevu-sync.json"
+STATE_VERSION = 1
+PER_PAGE = 100
+
+# Statuses of tasking and imagery orders which have been delivered and can be
+# downloaded
+DELIVERED_OTM_STATUSES = ("fulfilled",)
+DELIVERED_IMAGERY_STATUSES = ("completed", "fulfilled")
+
+
+@dataclass
+class SyncResult:
+    downloaded: List[str] = field(default_factory=list)
+    unchanged: List[str] = field(default_factory=list)
+    failed: Dict[str, Exception] = field(default_factory=dict)
+
+
+class SyncState:
+    """
+    State of a local order mirror, persisted as a JSON file in the mirror directory.
+
+    Every completed download is written to disk immediately, so an interrupted sync
+    resumes with the orders that have not been downloaded yet.
+    """
+
+    path: str
+    orders: Dict[str, Dict]
+
+    def __init__(self, destdir: str):
+        self.path = os.path.join(destdir, STATE_FILE)
+        self.orders = {}
+        self._lock = Lock()
+
+        try:
+            with open(self.path) as handle:
+                state = json.load(handle)
+        except (FileNotFoundError, ValueError):
+            return
+        if state.get("version") == STATE_VERSION:
+            self.orders = state["orders"]
+
+    def is_current(self, key: str, fingerprint: str) -> bool:
+        entry = self.orders.get(key)
+        if not entry or entry["fingerprint"] != fingerprint:
+            return False
+        try:
+            return os.path.getsize(entry["path"]) == entry["size"]
+        except OSError:
+            return False
+
+    def record(self, key: str, fingerprint: str, path: str):
+        with self._lock:
+            self.orders[key] = {
+                "fingerprint": fingerprint,
+                "path": path,
+                "size": os.path.getsize(path),
+            }
+            destdir = os.path.dirname(self.path)
+            with NamedTemporaryFile("w", dir=destdir, delete=False) as handle:
+                json.dump({"version": STATE_VERSION, "orders": self.orders}, handle)
+            os.replace(handle.name, self.path)
+
+
+def _imagery_orders(client: "Client", contract_id: str) -> Iterator[Tuple[str, str]]:
+    orders = paginate(
+        lambda size, token: client.orders_v2.get_orders(
+            contract_id=contract_id, per_page=size, page_token=token
+        ),
+        "orders",
+        per_page=PER_PAGE,
+        adaptive=False,
+    )
+    for order in orders:
+        # Orders not reporting a status are waited for by download_order
+        status = order.get("status") or (order.get("properties") or {}).get("status")
+        if status is None or status in DELIVERED_IMAGERY_STATUSES:
+            yield order["id"], order.get("updated_at") or order.get("created_at", "")
+
+
+def _tasking_orders(client: "Client", contract_id: str) -> Iterator[Tuple[str, str]]:
+    for order in client.otm_v2.iter_orders(
+        contract_id=contract_id, per_page=PER_PAGE, max_per_page=PER_PAGE
+    ):
+        properties = order.get("properties", {})
+        if properties.get("status") in DELIVERED_OTM_STATUSES:
+            yield order["id"], properties.get("updated_at", "")
+
+
+def sync_orders(
+    client: "Client",
+    contract_id: Union[UUID, str],
+    destdir: str,
+    *,
+    max_workers: int = 4,
+    retry_factor: float = 1.0,
+    store: Optional["ImageryStore"] = None,
+) -> SyncResult:
+    """
+    Mirrors all delivered imagery and tasking orders of a contract into a local
+    directory, downloading only orders which are new or have changed since the last
+    sync.
+
+    Imagery orders are downloaded into the "orders" and tasking orders into the
+    "tasking" subdirectory of destdir. Failed downloads are reported in the result
+    and retried by the next sync.
+
+    Args:
+        client: Client used to list and download the orders.
+
+        contract_id: String or UUID representing the ID of the Contract whose orders
+        will be mirrored.
+
+        destdir: A string (file path) representing the directory of the mirror.
+
+        max_workers: Maximum number of concurrent downloads. Defaults to 4.
+
+        retry_factor: A float that determines how retries will be handled, see
+        OrdersV2.download_order. Defaults to 1.0.
+
+        store: Optional ImageryStore downloads are routed through. Defaults to None.
+
+    Returns:
+        A SyncResult listing the downloaded, unchanged and failed orders.
+    """
+    contract_id = str(contract_id)
+    sources = {
+        "orders": (_imagery_orders, client.orders_v2.download_order),
+        "tasking": (_tasking_orders, client.otm_v2.download_order),
+    }
+
+    for source in sources:
+        os.makedirs(os.path.join(destdir, source), exist_ok=True)
+    state = SyncState(destdir)
+    result = SyncResult()
+
+    def download(source: str, order_id: str) -> str:
+        return sources[source][1](
+            contract_id=contract_id,
+            order_id=order_id,
+            destdir=os.path.join(destdir, source),
+            retry_factor=retry_factor,
+            store=store,
+        )
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for source, (list_orders, _) in sources.items():
+            for order_id, fingerprint in list_orders(client, contract_id):
+                key = f"{source}/{order_id}"
+                if state.is_current(key, fingerprint):
+                    result.unchanged.append(key)
+                    continue
+                future = executor.submit(download, source, order_id)
+                futures[future] = (key, fingerprint)
+
+        for future in as_completed(futures):
+            key, fingerprint = futures[future]
+            try:
+                path = future.result()
+            except Exception as error:
+                logger.warning("Failed to download %s: %s", key, error)
+                result.failed[key] = error
+                continue
+            state.record(key, fingerprint, path)
+            result.downloaded.append(key)
+
+    return result
@@ -0,0 +1,139 @@
+from allure import description, title, suite
+import json
+import os
+from unittest.mock import patch
+from uuid import uuid4
+
+from pytest import fixture
+
+from .sync import STATE_FILE, sync_orders
+
+
+def _download(contract_id, order_id, destdir, retry_factor, store):
+    destfile = os.path.join(destdir, f"{order_id}.zip")
+    with open(destfile, "wb") as handle:
+        handle.write(order_id.encode("utf-8"))
+    return destfile
+
+
+@fixture
+def order_sources(client):
+    imagery_pages = [
+        {
+            "orders": [{"id": "order-1", "updated_at": "2024-10-18T11:05:35Z"}],
+            "links": [{"rel": "next", "href": "http://example.com/?token=page-2"}],
+        },
+        {
+            "orders": [
+                {
+                    "id": "order-2",
+                    "status": "completed",
+                    "updated_at": "2024-10-18T11:05:35Z",
+                },
+                {
+                    "id": "order-3",
+                    "status": "pending",
+                    "updated_at": "2024-10-18T11:05:35Z",
+                },
+            ],
+            "links": [],
+        },
+    ]
+    tasking_page = {
+        "features": [
+            {
+                "id": "tasking-1",
+                "properties": {
+                    "status": "fulfilled",
+                    "updated_at": "2024-10-18T11:05:35Z",
+                },
+            },
+            {
+                "id": "tasking-2",
+                "properties": {
+                    "status": "committed",
+                    "updated_at": "2024-10-18T11:05:35Z",
+                },
+            },
+        ],
+        "links": [],
+    }
+
+    with patch.object(client.orders_v2, "get_orders") as get_orders, patch.object(
+        client.orders_v2, "download_order"
+    ) as download_imagery, patch.object(
+        client.otm_v2, "list_orders"
+    ) as list_orders, patch.object(client.otm_v2, "download_order") as download_tasking:
+        get_orders.side_effect = lambda **kwargs: imagery_pages[
+            1 if kwargs["page_token"] else 0
+        ]
+        list_orders.return_value = tasking_page
+        download_imagery.side_effect = _download
+        download_tasking.side_effect = _download
+        yield {
+            "get_orders": get_orders,
+            "imagery_pages": imagery_pages,
+            "download_imagery": download_imagery,
+            "download_tasking": download_tasking,
+        }
+
+
+@suite("Sync")
+class TestSync:
+    @title("Initial sync")
+    @description("All delivered orders are downloaded into an empty mirror")
+    def test_initial_sync(self, client, order_sources, tmp_path):
+        result = sync_orders(client, uuid4(), str(tmp_path))
+
+        assert sorted(result.downloaded) == [
+            "orders/order-1",
+            "orders/order-2",
+            "tasking/tasking-1",
+        ]
+        assert result.unchanged == []
+        assert os.path.exists(tmp_path / "orders" / "order-1.zip")
+        assert os.path.exists(tmp_path / "tasking" / "tasking-1.zip")
+        assert order_sources["get_orders"].call_args_list[1].kwargs["page_token"] == (
+            "page-2"
+        )
+
+        with open(tmp_path / STATE_FILE) as handle:
+            assert set(json.load(handle)["orders"]) == set(result.downloaded)
+
+    @title("Unchanged sync")
+    @description("Orders which did not change are not downloaded again")
+    def test_unchanged_sync(self, client, order_sources, tmp_path):
+        sync_orders(client, uuid4(), str(tmp_path))
+        order_sources["download_imagery"].reset_mock()
+        order_sources["imagery_pages"][1]["orders"][0]["updated_at"] = "2025-01-01"
+
+        result = sync_orders(client, uuid4(), str(tmp_path))
+
+        assert result.downloaded == ["orders/order-2"]
+        assert sorted(result.unchanged) == ["orders/order-1", "tasking/tasking-1"]
+        order_sources["download_imagery"].assert_called_once()
+
+    @title("Resume sync")
+    @description("Failed downloads are reported and retried by the next sync")
+    def test_resume_sync(self, client, order_sources, tmp_path):
+        order_sources["download_tasking"].side_effect = RuntimeError("interrupted")
+
+        result = sync_orders(client, uuid4(), str(tmp_path))
+
+        assert list(result.failed) == ["tasking/tasking-1"]
+
+        order_sources["download_tasking"].side_effect = _download
+        result = sync_orders(client, uuid4(), str(tmp_path))
+
+        assert result.downloaded == ["tasking/tasking-1"]
+        assert result.failed == {}
+
+    @title("Missing local file")
+    @description("Orders whose local file was removed are downloaded again")
+    def test_missing_file(self, client, order_sources, tmp_path):
+        sync_orders(client, uuid4(), str(tmp_path))
+        os.remove(tmp_path / "orders" / "order-1.zip")
+
+        result = sync_orders(client, uuid4(), str(tmp_path))
+
+        assert result.downloaded == ["orders/order-1"]
@@ -0,0 +1,271 @@
+"""
+Optional OpenTelemetry tracing and OpenTelemetry or Prometheus metrics of SDK calls.
+
+Instrumentation is disabled by default and its libraries are only imported once it
+is enabled, e.g.:
+
+    from satellitevu import telemetry
+
+    telemetry.enable_tracing()
+    telemetry.enable_metrics()  # OpenTelemetry metrics
+    telemetry.enable_prometheus()  # or Prometheus metrics
+
+Tracing creates client spans around API requests, propagating the trace context in
+the request headers, and spans around token requests, download polling and download
+transfers. Metrics count requests by API, method and status, retries by API and
+reason, token refreshes and downloaded bytes, and track request durations and
+requests in flight by API.
+"""
+
+from contextlib import nullcontext
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, Dict, List
+
+from satellitevu.http.timing import endpoint
+
+if TYPE_CHECKING:
+    from satellitevu.apis.base import AbstractApi
+    from satellitevu.http.base import ResponseWrapper
+
+enabled = False
+
+_tracer: Any = None
+_metrics: List[Any] = []
+_prometheus: Dict[int, "PrometheusMetrics"] = {}
+_NO_SPAN = nullcontext()
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class OtelMetrics:
+    """
+    SDK metrics recorded with an OpenTelemetry meter.
+    """
+
+    def __init__(self, meter_provider: Any = None):
+        from importlib.metadata import version
+
+        from opentelemetry import metrics
+
+        meter = (meter_provider or metrics.get_meter_provider()).get_meter(
+            "satellitevu", version("satellitevu")
+        )
+        self.requests = meter.create_counter(
+            "satellitevu.requests", description="API requests"
+        )
+        self.duration = meter.create_histogram(
+            "satellitevu.request.duration", unit="s", description="API request duration"
+        )
+        self.in_flight = meter.create_up_down_counter(
+            "satellitevu.requests.in_flight", description="API requests in flight"
+        )
+        self.retries = meter.create_counter(
+            "satellitevu.retries", description="Retried API requests"
+        )
+        self.token_refreshes = meter.create_counter(
+            "satellitevu.token.refreshes", description="Access token requests"
+        )
+        self.downloaded = meter.create_counter(
+            "satellitevu.downloaded", unit="By", description="Downloaded bytes"
+        )
+
+    def request_started(self, api: str):
+        self.in_flight.add(1, {"api": api})
+
+    def request_finished(self, api: str, method: str, status: str, seconds: float):
+        self.in_flight.add(-1, {"api": api})
+        self.requests.add(1, {"api": api, "method": method, "status": status})
+        self.duration.record(seconds, {"api": api, "method": method})
+
+    def retry(self, api: str, reason: str):
+        self.retries.add(1, {"api": api, "reason": reason})
+
+    def token_refresh(self):
+        self.token_refreshes.add(1)
+
+    def download(self, size: int):
+        self.downloaded.add(size)
+
+
+class PrometheusMetrics:
+    """
+    SDK metrics recorded with prometheus_client metrics.
+    """
+
+    def __init__(self, registry: Any = None):
+        import prometheus_client as prometheus
+
+        registry = registry or prometheus.REGISTRY
+        self.requests = prometheus.Counter(
+            "satellitevu_requests",
+            "API requests",
+            ["api", "method", "status"],
+            registry=registry,
+        )
+        self.duration = prometheus.Histogram(
+            "satellitevu_request_duration_seconds",
+            "API request duration",
+            ["api", "method"],
+            buckets=DURATION_BUCKETS,
+            registry=registry,
+        )
+        self.in_flight = prometheus.Gauge(
+            "satellitevu_requests_in_flight",
+            "API requests in flight",
+            ["api"],
+            registry=registry,
+        )
+        self.retries = prometheus.Counter(
+            "satellitevu_retries",
+            "Retried API requests",
+            ["api", "reason"],
+            registry=registry,
+        )
+        self.token_refreshes = prometheus.Counter(
+            "satellitevu_token_refreshes", "Access token requests", registry=registry
+        )
+        self.downloaded = prometheus.Counter(
+            "satellitevu_downloaded_bytes", "Downloaded bytes", registry=registry
+        )
+
+    def request_started(self, api: str):
+        self.in_flight.labels(api).inc()
+
+    def request_finished(self, api: str, method: str, status: str, seconds: float):
+        self.in_flight.labels(api).dec()
+        self.requests.labels(api, method, status).inc()
+        self.duration.labels(api, method).observe(seconds)
+
+    def retry(self, api: str, reason: str):
+        self.retries.labels(api, reason).inc()
+
+    def token_refresh(self):
+        self.token_refreshes.inc()
+
+    def download(self, size: int):
+        self.downloaded.inc(size)
+
+
+def _update():
+    global enabled
+    enabled = _tracer is not None or bool(_metrics)
+
+
+def enable_tracing(tracer_provider: Any = None):
+    """
+    Enables OpenTelemetry tracing, with the global tracer provider unless
+    tracer_provider is given.
+    """
+    global _tracer
+    from importlib.metadata import version
+
+    from opentelemetry import trace
+
+    _tracer = (tracer_provider or trace.get_tracer_provider()).get_tracer(
+        "satellitevu", version("satellitevu")
+    )
+    _update()
+
+
+def enable_metrics(meter_provider: Any = None):
+    """
+    Enables OpenTelemetry metrics, with the global meter provider unless
+    meter_provider is given.
+    """
+    _metrics.append(OtelMetrics(meter_provider))
+    _update()
+
+
+def enable_prometheus(registry: Any = None):
+    """
+    Enables Prometheus metrics, registered with prometheus_client's default registry
+    unless registry is given. Metrics are registered once per registry.
+    """
+    key = id(registry)
+    if key not in _prometheus:
+        _prometheus[key] = PrometheusMetrics(registry)
+    if _prometheus[key] not in _metrics:
+        _metrics.append(_prometheus[key])
+    _update()
+
+
+def disable():
+    """
+    Disables tracing and all metrics.
+    """
+    global _tracer
+    _tracer = None
+    _metrics.clear()
+    _update()
+
+
+def span(name: str, **attributes: Any):
+    """
+    Returns a context manager tracing a span, which enters as the span or as None
+    when tracing is disabled.
+    """
+    if _tracer is None:
+        return _NO_SPAN
+    return _tracer.start_as_current_span(name, attributes=attributes)
+
+
+def traced_request(
+    api: "AbstractApi", request: Callable[..., "ResponseWrapper"], *args, **kwargs
+) -> "ResponseWrapper":
+    """
+    Makes a request with request(*args, **kwargs) in a client span and records its
+    metrics. Only called while instrumentation is enabled.
+    """
+    method = kwargs["method"] if "method" in kwargs else args[0]
+    url = kwargs["url"] if "url" in kwargs else args[1]
+    name = type(api).__name__
+    status = "error"
+    for metrics in _metrics:
+        metrics.request_started(name)
+    start = perf_counter()
+    try:
+        if _tracer is None:
+            response = request(*args, **kwargs)
+            status = str(response.status)
+            return response
+
+        from opentelemetry.propagate import inject
+        from opentelemetry.trace import SpanKind, Status, StatusCode
+
+        with _tracer.start_as_current_span(
+            endpoint(method, url),
+            kind=SpanKind.CLIENT,
+            attributes={
+                "http.request.method": method,
+                "url.full": url,
+                "satellitevu.api": name,
+            },
+        ) as current:
+            headers = dict(kwargs.get("headers") or {})
+            inject(headers)
+            kwargs["headers"] = headers
+            response = request(*args, **kwargs)
+            status = str(response.status)
+            current.set_attribute("http.response.status_code", response.status)
+            if response.status >= 400:
+                current.set_status(Status(StatusCode.ERROR))
+        return response
+    finally:
+        seconds = perf_counter() - start
+        for metrics in _metrics:
+            metrics.request_finished(name, method, status, seconds)
+
+
+def retry(api: "AbstractApi", reason: str):
+    for metrics in _metrics:
+        metrics.retry(type(api).__name__, reason)
+
+
+def token_refresh():
+    for metrics in _metrics:
+        metrics.token_refresh()
+
+
+def download(size: int):
+    for metrics in _metrics:
+        metrics.download(size)
@@ -0,0 +1,170 @@
+from collections import defaultdict
+from json import dumps
+from random import getrandbits
+from unittest.mock import patch
+from uuid import uuid4
+
+from allure import description, suite, title
+from mocket import Mocket
+from mocket.mockhttp import Entry, Response
+from pytest import fixture, importorskip
+
+from satellitevu import telemetry
+
+trace = importorskip("opentelemetry.trace")
+
+
+class RecordingSpan(trace.NonRecordingSpan):
+    def __init__(self, name, attributes):
+        super().__init__(
+            trace.SpanContext(
+                trace_id=getrandbits(128),
+                span_id=getrandbits(64),
+                is_remote=False,
+                trace_flags=trace.TraceFlags(trace.TraceFlags.SAMPLED),
+            )
+        )
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.status = None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def set_status(self, status, description=None):
+        self.status = status
+
+
+class RecordingTracerProvider:
+    def __init__(self):
+        self.spans = []
+
+    def get_tracer(self, *args, **kwargs):
+        return self
+
+    def start_as_current_span(self, name, kind=None, attributes=None):
+        span = RecordingSpan(name, attributes)
+        self.spans.append(span)
+        return trace.use_span(span, end_on_exit=True)
+
+
+class RecordingMeterProvider:
+    def __init__(self):
+        self.values = defaultdict(list)
+
+    def get_meter(self, *args, **kwargs):
+        return self
+
+    def _instrument(self, name, **kwargs):
+        values = self.values[name]
+
+        class Instrument:
+            def add(self, value, attributes=None):
+                values.append((value, attributes))
+
+            record = add
+
+        return Instrument()
+
+    create_counter = create_histogram = create_up_down_counter = _instrument
+
+
+@fixture()
+def tracer_provider():
+    provider = RecordingTracerProvider()
+    telemetry.enable_tracing(provider)
+    yield provider
+    telemetry.disable()
+
+
+@fixture()
+def meter_provider():
+    provider = RecordingMeterProvider()
+    telemetry.enable_metrics(provider)
+    yield provider
+    telemetry.disable()
+
+
+@suite("Telemetry")
+class TestTelemetry:
+    @title("Disabled by default")
+    def test_disabled(self):
+        assert not telemetry.enabled
+        with telemetry.span("satellitevu.test") as span:
+            assert span is None
+
+    @title("Request spans")
+    @description("Traces API requests and propagates the trace context")
+    def test_request_span(self, client, oauth_token_entry, tracer_provider):
+        contract_id = str(uuid4())
+        url = client._gateway_url + f"otm/v2/{contract_id}/tasking/orders/"
+        Entry.single_register(
+            "GET", url, body=dumps({"features": []}), match_querystring=False
+        )
+
+        client.otm_v2.list_orders(contract_id=contract_id)
+
+        # The token is requested while preparing the request's headers
+        names = [span.name for span in tracer_provider.spans]
+        assert names == ["GET /otm/v2/{id}/tasking/orders/", "satellitevu.auth.token"]
+        span = tracer_provider.spans[0]
+        assert span.attributes["satellitevu.api"] == "OtmV2"
+        assert span.attributes["http.response.status_code"] == 200
+        trace_id = f"{span.get_span_context().trace_id:032x}"
+        traceparent = Mocket.last_request().headers["traceparent"]
+        assert traceparent.split("-")[1] == trace_id
+
+    @title("Download metrics")
+    @description("Counts requests, retries, token refreshes and downloaded bytes")
+    def test_download_metrics(
+        self, client, oauth_token_entry, redirect_response, meter_provider
+    ):
+        contract_id = str(uuid4())
+        order_id = str(uuid4())
+        Entry.register(
+            "GET",
+            client._gateway_url
+            + f"orders/v2/{contract_id}/{order_id}/download?redirect=False",
+            Response(headers={"Retry-After": "1"}, status=202),
+            Response(body=dumps(redirect_response), status=200),
+        )
+        Entry.single_register("GET", redirect_response["url"], body="imagery")
+
+        with patch("satellitevu.apis.orders.sleep"), patch(
+            "satellitevu.apis.orders.bytes_to_file"
+        ):
+            client.orders_v2.download_order(
+                contract_id=contract_id, order_id=order_id, destdir="downloads"
+            )
+
+        values = meter_provider.values
+        statuses = [
+            attributes["status"] for _, attributes in values["satellitevu.requests"]
+        ]
+        assert statuses == ["202", "200", "200"]
+        assert values["satellitevu.retries"] == [
+            (1, {"api": "OrdersV2", "reason": "retry_after"})
+        ]
+        assert values["satellitevu.token.refreshes"] == [(1, None)]
+        assert values["satellitevu.downloaded"] == [(len("imagery"), None)]
+        assert sum(v for v, _ in values["satellitevu.requests.in_flight"]) == 0
+        assert len(values["satellitevu.request.duration"]) == 3
+
+    @title("Prometheus metrics")
+    def test_prometheus(self, client, oauth_token_entry):
+        prometheus = importorskip("prometheus_client")
+        registry = prometheus.CollectorRegistry()
+        contract_id = str(uuid4())
+        url = client._gateway_url + f"otm/v2/{contract_id}/tasking/orders/"
+        Entry.single_register(
+            "GET", url, body=dumps({"features": []}), match_querystring=False
+        )
+
+        telemetry.enable_prometheus(registry)
+        try:
+            client.otm_v2.list_orders(contract_id=contract_id)
+        finally:
+            telemetry.disable()
+
+        labels = {"api": "OtmV2", "method": "GET", "status": "200"}
+        assert registry.get_sample_value("satellitevu_requests_total", labels) == 1
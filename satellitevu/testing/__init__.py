@@ -0,0 +1,3 @@
+from .gateway import Faults, FakeGateway, Latency
+
+__all__ = ["Faults", "FakeGateway", "Latency"]
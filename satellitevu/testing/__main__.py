@@ -0,0 +1,54 @@
+import asyncio
+from argparse import ArgumentParser
+
+from .gateway import Faults, FakeGateway, Latency
+
+
+def main(argv=None):
+    parser = ArgumentParser(
+        prog="python -m satellitevu.testing",
+        description="Runs a fake SatelliteVu API gateway and auth host.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--auth-port", type=int, default=8081)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--items", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean latency (s)")
+    parser.add_argument("--latency-spread", type=float, default=0.0)
+    parser.add_argument(
+        "--latency-distribution",
+        default="fixed",
+        choices=("fixed", "uniform", "normal", "lognormal", "exponential"),
+    )
+    parser.add_argument("--rate-limit", type=float, default=0.0, help="429 rate")
+    parser.add_argument("--server-error", type=float, default=0.0, help="5xx rate")
+    parser.add_argument("--pending-polls", type=int, default=1)
+    parser.add_argument("--retry-after", type=int, default=0)
+    parser.add_argument("--download-size", type=int, default=16 * 1024 * 1024)
+    args = parser.parse_args(argv)
+
+    gateway = FakeGateway(
+        host=args.host,
+        port=args.port,
+        auth_port=args.auth_port,
+        seed=args.seed,
+        items=args.items,
+        latency=Latency(args.latency, args.latency_spread, args.latency_distribution),
+        faults=Faults(rate_limit=args.rate_limit, server_error=args.server_error),
+        pending_polls=args.pending_polls,
+        retry_after=args.retry_after,
+        download_size=args.download_size,
+    )
+    print(
+        f"Serving fake gateway on {gateway.url} and auth on {gateway.auth_url}, "
+        f"contract {gateway.contract_id}"
+    )
+    try:
+        asyncio.run(gateway.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,890 @@
+import asyncio
+import gzip
+import re
+from dataclasses import dataclass, field
+from random import Random
+from threading import Event, Thread
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
+from uuid import uuid4
+
+from satellitevu.apis.helpers import parse_datetime, parse_interval
+from satellitevu.geometry import bbox_intersects, bbox_polygon, intersects
+from satellitevu.http import codec
+
+from . import synthetic
+
+REASONS = {
+    200: "OK",
+    201: "Created",
+    202: "Accepted",
+    204: "No Content",
+    206: "Partial Content",
+    304: "Not Modified",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    416: "Range Not Satisfiable",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+    502: "Bad Gateway",
+    503: "Service Unavailable",
+}
+
+CHUNK_SIZE = 65536
+GZIP_MIN_SIZE = 1024
+
+
+@dataclass(frozen=True)
+class Latency:
+    """
+    Distribution of the latency added to responses, in seconds.
+
+    Distributions are "fixed" (always mean), "uniform" (mean +/- spread), "normal"
+    (standard deviation spread), "lognormal" (median mean, shape spread) and
+    "exponential" (mean mean). Samples are never negative.
+    """
+
+    mean: float = 0.0
+    spread: float = 0.0
+    distribution: str = "fixed"
+
+    def sample(self, rng: Random) -> float:
+        if self.distribution == "fixed":
+            value = self.mean
+        elif self.distribution == "uniform":
+            value = rng.uniform(self.mean - self.spread, self.mean + self.spread)
+        elif self.distribution == "normal":
+            value = rng.gauss(self.mean, self.spread)
+        elif self.distribution == "lognormal":
+            value = self.mean * rng.lognormvariate(0.0, self.spread)
+        elif self.distribution == "exponential":
+            value = rng.expovariate(1 / self.mean) if self.mean else 0.0
+        else:
+            raise ValueError(f"Unknown latency distribution {self.distribution}")
+        return max(value, 0.0)
+
+
+@dataclass(frozen=True)
+class Faults:
+    """
+    Probabilities of injected failures of API requests: rate_limit responds with a
+    429 and a Retry-After of retry_after seconds, server_error with one of
+    server_error_statuses.
+    """
+
+    rate_limit: float = 0.0
+    server_error: float = 0.0
+    retry_after: int = 1
+    server_error_statuses: Tuple[int, ...] = (500, 502, 503)
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    query: Dict[str, List[str]]
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self) -> Any:
+        return codec.loads(self.body) if self.body else {}
+
+    def param(self, name: str, default: Optional[str] = None) -> Optional[str]:
+        return self.query.get(name, [default])[0]
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: Any = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    download: Optional[Tuple[str, int, int]] = None
+
+
+Handler = Callable[..., Response]
+
+
+def route(method: str, pattern: str):
+    """
+    Registers a FakeGateway method as handler of requests matching method (or
+    several separated by "|") and a path pattern, whose named groups are passed as
+    keyword arguments. Routes are matched in the order they are defined.
+    """
+
+    def decorator(func: Handler) -> Handler:
+        func.route = (frozenset(method.split("|")), re.compile(f"^{pattern}$"))
+        return func
+
+    return decorator
+
+
+def _page(items: List[Any], request: Request, key: str, default: int = 25):
+    per_page = int(request.param("per_page") or request.param("limit") or default)
+    offset = int(request.param("token") or 0)
+    page = items[offset : offset + per_page]
+    links = []
+    if offset + per_page < len(items):
+        links.append(
+            {
+                "rel": "next",
+                "href": f"{request.path}?per_page={per_page}&token={offset + per_page}",
+                "method": "GET",
+            }
+        )
+    return {key: page, "links": links}
+
+
+class FakeGateway:
+    """
+    Fake of the SatelliteVu API gateway and auth host for load tests and offline
+    benchmarks, serving the catalog, orders v2, OTM v2, id v2 and policy APIs and
+    oauth/token from synthetic in-memory data over HTTP/1.1.
+
+    Run it in a background thread:
+
+        with FakeGateway(latency=Latency(0.05, 0.02, "lognormal")) as gateway:
+            client = gateway.client()
+            client.catalog_v1.search(contract_id=gateway.contract_id)
+
+    or in a running event loop with "await gateway.start_async()", or standalone
+    with "python -m satellitevu.testing".
+    """
+
+    host: str
+    port: int
+    auth_port: int
+    latency: Latency
+    faults: Faults
+    contract_id: str
+
+    def __init__(
+        self,
+        *,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        auth_port: int = 0,
+        latency: Optional[Latency] = None,
+        faults: Optional[Faults] = None,
+        seed: Optional[int] = None,
+        items: int = 1000,
+        pending_polls: int = 1,
+        retry_after: int = 0,
+        download_size: int = 16 * 1024 * 1024,
+        balance: float = 10_000_000,
+        item_price: float = 100_000,
+    ):
+        """
+        Args:
+            host: Host to listen on. Defaults to localhost.
+
+            port: Port of the API gateway. Defaults to a free port.
+
+            auth_port: Port of the auth host. Defaults to a free port.
+
+            latency: Optional latency distribution added to every response.
+
+            faults: Optional probabilities of rate limited and failed API requests.
+
+            seed: Optional seed making synthetic data, latencies and faults
+            reproducible.
+
+            items: Number of synthetic catalog items. Defaults to 1000.
+
+            pending_polls: Number of polls for which downloads respond with 202 and
+            feasibility requests stay pending. Defaults to 1.
+
+            retry_after: Retry-After in seconds of pending downloads. Defaults to 0.
+
+            download_size: Size of synthetic downloads in bytes. Defaults to 16 MiB.
+
+            balance: Initial credit balance of contracts, debited by orders.
+
+            item_price: Price of each ordered catalog item.
+        """
+        self.host = host
+        self.port = port
+        self.auth_port = auth_port
+        self.latency = latency or Latency()
+        self.faults = faults or Faults()
+        self.pending_polls = pending_polls
+        self.retry_after = retry_after
+        self.download_size = download_size
+        self.balance = balance
+        self.item_price = item_price
+        self.contract_id = str(uuid4())
+
+        self._rng = Random(seed)
+        self.items = synthetic.stac_items(items, seed)
+        self._items_by_id = {item["id"]: item for item in self.items}
+        self._orders: Dict[str, Dict[str, Any]] = {}
+        self._feasibilities: Dict[str, Dict[str, Any]] = {}
+        self._tasking_orders: Dict[str, Dict[str, Any]] = {}
+        self._webhooks: Dict[str, Dict[str, Any]] = {}
+        self._balances: Dict[str, float] = {}
+        self._polls: Dict[str, int] = {}
+        self._blocks: Dict[str, bytes] = {}
+        self.requests = 0
+
+        self._routes = [
+            (*func.route, getattr(self, name))
+            for klass in reversed(type(self).__mro__)
+            for name, func in vars(klass).items()
+            if hasattr(func, "route")
+        ]
+        self._servers: List[asyncio.AbstractServer] = []
+        self._connections: Set[asyncio.Task] = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}/"
+
+    @property
+    def auth_url(self) -> str:
+        return f"http://{self.host}:{self.auth_port}/"
+
+    def client(self, **kwargs):
+        """
+        Returns a Client using the gateway for authentication and API requests.
+        """
+        from satellitevu import Client
+        from satellitevu.auth.cache import MemoryCache
+
+        kwargs.setdefault("cache", MemoryCache())
+        return Client(
+            "fake-client-id",
+            "fake-client-secret",  # pragma: allowlist secret
+            auth_url=self.auth_url,
+            gateway_url=self.url,
+            **kwargs,
+        )
+
+    # Server
+
+    async def start_async(self):
+        """
+        Starts serving the API gateway and, on a separate port like the separate
+        auth host, oauth/token.
+        """
+        api = await asyncio.start_server(self._serve, self.host, self.port)
+        auth = await asyncio.start_server(self._serve, self.host, self.auth_port)
+        self.port = api.sockets[0].getsockname()[1]
+        self.auth_port = auth.sockets[0].getsockname()[1]
+        self._servers = [api, auth]
+
+    async def serve_forever(self):
+        if not self._servers:
+            await self.start_async()
+        await asyncio.gather(*(server.serve_forever() for server in self._servers))
+
+    async def stop_async(self):
+        for server in self._servers:
+            server.close()
+        # Idle keep-alive connections would otherwise outlive the servers
+        for task in list(self._connections):
+            task.cancel()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        for server in self._servers:
+            await server.wait_closed()
+        self._servers = []
+
+    def start(self) -> "FakeGateway":
+        """
+        Starts the gateway in a background thread, returning once it accepts
+        connections.
+        """
+        started = Event()
+        errors = []
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            try:
+                self._loop.run_until_complete(self.start_async())
+            except BaseException as error:  # pragma: no cover
+                errors.append(error)
+                started.set()
+                return
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.stop_async())
+            self._loop.close()
+
+        self._thread = Thread(target=run, name="FakeGateway", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:  # pragma: no cover
+            raise errors[0]
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = self._thread = None
+
+    def __enter__(self) -> "FakeGateway":
+        return self.start()
+
+    def __exit__(self, *args):
+        self.stop()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        task = asyncio.current_task()
+        self._connections.add(task)
+        try:
+            while True:
+                request = await self._read(reader)
+                if request is None:
+                    break
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                response = await self._respond(request)
+                await self._write(writer, request, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    async def _read(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        method, target, _ = line.decode("latin-1").split(" ", 2)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        body = b""
+        if headers.get("content-length"):
+            body = await reader.readexactly(int(headers["content-length"]))
+        if headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        parts = urlsplit(target)
+        return Request(method, parts.path, parse_qs(parts.query), headers, body)
+
+    async def _respond(self, request: Request) -> Response:
+        self.requests += 1
+        delay = self.latency.sample(self._rng)
+        if delay:
+            await asyncio.sleep(delay)
+
+        for methods, pattern, handler in self._routes:
+            match = pattern.match(request.path)
+            if match and request.method in methods:
+                break
+        else:
+            return Response(404, {"detail": "Not Found"})
+
+        if handler.__name__ not in ("oauth_token", "download"):
+            if not request.headers.get("authorization", "").startswith("Bearer "):
+                return Response(401, {"detail": "Unauthorized"})
+            fault = self._fault()
+            if fault is not None:
+                return fault
+
+        try:
+            return handler(request, **match.groupdict())
+        except (ValueError, KeyError, TypeError) as error:
+            return Response(400, {"detail": str(error)})
+
+    def _fault(self) -> Optional[Response]:
+        value = self._rng.random()
+        if value < self.faults.rate_limit:
+            return Response(
+                429,
+                {"detail": "Too Many Requests"},
+                {"Retry-After": str(self.faults.retry_after)},
+            )
+        if value < self.faults.rate_limit + self.faults.server_error:
+            status = self._rng.choice(self.faults.server_error_statuses)
+            return Response(status, {"detail": REASONS[status]})
+        return None
+
+    async def _write(
+        self,
+        writer: asyncio.StreamWriter,
+        request: Request,
+        response: Response,
+        keep_alive: bool,
+    ):
+        headers = {"Connection": "keep-alive" if keep_alive else "close"}
+        body = b""
+        if response.download is None and response.body is not None:
+            body = codec.dumps(response.body)
+            headers["Content-Type"] = "application/json"
+            if len(body) >= GZIP_MIN_SIZE and "gzip" in request.headers.get(
+                "accept-encoding", ""
+            ):
+                body = gzip.compress(body, compresslevel=1)
+                headers["Content-Encoding"] = "gzip"
+        headers.update(response.headers)
+        if response.download is not None:
+            _, start, end = response.download
+            headers["Content-Length"] = str(end - start)
+        else:
+            headers["Content-Length"] = str(len(body))
+
+        reason = REASONS.get(response.status, "Unknown")
+        head = f"HTTP/1.1 {response.status} {reason}\r\n" + "".join(
+            f"{k}: {v}\r\n" for k, v in headers.items()
+        )
+        writer.write(head.encode("latin-1") + b"\r\n")
+        if request.method == "HEAD":
+            pass
+        elif response.download is not None:
+            name, start, end = response.download
+            block = self._block(name)
+            for offset in range(start, end, CHUNK_SIZE):
+                writer.write(
+                    synthetic.download_range(
+                        name, offset, min(offset + CHUNK_SIZE, end), block
+                    )
+                )
+                await writer.drain()
+        else:
+            writer.write(body)
+        await writer.drain()
+
+    def _block(self, name: str) -> bytes:
+        if name not in self._blocks:
+            self._blocks[name] = synthetic.download_block(name)
+        return self._blocks[name]
+
+    def _poll(self, key: str) -> bool:
+        """
+        Counts a poll of a pending resource, returning whether it is ready.
+        """
+        polls = self._polls.get(key, 0)
+        self._polls[key] = polls + 1
+        return polls >= self.pending_polls
+
+    def _download_url(self, key: str, name: str) -> Response:
+        if not self._poll(key):
+            return Response(202, {}, {"Retry-After": str(self.retry_after)})
+        return Response(200, {"url": f"{self.url}downloads/{name}"})
+
+    def _debit(self, contract_id: str, amount: float):
+        self._balances[contract_id] = self._balances.get(contract_id, self.balance)
+        self._balances[contract_id] -= amount
+
+    # Auth
+
+    @route("POST", "/oauth/token")
+    def oauth_token(self, request: Request) -> Response:
+        form = parse_qs(request.body.decode())
+        if not form.get("client_id") or not form.get("client_secret"):
+            return Response(401, {"error": "access_denied"})
+        return Response(
+            200,
+            {
+                "access_token": synthetic.token(form["client_id"][0]),
+                "token_type": "Bearer",
+                "expires_in": 86400,
+                "scope": " ".join(form.get("scope", [])),
+            },
+        )
+
+    # Catalog
+
+    @route("POST", "/catalog/v1/(?P<contract_id>[^/]+)/search")
+    def catalog_search(self, request: Request, contract_id: str) -> Response:
+        payload = request.json()
+        features = self.items
+        if payload.get("ids"):
+            ids = set(payload["ids"])
+            features = [f for f in features if f["id"] in ids]
+        if payload.get("collections"):
+            collections = set(payload["collections"])
+            features = [f for f in features if f["collection"] in collections]
+        if payload.get("bbox"):
+            box = payload["bbox"]
+            features = [f for f in features if bbox_intersects(box, f["bbox"])]
+        if payload.get("intersects"):
+            geometry = payload["intersects"]
+            features = [
+                f for f in features if intersects(geometry, bbox_polygon(f["bbox"]))
+            ]
+        if payload.get("datetime"):
+            start, end = parse_interval(payload["datetime"])
+            features = [
+                f
+                for f in features
+                if (
+                    start is None
+                    or start <= parse_datetime(f["properties"]["datetime"])
+                )
+                and (end is None or parse_datetime(f["properties"]["datetime"]) <= end)
+            ]
+
+        limit = int(payload.get("limit") or 10)
+        offset = int(payload.get("token") or 0)
+        page = features[offset : offset + limit]
+        links = []
+        if offset + limit < len(features):
+            links.append(
+                {
+                    "rel": "next",
+                    "href": f"{self.url}catalog/v1/{contract_id}/search",
+                    "method": "POST",
+                    "body": {"token": str(offset + limit)},
+                    "merge": True,
+                }
+            )
+        return Response(
+            200,
+            {
+                "type": "FeatureCollection",
+                "features": page,
+                "links": links,
+                "context": {
+                    "limit": limit,
+                    "matched": len(features),
+                    "returned": len(page),
+                },
+            },
+        )
+
+    # Orders v2
+
+    @route("GET", "/orders/v2/(?P<contract_id>[^/]+)/")
+    def list_orders(self, request: Request, contract_id: str) -> Response:
+        orders = [o for o in self._orders.values() if o["contract_id"] == contract_id]
+        return Response(200, _page(orders, request, "orders"))
+
+    @route("POST", "/orders/v2/(?P<contract_id>[^/]+)/")
+    def submit_order(self, request: Request, contract_id: str) -> Response:
+        item_ids = request.json()["item_id"]
+        if isinstance(item_ids, str):
+            item_ids = [item_ids]
+        missing = [id for id in item_ids if id not in self._items_by_id]
+        if missing:
+            return Response(404, {"detail": f"Items not found: {missing}"})
+        order_id = str(uuid4())
+        order = synthetic.imagery_order(
+            order_id,
+            contract_id,
+            [self._items_by_id[id] for id in item_ids],
+            self.item_price,
+        )
+        self._orders[order_id] = order
+        self._debit(contract_id, order["price"]["value"])
+        return Response(201, order)
+
+    @route("GET", "/orders/v2/(?P<contract_id>[^/]+)/(?P<order_id>[^/]+)/?")
+    def order_details(self, request: Request, contract_id: str, order_id: str):
+        order = self._orders.get(order_id)
+        if order is None:
+            return Response(404, {"detail": "Order not found"})
+        return Response(200, order)
+
+    @route("GET", "/orders/v2/(?P<contract_id>[^/]+)/(?P<order_id>[^/]+)/download")
+    def order_download(self, request: Request, contract_id: str, order_id: str):
+        if order_id not in self._orders:
+            return Response(404, {"detail": "Order not found"})
+        return self._download_url(order_id, f"{order_id}.zip")
+
+    @route(
+        "GET",
+        "/orders/v2/(?P<contract_id>[^/]+)/(?P<order_id>[^/]+)/(?P<item_id>[^/]+)"
+        "/download",
+    )
+    def item_download(
+        self, request: Request, contract_id: str, order_id: str, item_id: str
+    ):
+        if order_id not in self._orders:
+            return Response(404, {"detail": "Order not found"})
+        return self._download_url(f"{order_id}/{item_id}", f"{item_id}.zip")
+
+    # OTM v2
+
+    @route("POST", "/otm/v2/(?P<contract_id>[^/]+)/tasking/feasibilities/")
+    def post_feasibility(self, request: Request, contract_id: str) -> Response:
+        id = str(uuid4())
+        feasibility = synthetic.tasking_feature(
+            id, contract_id, request.json(), "pending"
+        )
+        self._feasibilities[id] = feasibility
+        return Response(202, feasibility)
+
+    @route("GET", "/otm/v2/(?P<contract_id>[^/]+)/tasking/feasibilities/")
+    def list_feasibilities(self, request: Request, contract_id: str) -> Response:
+        features = [
+            f for f in self._feasibilities.values() if f["contract_id"] == contract_id
+        ]
+        return Response(
+            200, {"type": "FeatureCollection", **_page(features, request, "features")}
+        )
+
+    @route("GET", "/otm/v2/(?P<contract_id>[^/]+)/tasking/feasibilities/(?P<id>[^/]+)")
+    def get_feasibility(self, request: Request, contract_id: str, id: str):
+        feasibility = self._feasibilities.get(id)
+        if feasibility is None:
+            return Response(404, {"detail": "Feasibility request not found"})
+        if feasibility["properties"]["status"] == "pending" and self._poll(id):
+            feasibility["properties"]["status"] = "feasible"
+            feasibility["properties"]["updated_at"] = synthetic.now()
+        return Response(200, feasibility)
+
+    @route(
+        "GET",
+        "/otm/v2/(?P<contract_id>[^/]+)/tasking/feasibilities/(?P<id>[^/]+)/response",
+    )
+    def get_feasibility_response(self, request: Request, contract_id: str, id: str):
+        feasibility = self._feasibilities.get(id)
+        if feasibility is None:
+            return Response(404, {"detail": "Feasibility request not found"})
+        return Response(200, synthetic.opportunities(feasibility))
+
+    @route("POST", "/otm/v2/(?P<contract_id>[^/]+)/tasking/orders/")
+    def create_tasking_order(self, request: Request, contract_id: str) -> Response:
+        id = str(uuid4())
+        order = synthetic.tasking_feature(id, contract_id, request.json(), "received")
+        self._tasking_orders[id] = order
+        self._debit(contract_id, order["properties"]["price"]["value"])
+        return Response(201, order)
+
+    @route("GET", "/otm/v2/(?P<contract_id>[^/]+)/tasking/orders/")
+    def list_tasking_orders(self, request: Request, contract_id: str) -> Response:
+        features = [
+            o for o in self._tasking_orders.values() if o["contract_id"] == contract_id
+        ]
+        return Response(
+            200, {"type": "FeatureCollection", **_page(features, request, "features")}
+        )
+
+    @route("GET", "/otm/v2/(?P<contract_id>[^/]+)/tasking/orders/(?P<id>[^/]+)")
+    def get_tasking_order(self, request: Request, contract_id: str, id: str):
+        order = self._tasking_orders.get(id)
+        if order is None:
+            return Response(404, {"detail": "Order not found"})
+        return Response(200, order)
+
+    @route("POST", "/otm/v2/(?P<contract_id>[^/]+)/tasking/orders/(?P<id>[^/]+)/cancel")
+    def cancel_tasking_order(self, request: Request, contract_id: str, id: str):
+        order = self._tasking_orders.get(id)
+        if order is None:
+            return Response(404, {"detail": "Order not found"})
+        order["properties"]["status"] = "cancelled"
+        return Response(204)
+
+    @route(
+        "GET",
+        "/otm/v2/(?P<contract_id>[^/]+)/tasking/orders/(?P<id>[^/]+)/download",
+    )
+    def tasking_order_download(self, request: Request, contract_id: str, id: str):
+        if id not in self._tasking_orders:
+            return Response(404, {"detail": "Order not found"})
+        return self._download_url(f"tasking/{id}", f"{id}.zip")
+
+    @route("POST", "/otm/v2/(?P<contract_id>[^/]+)/tasking/price/")
+    def tasking_price(self, request: Request, contract_id: str) -> Response:
+        properties = request.json().get("properties") or {}
+        return Response(200, {"price": synthetic.tasking_price(properties)})
+
+    @route("POST", "/otm/v2/(?P<contract_id>[^/]+)/search/")
+    def otm_search(self, request: Request, contract_id: str) -> Response:
+        payload = request.json()
+        features = [
+            *self._feasibilities.values(),
+            *self._tasking_orders.values(),
+        ]
+        features = [f for f in features if f["contract_id"] == contract_id]
+        if payload.get("ids"):
+            ids = set(payload["ids"])
+            features = [f for f in features if f["id"] in ids]
+        limit = int(payload.get("limit") or 25)
+        offset = int(payload.get("token") or 0)
+        links = []
+        if offset + limit < len(features):
+            links.append(
+                {
+                    "rel": "next",
+                    "href": f"{self.url}otm/v2/{contract_id}/search/",
+                    "method": "POST",
+                    "body": {"token": str(offset + limit)},
+                }
+            )
+        return Response(
+            200,
+            {
+                "type": "FeatureCollection",
+                "features": features[offset : offset + limit],
+                "links": links,
+            },
+        )
+
+    # ID v2
+
+    @route("GET", "/id/v2/user/details")
+    def user_details(self, request: Request) -> Response:
+        return Response(
+            200,
+            {
+                "user_id": "fake-user",
+                "name": "Fake User",
+                "email": "fake@example.com",
+                "user_metadata": {"client_id": "fake-client-id", "notifications": []},
+                "last_login": synthetic.now(),
+            },
+        )
+
+    @route("PUT", "/id/v2/user/settings")
+    def user_settings(self, request: Request) -> Response:
+        response = self.user_details(request)
+        response.body["user_metadata"]["notifications"] = request.json().get(
+            "notifications", []
+        )
+        return response
+
+    @route("POST", "/id/v2/client/reset")
+    def client_reset(self, request: Request) -> Response:
+        return Response(
+            200, {"client_id": "fake-client-id", "client_secret": uuid4().hex}
+        )
+
+    @route("GET", "/id/v2/(?P<contract_id>[^/]+)/wallet/credit")
+    def credit_balance(self, request: Request, contract_id: str) -> Response:
+        balance = self._balances.get(contract_id, self.balance)
+        return Response(200, {"currency": "GBP", "balance": balance})
+
+    @route("POST", "/id/v2/webhooks/?")
+    def create_webhook(self, request: Request) -> Response:
+        id = str(uuid4())
+        webhook = {
+            **request.json(),
+            "id": id,
+            "active": True,
+            "signing_key": uuid4().hex,
+        }
+        self._webhooks[id] = webhook
+        return Response(200, webhook)
+
+    @route("GET", "/id/v2/webhooks/")
+    def list_webhooks(self, request: Request) -> Response:
+        return Response(200, _page(list(self._webhooks.values()), request, "webhooks"))
+
+    @route("GET", "/id/v2/webhooks/events/")
+    def webhook_events(self, request: Request) -> Response:
+        return Response(
+            200,
+            [{"name": "tasking", "topics": [{"name": "tasking:order_status"}]}],
+        )
+
+    @route("GET", "/id/v2/webhooks/(?P<id>[^/]+)/")
+    def get_webhook(self, request: Request, id: str) -> Response:
+        if id not in self._webhooks:
+            return Response(404, {"detail": "Webhook not found"})
+        return Response(200, self._webhooks[id])
+
+    @route("PATCH", "/id/v2/webhooks/(?P<id>[^/]+)/")
+    def edit_webhook(self, request: Request, id: str) -> Response:
+        if id not in self._webhooks:
+            return Response(404, {"detail": "Webhook not found"})
+        self._webhooks[id].update(request.json())
+        return Response(200, self._webhooks[id])
+
+    @route("DELETE", "/id/v2/webhooks/(?P<id>[^/]+)/")
+    def delete_webhook(self, request: Request, id: str) -> Response:
+        if self._webhooks.pop(id, None) is None:
+            return Response(404, {"detail": "Webhook not found"})
+        return Response(204)
+
+    @route("POST", "/id/v2/webhooks/(?P<id>[^/]+)/rotate/")
+    def rotate_webhook(self, request: Request, id: str) -> Response:
+        if id not in self._webhooks:
+            return Response(404, {"detail": "Webhook not found"})
+        self._webhooks[id]["signing_key"] = uuid4().hex
+        return Response(200, self._webhooks[id])
+
+    @route("POST", "/id/v2/webhooks/(?P<id>[^/]+)/test/")
+    def test_webhook(self, request: Request, id: str) -> Response:
+        if id not in self._webhooks:
+            return Response(404, {"detail": "Webhook not found"})
+        return Response(200, {"success": True, "message": "Webhook test sent"})
+
+    # Policy
+
+    @route("POST", "/policy/v1/contracts")
+    def contracts(self, request: Request) -> Response:
+        return Response(
+            200,
+            {
+                "result": [
+                    {
+                        "active": True,
+                        "contract_id": self.contract_id,
+                        "name": "Fake contract",
+                        "credit_limit": self.balance,
+                        "allowed_collections": list(synthetic.COLLECTIONS),
+                        "satellite_access": ["hotsat-1"],
+                        "start_date": "2024-01-01",
+                        "end_date": "2099-12-31",
+                        "geographic_restrictions": [],
+                    }
+                ]
+            },
+        )
+
+    @route("POST", "/policy/v1/policy/query/products")
+    def products(self, request: Request) -> Response:
+        return Response(
+            200,
+            {
+                "result": [
+                    {
+                        "code": f"{collection}-archive",
+                        "collections": [collection],
+                        "price": synthetic.price(self.item_price),
+                    }
+                    for collection in synthetic.COLLECTIONS
+                ]
+                + [
+                    {
+                        "code": "standard",
+                        "price": synthetic.price(100000),
+                    },
+                    {
+                        "code": "assured",
+                        "price": synthetic.price(150000),
+                    },
+                ]
+            },
+        )
+
+    # Downloads
+
+    @route("GET|HEAD", "/downloads/(?P<name>[^/]+)")
+    def download(self, request: Request, name: str) -> Response:
+        size = self.download_size
+        etag = f'"{name}-{size}"'
+        headers = {
+            "Content-Type": "application/zip",
+            "Accept-Ranges": "bytes",
+            "ETag": etag,
+        }
+        if request.headers.get("if-none-match") == etag:
+            return Response(304, headers=headers, download=(name, 0, 0))
+
+        range_header = request.headers.get("range")
+        if not range_header:
+            return Response(200, headers=headers, download=(name, 0, size))
+
+        match = re.match(r"bytes=(\d*)-(\d*)$", range_header.strip())
+        if not match or match.groups() == ("", ""):
+            return Response(416, headers={"Content-Range": f"bytes */{size}"})
+        first, last = match.groups()
+        if first:
+            start, end = int(first), min(int(last) + 1 if last else size, size)
+        else:
+            start, end = max(size - int(last), 0), size
+        if start >= size or start >= end:
+            return Response(416, headers={"Content-Range": f"bytes */{size}"})
+        headers["Content-Range"] = f"bytes {start}-{end - 1}/{size}"
+        return Response(206, headers=headers, download=(name, start, end))
@@ -0,0 +1,189 @@
+from allure import description, title, suite
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from random import Random
+from unittest.mock import patch
+
+from pytest import fixture, mark, raises
+
+from satellitevu.auth.cache import MemoryCache
+from satellitevu.http import UrllibClient
+
+from .gateway import Faults, FakeGateway, Latency
+
+
+@fixture(autouse=True)
+def mocketize_fixture():
+    # The gateway is served over real sockets
+    yield
+
+
+@fixture(scope="module")
+def gateway():
+    with FakeGateway(seed=1, items=50, download_size=200_000) as gateway:
+        yield gateway
+
+
+@fixture
+def client(gateway):
+    return gateway.client(cache=MemoryCache(), http_client=UrllibClient())
+
+
+@suite("Fake Gateway")
+class TestFakeGateway:
+    @title("Catalog search")
+    @description("Searches are filtered and paginated")
+    def test_catalog(self, gateway, client):
+        items = list(
+            client.catalog_v1.iter_search(
+                contract_id=gateway.contract_id, collections=["visual"], limit=7
+            )
+        )
+        found = client.catalog_v1.get_items(
+            contract_id=gateway.contract_id, ids=[items[0]["id"], "missing"]
+        )
+
+        assert len(items) == 25
+        assert {item["collection"] for item in items} == {"visual"}
+        assert found.items == [items[0]] and found.missing == ["missing"]
+
+    @title("Imagery orders")
+    @description("Orders are debited and downloaded after a pending poll")
+    def test_orders(self, gateway, client, tmp_path):
+        item_id = gateway.items[0]["id"]
+
+        order = client.orders_v2.submit(
+            contract_id=gateway.contract_id, item_ids=item_id
+        ).json()
+        path = client.orders_v2.download_item(
+            contract_id=gateway.contract_id,
+            order_id=order["id"],
+            item_id=item_id,
+            destdir=str(tmp_path),
+        )
+
+        assert (
+            client.orders_v2.get_order_details(
+                contract_id=gateway.contract_id, order_id=order["id"]
+            )
+            == order
+        )
+        assert client.id_v2.get_credit_balance(gateway.contract_id)["balance"] == (
+            gateway.balance - gateway.item_price
+        )
+        with open(path, "rb") as handle:
+            assert len(handle.read()) == 200_000
+
+    @title("Tasking")
+    @description("Feasibility requests complete after a pending poll")
+    def test_tasking(self, gateway, client, otm_request_parameters):
+        otm_request_parameters["contract_id"] = gateway.contract_id
+        del otm_request_parameters["addon_withhold"]
+
+        feasibility = client.otm_v2.post_feasibility(**otm_request_parameters)
+        statuses = [
+            client.otm_v2.get_feasibility(
+                contract_id=gateway.contract_id, id=feasibility["id"]
+            )["properties"]["status"]
+            for _ in range(2)
+        ]
+        response = client.otm_v2.get_feasibility_response(
+            contract_id=gateway.contract_id, id=feasibility["id"]
+        )
+        order = client.otm_v2.create_order(**otm_request_parameters)
+
+        assert statuses == ["pending", "feasible"]
+        assert len(response["features"]) == 3
+        assert (
+            client.otm_v2.get_order(
+                contract_id=gateway.contract_id, order_id=order["id"]
+            )
+            == order
+        )
+        assert client.contracts_v1.get_contract(gateway.contract_id) is not None
+
+    @title("Shared client")
+    @description("One client is used from many threads with a single token request")
+    @mark.parametrize("http_client", ("urllib", "requests"))
+    def test_threads(self, http_client):
+        if http_client == "requests":
+            from satellitevu.http.requests import RequestsSession
+
+            http_client = RequestsSession()
+        else:
+            http_client = UrllibClient()
+        with FakeGateway(seed=3, items=5) as gateway:
+            results, token_requests = self._hammer(
+                gateway, gateway.client(http_client=http_client)
+            )
+
+        assert results[0::3] == [200] * 32
+        assert results[1::3] == [gateway.balance] * 32
+        assert results[2::3] == [True] * 32
+        assert token_requests == 1
+
+    def _hammer(self, gateway, client):
+        calls = [
+            lambda: client.catalog_v1.search(contract_id=gateway.contract_id).status,
+            lambda: client.id_v2.get_credit_balance(gateway.contract_id)["balance"],
+            lambda: client.contracts_v1.get_contract(gateway.contract_id) is not None,
+        ]
+        auth = client.auth
+        with patch.object(auth, "_auth", wraps=auth._auth) as token_request:
+            with ThreadPoolExecutor(16) as executor:
+                results = list(
+                    executor.map(lambda i: calls[i % len(calls)](), range(96))
+                )
+        return results, token_request.call_count
+
+    @title("Range requests")
+    @mark.parametrize(
+        "range, status, length",
+        (
+            ("bytes=0-99", 206, 100),
+            ("bytes=199990-", 206, 10),
+            ("bytes=-5", 206, 5),
+            ("bytes=200000-", 416, 0),
+        ),
+    )
+    def test_range(self, gateway, range, status, length):
+        url = f"{gateway.url}downloads/item.zip"
+        http = UrllibClient()
+
+        full = http.request("GET", url).content
+        response = http.request("GET", url, headers={"Range": range})
+
+        assert response.status == status
+        assert len(response.content) == length
+        if status == 206:
+            start = int(response.headers["Content-Range"].split()[1].split("-")[0])
+            assert response.content == full[start : start + length]
+
+    @title("Fault injection")
+    @description("Requests are rate limited or fail at the configured rates")
+    def test_faults(self):
+        faults = Faults(rate_limit=0.3, server_error=0.2, retry_after=3)
+        with FakeGateway(seed=2, items=1, faults=faults) as gateway:
+            client = gateway.client(cache=MemoryCache(), http_client=UrllibClient())
+            responses = [
+                client.catalog_v1.search(contract_id=gateway.contract_id)
+                for _ in range(200)
+            ]
+
+        statuses = Counter(r.status // 100 * 100 for r in responses)
+        assert 40 < statuses[400] < 80
+        assert 20 < statuses[500] < 60
+        assert {r.headers["Retry-After"] for r in responses if r.status == 429} == {"3"}
+
+    @title("Latency distributions")
+    @mark.parametrize("distribution", ("uniform", "normal", "lognormal", "exponential"))
+    def test_latency(self, distribution):
+        latency = Latency(0.05, 0.01, distribution)
+        rng = Random(1)
+
+        samples = [latency.sample(rng) for _ in range(2000)]
+
+        assert min(samples) >= 0
+        assert 0.04 < sum(samples) / len(samples) < 0.06
+        with raises(ValueError):
+            Latency(distribution="pareto").sample(rng)
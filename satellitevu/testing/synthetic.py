@@ -0,0 +1,218 @@
+from base64 import urlsafe_b64encode
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from json import dumps
+from random import Random
+from time import time
+from typing import Any, Dict, List, Optional
+
+from satellitevu.geometry import bbox_polygon
+
+EPOCH = datetime(2024, 1, 1, tzinfo=timezone.utc)
+COLLECTIONS = ("visual", "thermal")
+
+
+def isoformat(value: datetime) -> str:
+    return value.astimezone(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def now() -> str:
+    return isoformat(datetime.now(timezone.utc))
+
+
+def token(subject: str, ttl: float = 86400.0) -> str:
+    """
+    Returns an unsigned JWT for subject expiring after ttl seconds.
+    """
+
+    def encode(obj) -> str:
+        return urlsafe_b64encode(dumps(obj).encode()).decode().rstrip("=")
+
+    claims = {"sub": subject, "exp": int(time() + ttl)}
+    return ".".join((encode({"alg": "none", "typ": "JWT"}), encode(claims), "fake"))
+
+
+def price(value: float) -> Dict[str, Any]:
+    return {"value": round(value), "currency": "GBP"}
+
+
+def stac_item(rng: Random, index: int) -> Dict[str, Any]:
+    """
+    Returns a synthetic STAC item shaped like the items of the catalog API.
+    """
+    collection = COLLECTIONS[index % len(COLLECTIONS)]
+    captured = EPOCH + timedelta(hours=index * 7, seconds=rng.randrange(3600))
+    x, y = rng.uniform(-180, 179.9), rng.uniform(-80, 79.9)
+    bbox = [x, y, x + rng.uniform(0.02, 0.1), y + rng.uniform(0.02, 0.1)]
+    id = f"{captured.strftime('%Y%m%dT%H%M%S000')}_{collection}_{index}_hotsat1"
+    return {
+        "type": "Feature",
+        "stac_version": "1.0.0",
+        "id": id,
+        "collection": collection,
+        "bbox": bbox,
+        "geometry": bbox_polygon(bbox),
+        "properties": {
+            "datetime": isoformat(captured),
+            "eo:cloud_cover": round(rng.uniform(0, 100), 2),
+            "gsd": round(rng.uniform(3.5, 6.8), 3),
+            "platform": "hotsat-1",
+            "view:azimuth": round(rng.uniform(0, 360), 2),
+            "view:off_nadir": round(rng.uniform(0, 30), 2),
+            "view:sun_azimuth": round(rng.uniform(0, 360), 2),
+            "view:sun_elevation": round(rng.uniform(-90, 90), 2),
+        },
+        "assets": {
+            "thumbnail": {
+                "href": f"https://example.com/{id}/thumbnail.png",
+                "type": "image/png",
+                "roles": ["thumbnail"],
+            },
+            "visual": {
+                "href": f"https://example.com/{id}/visual.tif",
+                "type": "image/tiff; application=geotiff",
+                "roles": ["data"],
+            },
+        },
+        "links": [],
+    }
+
+
+def stac_items(count: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    rng = Random(seed)
+    return [stac_item(rng, i) for i in range(count)]
+
+
+def imagery_order(
+    order_id: str,
+    contract_id: str,
+    items: List[Dict[str, Any]],
+    item_price: float,
+) -> Dict[str, Any]:
+    """
+    Returns an imagery order shaped like the orders of the orders v2 API.
+    """
+    created_at = now()
+    return {
+        "id": order_id,
+        "type": "FeatureCollection",
+        "features": [
+            {
+                "type": "Feature",
+                "id": order_id,
+                "geometry": item["geometry"],
+                "properties": {
+                    "item_id": item["id"],
+                    "order_id": order_id,
+                    "created_at": created_at,
+                    "stac_metadata": {
+                        k: item[k]
+                        for k in ("id", "collection", "assets", "bbox", "properties")
+                    },
+                    "price": price(item_price),
+                },
+            }
+            for item in items
+        ],
+        "owned_by": "fake-gateway",
+        "created_at": created_at,
+        "updated_at": created_at,
+        "contract_id": contract_id,
+        "price": price(item_price * len(items)),
+    }
+
+
+def tasking_price(properties: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns a deterministic price for a tasking request, higher for assured requests
+    and lower cloud cover limits.
+    """
+    if properties.get("product") == "assured":
+        return price(150000)
+    cloud_cover = properties.get("max_cloud_cover") or 100
+    return price(100000 + 500 * (100 - cloud_cover))
+
+
+def tasking_feature(
+    id: str,
+    contract_id: str,
+    payload: Dict[str, Any],
+    status: str,
+) -> Dict[str, Any]:
+    """
+    Returns a feasibility request or tasking order shaped like the OTM v2 API's.
+    """
+    created_at = now()
+    properties = dict(payload.get("properties") or {})
+    return {
+        "type": "Feature",
+        "id": id,
+        "contract_id": contract_id,
+        "geometry": payload.get("geometry")
+        or {"type": "Point", "coordinates": [0.0, 0.0]},
+        "properties": {
+            **properties,
+            "status": status,
+            "price": tasking_price(properties),
+            "created_at": created_at,
+            "updated_at": created_at,
+        },
+        "links": [],
+    }
+
+
+def opportunities(feasibility: Dict[str, Any], count: int = 3) -> Dict[str, Any]:
+    """
+    Returns the response of a feasibility request, evenly spread over its interval.
+    """
+    properties = feasibility["properties"]
+    start, _, end = (properties.get("datetime") or "").partition("/")
+    try:
+        start_dt = datetime.fromisoformat(start.replace("Z", "+00:00"))
+        end_dt = datetime.fromisoformat(end.replace("Z", "+00:00"))
+    except ValueError:
+        start_dt, end_dt = EPOCH, EPOCH + timedelta(days=7)
+    step = (end_dt - start_dt) / (count + 1)
+    features = [
+        {
+            "type": "Feature",
+            "id": feasibility["id"],
+            "geometry": feasibility["geometry"],
+            "properties": {
+                **{
+                    k: v
+                    for k, v in properties.items()
+                    if k not in ("status", "datetime")
+                },
+                "datetime": f"{isoformat(start_dt + step * i)}/"
+                f"{isoformat(start_dt + step * (i + 1))}",
+            },
+        }
+        for i in range(count)
+    ]
+    return {
+        "type": "FeatureCollection",
+        "id": feasibility["id"],
+        "features": features,
+        "links": [],
+        "properties": {"status": properties["status"]},
+    }
+
+
+def download_block(name: str, size: int = 65536) -> bytes:
+    """
+    Returns the block the content of a synthetic download is repeated from.
+    """
+    seed = sha256(name.encode()).digest()
+    return (seed * (size // len(seed) + 1))[:size]
+
+
+def download_range(name: str, start: int, end: int, block: bytes) -> bytes:
+    """
+    Returns bytes start to end (exclusive) of a synthetic download.
+    """
+    size = len(block)
+    offset = start % size
+    length = end - start
+    repeats = (offset + length) // size + 1
+    return (block * repeats)[offset : offset + length]